@@ -95,9 +95,24 @@ HELP_REGISTRATION_DATE = f"""
 Сегодня значение по умолчанию: {registration_date}
 
 На каке число будут регистрироваться пользователи.
+
+Можно передать несколько дат через запятую, например 20.11.2024,21.11.2024 -
+тогда пользователи распределяются между датами, на которых есть места.
 """
 
 
+HELP_OPEN_TIME = """
+Значение по умолчанию: пусто (не используется)
+
+Время открытия записи на сайте в формате ЧЧ:ММ:СС по Москве, например
+09:00:00. Часы контейнеров сверяются с часами сайта (по заголовку Date
+нескольких запросов), первая волна регистраций отправляется точно в это время
+по часам сайта с поправкой на задержку сети, без проверки свободных мест.
+Смещение часов и ошибка запуска пишутся в лог.
+
+Время --start_time и --stop_time тоже считается по часам сайта.
+"""
+
 HELP_SAVE_LOGS = """
 Значение по умолчанию: yes
 
@@ -108,6 +123,95 @@ registration_<значение в параметре registration_date>/logs/
 Отладочная информация в debug.log
 """
 
+HELP_ASYNC_LOGS = """
+Значение по умолчанию: yes
+
+Может быть либо yes, либо no.
+
+yes - лог файлы записываются отдельными потоками пачками раз в 0.2 секунды,
+event loop не ждет записи на диск во время регистраций. Частые отладочные сообщения
+(например о каждом прокси) в debug.log записываются выборочно: первые 20 с
+каждого места в коде, потом каждое сотое.
+
+no - логи пишутся сразу и полностью.
+"""
+
+HELP_LOOP_MONITOR = """
+Значение по умолчанию: no
+
+Может быть no, yes или debug.
+
+yes - следить за event loop: насколько опаздывают задачи, какие места в коде
+блокируют event loop (разбор html, запись csv и т.д.) и сколько задач ждут в
+очереди asyncio.to_thread. В конце работы отчет пишется в лог и в файлы
+registration_<значение в параметре registration_date>/loop-*.txt
+
+debug - то же самое и режим отладки asyncio, который считает медленные
+callback'и. Режим отладки замедляет работу, только для поиска проблем.
+"""
+
+HELP_TRANSPORT = """
+Значение по умолчанию: aiohttp
+
+Может быть aiohttp или httpx.
+
+Чем отправлять формы регистрации и запросы свободных мест.
+aiohttp - HTTP/1.1, на каждый одновременный запрос свое соединение.
+httpx - HTTP/2, если сайт его поддерживает: одновременные запросы идут по
+одному или нескольким TLS соединениям, а не по десяткам новых.
+"""
+
+HELP_REGISTRATION_RATE = """
+Значение по умолчанию: 0
+
+Сколько запросов регистрации (и капчи) в секунду отправлять с одного адреса
+(прокси) на сайт. 0 - без ограничения, все запросы при открытии мест
+отправляются сразу. Запросы свободных мест ограничены отдельно.
+"""
+
+HELP_SAVE_TRACE = """
+Значение по умолчанию: no
+
+Может быть либо yes, либо no.
+
+Записывать ли время каждого этапа попыток регистрации (капча, выбор прокси,
+соединение, ответ сервера, разбор html) в файлы
+registration_<значение в параметре registration_date>/trace-*.jsonl
+
+Отчет по файлам (p50/p95/p99 по этапам):
+python -m registrator_romania.cli.trace_report registration_<дата>/trace-*.jsonl
+"""
+
+HELP_METRICS_PORT = """
+Значение по умолчанию: 0
+
+Порт, на котором контейнеры отдают метрики в формате Prometheus по адресу
+http://<контейнер>:<порт>/metrics (попытки, успехи, ошибки по типам, остаток
+мест, задержки запросов, размер пула прокси, глубина пула капч, время запросов
+к базе данных). Метрики всех контейнеров суммируются, можно опрашивать любой.
+Порты контейнеров публикуются на хосте в диапазоне от <порт> до
+<порт> + <кол-во контейнеров> - 1, Prometheus должен опрашивать только один
+из них (обычно http://localhost:<порт>/metrics), иначе значения удвоятся.
+
+Метрики остановленного контейнера перестают учитываться через 60 секунд,
+счетчики при этом уменьшаются и Prometheus видит это как сброс счетчика:
+rate() и increase() работают правильно, но сумма за все время без
+остановленных контейнеров.
+
+0 - метрики отключены.
+"""
+
+HELP_TELEGRAM_ALERTS = """
+Значение по умолчанию: no
+
+Может быть либо yes, либо no.
+
+Отправлять ли уведомления в чат telegram (chat_id из config.yml). Успешные
+регистрации отправляются одним сообщением на каждые 10 пользователей или раз
+в 5 секунд, ошибки объединяются. Отправка идет в фоне и не замедляет
+регистрации.
+"""
+
 HELP_USERS_FILE = """
 Параметр обязательный. Значения по умолчанию нет
 
@@ -123,6 +227,9 @@ HELP_TIP_FORMULAR = f"""
 пути - docs/tip_formular.mp4
 
 Инструкция по этому параметру заполялась 26.07.2024 числа.
+
+Можно передать несколько значений через запятую, например 2,4 - тогда
+регистрация идет на все комбинации дат и значений tip_formular.
 """
 
 
@@ -132,12 +239,33 @@ HELP_PROXY_PROVIDER_URL = """
 
 """
 
+HELP_PROXY_SESSIONS = """
+Значение по умолчанию: 0
+
+Сколько разных IP адресов (sticky сессий) резидентного прокси из параметра
+--proxy_provider_url использовать. Пользователи распределяются между ними
+поровну, сессия меняется если IP адрес перестал работать или его заблокировали.
+
+0 - все пользователи регистрируются через один адрес --proxy_provider_url.
+"""
+
+HELP_PROXY_SESSION_TEMPLATE = """
+Значение по умолчанию: brightdata
+
+Как провайдер резидентных прокси задает сессию в логине и пароле.
+Может быть brightdata, oxylabs, smartproxy, iproyal или шаблоном
+в формате <логин>:<пароль>, например {username}-session-{session}:{password}
+"""
+
 
 async def run_docker_compose(containers: int, env_vars: dict):
-    command = (
-        "docker compose -f docker-compose-v0.yml up "
-        f"--scale app={containers} "
-    )
+    command = "docker compose -f docker-compose-v0.yml "
+    if env_vars.get("metrics_port", "0") != "0":
+        # Ports of host for endpoints of metrics, one for each container
+        metrics_port = int(env_vars["metrics_port"])
+        env_vars["metrics_port_last"] = str(metrics_port + containers - 1)
+        command += "-f docker-compose-metrics.yml "
+    command += f"up --scale app={containers} "
     command += "--build"
 
     command_list = shlex.split(command)
@@ -185,7 +313,17 @@ async def run_docker_compose(containers: int, env_vars: dict):
     default=str(registration_date),
     help=HELP_REGISTRATION_DATE,
 )
+@click.option("--open_time", default="", help=HELP_OPEN_TIME)
 @click.option("--save_logs", default="yes", help=HELP_SAVE_LOGS)
+@click.option("--async_logs", default="yes", help=HELP_ASYNC_LOGS)
+@click.option("--save_trace", default="no", help=HELP_SAVE_TRACE)
+@click.option("--loop_monitor", default="no", help=HELP_LOOP_MONITOR)
+@click.option("--telegram_alerts", default="no", help=HELP_TELEGRAM_ALERTS)
+@click.option("--transport", default="aiohttp", help=HELP_TRANSPORT)
+@click.option(
+    "--registration_rate", default=0.0, help=HELP_REGISTRATION_RATE
+)
+@click.option("--metrics_port", default=0, help=HELP_METRICS_PORT)
 @click.option("--users_file", help=HELP_USERS_FILE)
 @click.option("--tip_formular", help=HELP_TIP_FORMULAR)
 @click.option(
@@ -194,6 +332,12 @@ async def run_docker_compose(containers: int, env_vars: dict):
     default="",
     help=HELP_PROXY_PROVIDER_URL,
 )
+@click.option("--proxy_sessions", default=0, help=HELP_PROXY_SESSIONS)
+@click.option(
+    "--proxy_session_template",
+    default="brightdata",
+    help=HELP_PROXY_SESSION_TEMPLATE,
+)
 def main(
     mode: str,
     containers: int,
@@ -202,14 +346,24 @@ def main(
     stop_time: str,
     start_time: str,
     registration_date: str,
+    open_time: str,
     save_logs: str,
+    async_logs: str,
+    save_trace: str,
+    loop_monitor: str,
+    telegram_alerts: str,
+    transport: str,
+    registration_rate: float,
+    metrics_port: int,
     users_file: str,
     tip_formular: int,
     proxy_provider_url: str,
+    proxy_sessions: int,
+    proxy_session_template: str,
 ):
-    assert str(
-        tip_formular
-    ).isdigit(), "Параметр tip_formular должен быть числом!"
+    assert all(
+        tip.strip().isdigit() for tip in str(tip_formular).split(",")
+    ), "Параметр tip_formular должен быть числом или числами через запятую!"
     yes_no = ["yes", "no"]
     assert (
         use_shuffle in yes_no
@@ -217,12 +371,43 @@ def main(
     assert (
         save_logs in yes_no
     ), "Параметр use_shuffle, должен быть либо yes, либо no"
+    assert not open_time or (
+        len(open_time.split(":")) == 3
+        and all(part.isdigit() for part in open_time.split(":"))
+    ), "Параметр open_time должен быть в формате ЧЧ:ММ:СС"
+    assert (
+        async_logs in yes_no
+    ), "Параметр async_logs, должен быть либо yes, либо no"
+    assert (
+        save_trace in yes_no
+    ), "Параметр save_trace, должен быть либо yes, либо no"
+    assert (
+        telegram_alerts in yes_no
+    ), "Параметр telegram_alerts, должен быть либо yes, либо no"
+    assert loop_monitor in [
+        "no",
+        "yes",
+        "debug",
+    ], "Параметр loop_monitor должен быть no, yes или debug"
+    assert transport in [
+        "aiohttp",
+        "httpx",
+    ], "Параметр transport должен быть aiohttp или httpx"
+    assert (
+        registration_rate >= 0
+    ), "Параметр registration_rate не может быть отрицательным"
     assert str(
         async_requests_num
     ).isdigit(), "Параметр async_requests_num, должен быть целым числом!"
     assert str(
         containers
     ).isdigit(), "Параметр containers, должен быть целым числом!"
+    assert str(
+        proxy_sessions
+    ).isdigit(), "Параметр proxy_sessions, должен быть целым числом!"
+    assert str(
+        metrics_port
+    ).isdigit(), "Параметр metrics_port, должен быть целым числом!"
 
     assert mode in [
         "sync",
@@ -234,13 +419,23 @@ def main(
 
     env = {
         "proxy_provider_url": proxy_provider_url,
+        "proxy_sessions": str(proxy_sessions),
+        "proxy_session_template": proxy_session_template,
         "mode": mode,
         "async_requests_num": str(async_requests_num),
         "use_shuffle": use_shuffle,
         "stop_time": stop_time,
         "start_time": start_time,
         "registration_date": registration_date,
+        "open_time": open_time,
         "save_logs": save_logs,
+        "async_logs": async_logs,
+        "save_trace": save_trace,
+        "loop_monitor": loop_monitor,
+        "telegram_alerts": telegram_alerts,
+        "transport": transport,
+        "registration_rate": str(registration_rate),
+        "metrics_port": str(metrics_port),
         "users_file": users_file,
         "tip_formular": str(tip_formular),
     }
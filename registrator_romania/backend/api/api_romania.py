@@ -1,17 +1,38 @@
 import asyncio
 import calendar
 from datetime import datetime, date
+from email.utils import parsedate_to_datetime
 import re
+import time
 from typing import Required, TypedDict
+from urllib.parse import quote_plus, urlencode
 from loguru import logger
 
 import aiohttp
 import bs4
 from pyjsparser import parse
-import ua_generator
+from multidict import CIMultiDictProxy
 from registrator_romania.backend.net import AIOHTTP_NET_ERRORS
 from registrator_romania.backend.net.aiohttp_ext import AiohttpSession
-from registrator_romania.backend.proxies.autopool import AutomaticProxyPool
+from registrator_romania.backend.net.headers import get_header_profiles
+from registrator_romania.backend.net.ratelimit import (
+    Priority,
+    RateLimiter,
+    get_rate_limiter,
+)
+from registrator_romania.backend.net.tracing import get_tracer
+from registrator_romania.backend.net.transport import (
+    TRANSPORT_NET_ERRORS,
+    AiohttpTransport,
+    Response,
+    Transport,
+    merge_headers,
+    read_response,
+)
+from registrator_romania.backend.proxies.autopool import (
+    AutomaticProxyPool,
+    stream_proxies,
+)
 from registrator_romania.backend.proxies.providers.server_proxies import *
 from registrator_romania.backend.proxies.providers.residental_proxies import *
 
@@ -31,6 +52,80 @@ UserData = TypedDict(
 )
 
 
+FORM_HEADERS = {"Content-Type": "application/x-www-form-urlencoded"}
+
+MAIN_HEADERS = {
+    "Accept": "*/*",
+    "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7,my;q=0.6",
+    "Cache-Control": "max-age=0",
+    "Connection": "keep-alive",
+    "Referer": "https://programarecetatenie.eu/programare_online",
+    "Sec-Fetch-Dest": "document",
+    "Sec-Fetch-Mode": "navigate",
+    "Sec-Fetch-Site": "same-origin",
+    "Sec-Fetch-User": "?1",
+    "Upgrade-Insecure-Requests": "1",
+}
+
+REGISTRATIONS_LIST_HEADERS = {
+    "Accept": "application/json, text/javascript, */*; q=0.01",
+    "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7,my;q=0.6",
+    "Connection": "keep-alive",
+    "Origin": "https://programarecetatenie.eu",
+    "Referer": "https://programarecetatenie.eu/verificare_programare",
+    "Sec-Fetch-Dest": "empty",
+    "Sec-Fetch-Mode": "cors",
+    "Sec-Fetch-Site": "same-origin",
+    "X-Requested-With": "XMLHttpRequest",
+}
+
+DATES_HEADERS = {
+    "Accept": "*/*",
+    "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7,my;q=0.6",
+    "Connection": "keep-alive",
+    "Origin": "https://programarecetatenie.eu",
+    "Referer": "https://programarecetatenie.eu/programare_online",
+    "Sec-Fetch-Dest": "empty",
+    "Sec-Fetch-Mode": "cors",
+    "Sec-Fetch-Site": "same-origin",
+    "X-Requested-With": "XMLHttpRequest",
+}
+
+PLACES_HEADERS = {
+    "Accept": "*/*",
+    "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7,my;q=0.6",
+    "Connection": "keep-alive",
+    "Origin": "https://programarecetatenie.eu",
+    "Referer": "https://programarecetatenie.eu/programare_online",
+    "Sec-Fetch-Dest": "empty",
+    "Sec-Fetch-Mode": "cors",
+    "Sec-Fetch-Site": "same-origin",
+    "X-Requested-With": "XMLHttpRequest",
+}
+
+REGISTRATION_HEADERS = {
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
+    "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7,my;q=0.6",
+    "Cache-Control": "max-age=0",
+    "Connection": "keep-alive",
+    "Origin": "https://programarecetatenie.eu",
+    "Referer": "https://programarecetatenie.eu/programare_online",
+    "Sec-Fetch-Dest": "document",
+    "Sec-Fetch-Mode": "navigate",
+    "Sec-Fetch-Site": "same-origin",
+    "Sec-Fetch-User": "?1",
+    "Upgrade-Insecure-Requests": "1",
+}
+
+PAGES_HEADERS = {
+    "main": MAIN_HEADERS,
+    "registrations_list": REGISTRATIONS_LIST_HEADERS,
+    "dates": DATES_HEADERS,
+    "places": PLACES_HEADERS,
+    "registration": REGISTRATION_HEADERS,
+}
+
+
 async def get_proxy_pool(
     start: bool = True, debug: bool = False, offset: int = 0
 ):
@@ -45,10 +140,33 @@ async def get_proxy_pool(
         ProxyCompass(),
         AdvancedMe(),
     ]
+    if start:
+        proxies = stream_proxies(proxies_classes, offset=offset)
+        # Wait for first proxy only, others are checked as soon as they
+        # parsed from providers
+        first = await anext(proxies, None)
+        if first is None:
+            raise TypeError("Proxies empty - []")
+
+        async def chain():
+            yield first
+            async for proxy in proxies:
+                yield proxy
+
+        pool = AutomaticProxyPool(
+            proxies=[],
+            debug=debug,
+            # second_check=True,
+            sources_classes=proxies_classes,
+        )
+        pool.start_ingest(chain())
+        await pool
+        return pool
+
     proxies = []
     for proxy_class in proxies_classes:
         try:
-            proxies.extend(await proxy_class.list_http_proxy())
+            proxies.extend(await proxy_class.list_proxies())
         except AIOHTTP_NET_ERRORS:
             pass
         except asyncio.TimeoutError:
@@ -60,15 +178,12 @@ async def get_proxy_pool(
     if not proxies:
         raise TypeError(f"Proxies empty - {proxies}")
 
-    pool = AutomaticProxyPool(
+    return AutomaticProxyPool(
         proxies=proxies[offset:],
         debug=debug,
         # second_check=True,
         sources_classes=proxies_classes,
     )
-    if start:
-        await pool
-    return pool
 
 
 class APIRomania:
@@ -86,23 +201,71 @@ class APIRomania:
         "&size=invisible&cb=ulevyud5loaq"
     )
 
-    def __init__(self, debug: bool = False, semaphore_value: int = 15) -> None:
+    def __init__(
+        self,
+        debug: bool = False,
+        rate_limiter: RateLimiter = None,
+        base_url: str = None,
+        captcha_base_url: str = None,
+        transport: Transport = None,
+    ) -> None:
+        r"""
+        Forms, polls of places and registrations list sent by `transport`
+        (aiohttp by default), main page and captcha by sessions of aiohttp.
+        """
+        if base_url:
+            # Urls of instance point to other host (e.g. local stub of site)
+            self.BASE_URL = base_url.rstrip("/")
+            self.MAIN_URL = f"{self.BASE_URL}/programare_online"
+            self.STATUS_DAYS_URL = f"{self.BASE_URL}/status_zile"
+            self.STATUS_PLACES_URL = f"{self.BASE_URL}/status_zii"
+            self.REGISTRATIONS_LIST_URL = (
+                f"{self.BASE_URL}/verificare_programare?ajax=true"
+            )
+        if captcha_base_url:
+            self.CAPTCHA_BASE_URL = captcha_base_url.rstrip("/")
+            self.CAPTCHA_URL = self.CAPTCHA_URL.replace(
+                APIRomania.CAPTCHA_BASE_URL, self.CAPTCHA_BASE_URL
+            )
         self._sessionmaker = AiohttpSession()
         self._connections_pool = self._sessionmaker.generate_connector()
+        self._transport = transport or AiohttpTransport(
+            self._connections_pool
+        )
         self._proxy_pool: AutomaticProxyPool = None
         self._debug = debug
         self._main_html = None
         self._lock = asyncio.Lock()
-        self._semaphore = asyncio.Semaphore(semaphore_value)
+        self._rate_limiter = rate_limiter or get_rate_limiter()
+        # Payload of registration and user it built for, by passport,
+        # type of form and date
+        self._payloads: dict[tuple, tuple[UserData, bytes]] = {}
+        self._header_profiles = get_header_profiles()
+
+    async def close(self):
+        r"""Close pool of connections and transport of api."""
+        await self._transport.close()
+        await self._connections_pool.close()
 
     async def get_proxy_pool(self, offset: int = 0):
         if not self._proxy_pool:
             self._proxy_pool = await get_proxy_pool(
                 start=True, debug=self._debug, offset=offset
             )
+            self._proxy_pool.rate_limiter = self._rate_limiter
+            self._watch_targets(self._proxy_pool)
 
         return self._proxy_pool
 
+    def _watch_targets(self, pool: AutomaticProxyPool):
+        r"""
+        Validate proxies of pool against main page of site in background, so
+        ranked proxies for it are ready before first request. Pages of
+        statuses answer only POST, check of them by GET tells nothing, so
+        proxies for all requests are taken from ranking of main page.
+        """
+        pool.watch_target(self.MAIN_URL, headers=self.headers_main_url)
+
     async def get_recaptcha_token(
         self, proxy: str = None, use_proxy: bool = False
     ):
@@ -121,6 +284,9 @@ class APIRomania:
         url_get = f"{base_url}/{data["endpoint"]}/anchor?{data["params"]}"
         async with session:
             try:
+                await self._rate_limiter.acquire(
+                    url_get, proxy, Priority.REGISTRATION
+                )
                 async with session.get(url_get, proxy=proxy) as resp:
                     response = await resp.text()
 
@@ -141,6 +307,9 @@ class APIRomania:
                 url_post = (
                     f"{base_url}/{data["endpoint"]}/reload?k={params["k"]}"
                 )
+                await self._rate_limiter.acquire(
+                    url_post, proxy, Priority.REGISTRATION
+                )
                 async with session.post(
                     url_post, data=this_post_data, proxy=proxy
                 ) as resp:
@@ -179,97 +348,46 @@ class APIRomania:
             return True
         return False
 
+    def is_forbidden_page(self, html_code: str) -> bool:
+        r"""
+        Return True if site blocked the client and return page `Forbidden`
+        instead of form.
+        """
+        head = html_code[:2048].lower()
+        return "403 forbidden" in head or "<title>forbidden" in head
+
+    def get_headers(
+        self, name: str, key: str = None
+    ) -> CIMultiDictProxy[str]:
+        r"""
+        Return headers of page `name` with browser profile. Profile is
+        sticky for `key` (proxy, user), random one if key is None.
+        """
+        return self._header_profiles.get(name, PAGES_HEADERS[name], key=key)
+
     @property
-    def headers_main_url(self) -> dict[str, str]:
-        headers = {
-            "Accept": "*/*",
-            "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7,my;q=0.6",
-            "Cache-Control": "max-age=0",
-            "Connection": "keep-alive",
-            "Referer": "https://programarecetatenie.eu/programare_online",
-            "Sec-Fetch-Dest": "document",
-            "Sec-Fetch-Mode": "navigate",
-            "Sec-Fetch-Site": "same-origin",
-            "Sec-Fetch-User": "?1",
-            "Upgrade-Insecure-Requests": "1",
-        }
-        for k, v in ua_generator.generate().headers.get().items():
-            headers[k] = v
-        return headers
+    def headers_main_url(self) -> CIMultiDictProxy[str]:
+        return self.get_headers("main")
 
     @property
     def headers_captcha_url(self) -> dict[str, str]:
         return {"Content-Type": "application/x-www-form-urlencoded"}
 
     @property
-    def headers_registrations_list_url(self) -> dict[str, str]:
-        headers = {
-            "Accept": "application/json, text/javascript, */*; q=0.01",
-            "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7,my;q=0.6",
-            "Connection": "keep-alive",
-            "Origin": "https://programarecetatenie.eu",
-            "Referer": "https://programarecetatenie.eu/verificare_programare",
-            "Sec-Fetch-Dest": "empty",
-            "Sec-Fetch-Mode": "cors",
-            "Sec-Fetch-Site": "same-origin",
-            "X-Requested-With": "XMLHttpRequest",
-        }
-        for k, v in ua_generator.generate().headers.get().items():
-            headers[k] = v
-        return headers
+    def headers_registrations_list_url(self) -> CIMultiDictProxy[str]:
+        return self.get_headers("registrations_list")
 
     @property
-    def headers_dates_url(self) -> dict[str, str]:
-        headers = {
-            "Accept": "*/*",
-            "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7,my;q=0.6",
-            "Connection": "keep-alive",
-            "Origin": "https://programarecetatenie.eu",
-            "Referer": "https://programarecetatenie.eu/programare_online",
-            "Sec-Fetch-Dest": "empty",
-            "Sec-Fetch-Mode": "cors",
-            "Sec-Fetch-Site": "same-origin",
-            "X-Requested-With": "XMLHttpRequest",
-        }
-        for k, v in ua_generator.generate().headers.get().items():
-            headers[k] = v
-        return headers
+    def headers_dates_url(self) -> CIMultiDictProxy[str]:
+        return self.get_headers("dates")
 
     @property
-    def headers_places_url(self) -> dict[str, str]:
-        headers = {
-            "Accept": "*/*",
-            "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7,my;q=0.6",
-            "Connection": "keep-alive",
-            "Origin": "https://programarecetatenie.eu",
-            "Referer": "https://programarecetatenie.eu/programare_online",
-            "Sec-Fetch-Dest": "empty",
-            "Sec-Fetch-Mode": "cors",
-            "Sec-Fetch-Site": "same-origin",
-            "X-Requested-With": "XMLHttpRequest",
-        }
-        for k, v in ua_generator.generate().headers.get().items():
-            headers[k] = v
-        return headers
+    def headers_places_url(self) -> CIMultiDictProxy[str]:
+        return self.get_headers("places")
 
     @property
-    def headers_registration_url(self) -> dict[str, str]:
-        headers = {
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
-            "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7,my;q=0.6",
-            "Cache-Control": "max-age=0",
-            "Connection": "keep-alive",
-            "Origin": "https://programarecetatenie.eu",
-            "Referer": "https://programarecetatenie.eu/programare_online",
-            "Sec-Fetch-Dest": "document",
-            "Sec-Fetch-Mode": "navigate",
-            "Sec-Fetch-Site": "same-origin",
-            "Sec-Fetch-User": "?1",
-            "Upgrade-Insecure-Requests": "1",
-        }
-        for k, v in ua_generator.generate().headers.get().items():
-            headers[k] = v
-        return headers
+    def headers_registration_url(self) -> CIMultiDictProxy[str]:
+        return self.get_headers("registration")
 
     async def _get_main_html(self):
         if self._main_html:
@@ -278,23 +396,41 @@ class APIRomania:
         session = await self.get_session()
         session._default_headers = self.headers_main_url
 
-        async with session:
-            proxies = [None]
+        proxies = [None]
+        try:
             while True:
                 try:
                     for proxy in proxies:
+                        await self._rate_limiter.acquire(self.MAIN_URL, proxy)
                         async with session.get(
                             self.MAIN_URL, proxy=proxy
                         ) as resp:
+                            self._rate_limiter.report(
+                                self.MAIN_URL, proxy, resp.status
+                            )
                             reason = resp.reason.lower()
 
                             if reason.count("forbidden") and proxies == [None]:
                                 pool = await self.get_proxy_pool()
                                 url = self.MAIN_URL
-                                headers = self.headers_main_url
-                                proxies = await pool.collect_valid_proxies(
-                                    url=url, headers=headers
-                                )
+                                proxies = pool.get_target_proxies(url)
+                                if not proxies:
+                                    headers = self.headers_main_url
+                                    records = await pool.collect_valid_proxies(
+                                        url=url, headers=headers
+                                    )
+                                    proxies = [r["proxy"] for r in records]
+
+                                if not proxies:
+                                    proxies = [None]
+                                    await asyncio.sleep(1.5)
+                                    continue
+
+                                # Session of pool can send requests through
+                                # socks proxies too
+                                await session.close()
+                                session = await pool.get_session()
+                                session._default_headers = self.headers_main_url
                                 continue
 
                             return await resp.text()
@@ -302,6 +438,8 @@ class APIRomania:
                 except AIOHTTP_NET_ERRORS:
                     await asyncio.sleep(1.5)
                     continue
+        finally:
+            await session.close()
 
     async def get_session(
         self, with_proxy_if_exists: bool = True, timeout: int = 5
@@ -312,6 +450,28 @@ class APIRomania:
             self._connections_pool, total_timeout=timeout
         )
 
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        data: dict[str, str] = None,
+        headers: dict[str, str] = None,
+    ) -> Response:
+        r"""
+        Send request by session of proxy pool if it is configured (pool
+        chooses and rotates proxies), otherwise by transport directly.
+        """
+        if not self._proxy_pool:
+            return await self._transport.request(
+                method, url, data=data, headers=headers
+            )
+
+        session = await self.get_session()
+        session._default_headers = headers
+        async with session:
+            async with session.request(method, url, data=data) as resp:
+                return await read_response(resp)
+
     async def _get_default_disabled_weekdays(
         self, year: int, month: int, tip_formular: int
     ) -> list[int]:
@@ -343,22 +503,23 @@ class APIRomania:
     async def _get_disabled_days(
         self, year: int, month: int, tip_formular: int
     ):
-        session = await self.get_session()
-        session._default_headers = self.headers_dates_url
-
         month = f"0{month}" if len(str(month)) == 1 else str(month)
-        form_data = aiohttp.FormData()
-        form_data.add_field("azi", f"{year}-{month}")
-        form_data.add_field("tip_formular", str(tip_formular))
-        async with session:
-            try:
-                async with session.post(
-                    self.STATUS_DAYS_URL, data=form_data
-                ) as resp:
-                    raw = await resp.read()
-                    response = await resp.json(content_type=resp.content_type)
-            except Exception:
-                return
+        form_data = {
+            "azi": f"{year}-{month}",
+            "tip_formular": str(tip_formular),
+        }
+        try:
+            await self._rate_limiter.acquire(self.STATUS_DAYS_URL)
+            resp = await self._send(
+                "POST",
+                self.STATUS_DAYS_URL,
+                data=form_data,
+                headers=self.headers_dates_url,
+            )
+            self._rate_limiter.report(self.STATUS_DAYS_URL, None, resp.status)
+            response = resp.json()
+        except Exception:
+            return
 
         return [
             date.day
@@ -382,12 +543,30 @@ class APIRomania:
         if not days_disable or not weekdays_disable:
             return []
 
+        return [
+            dt.strftime("%Y-%m-%d")
+            for dt in self.filter_free_days(
+                year, month, weekdays_disable, days_disable
+            )
+        ]
+
+    @staticmethod
+    def filter_free_days(
+        year: int,
+        month: int,
+        weekdays_disable: list[int],
+        days_disable: list[int],
+    ) -> list[date]:
+        r"""
+        Return days of month what are not disabled. Weekdays numbered from
+        0 (sunday) like in javascript of site.
+        """
         dates = []
         for day in range(1, int(calendar.monthrange(year, month)[1]) + 1):
             dt = date(year, month, day)
             weekday_num = 0 if dt.isoweekday() == 7 else dt.isoweekday()
             if weekday_num not in weekdays_disable and day not in days_disable:
-                dates.append(dt.strftime("%Y-%m-%d"))
+                dates.append(dt)
         return dates
 
     async def get_free_places_for_date(
@@ -397,37 +576,72 @@ class APIRomania:
             year = datetime.now().year
         month = f"0{month}" if len(str(month)) == 1 else str(month)
 
-        session = await self.get_session()
-        session._default_headers = self.headers_places_url
-
-        form_data = aiohttp.FormData()
-        form_data.add_field("azi", f"{year}-{month}-{day}")
-        form_data.add_field("tip_formular", tip_formular)
+        form_data = {
+            "azi": f"{year}-{month}-{day}",
+            "tip_formular": str(tip_formular),
+        }
+        try:
+            await self._rate_limiter.acquire(self.STATUS_PLACES_URL)
+            resp = await self._send(
+                "POST",
+                self.STATUS_PLACES_URL,
+                data=form_data,
+                headers=self.headers_places_url,
+            )
+            self._rate_limiter.report(
+                self.STATUS_PLACES_URL, None, resp.status
+            )
+            return resp.json()["numar_ramase"]
+        except TRANSPORT_NET_ERRORS:
+            return
+        except (ValueError, KeyError, TypeError):
+            # Page of error (e.g. `Forbidden`) instead of json
+            return
 
-        async with session:
-            try:
-                async with session.post(
-                    self.STATUS_PLACES_URL, data=form_data
-                ) as resp:
-                    raw = await resp.read()
-                    response = await resp.json(content_type=resp.content_type)
-            except AIOHTTP_NET_ERRORS:
-                return
+    async def get_server_date(
+        self,
+    ) -> tuple[float, float, datetime] | None:
+        r"""
+        Send HEAD request to main page. Return local unix time before
+        request, local unix time when headers received and `Date` header of
+        response (precision of it is one second).
+        """
+        try:
+            await self._rate_limiter.acquire(
+                self.MAIN_URL, None, Priority.POLLING
+            )
+            sent = time.time()
+            resp = await self._transport.request(
+                "HEAD", self.MAIN_URL, headers=self.headers_main_url
+            )
+            received = time.time()
+            header = resp.headers.get("Date")
+        except TRANSPORT_NET_ERRORS:
+            return
 
-        return response["numar_ramase"]
+        if not header:
+            return
+        return sent, received, parsedate_to_datetime(header)
 
-    async def make_registration(
+    def registration_payload(
         self,
         user_data: UserData,
         registration_date: datetime,
         tip_formular: int,
-        proxy: str = None,
-        queue: asyncio.Queue = None,
-    ):
-        # g_recaptcha_response = await self.get_captcha_token()
-        g_recaptcha_response = await self.get_recaptcha_token()
-        if not g_recaptcha_response:
-            return
+    ) -> bytes:
+        r"""
+        Return urlencoded form of registration, what ends with name of
+        captcha field, so at send time only token appended to it. Payload
+        encoded once for each user and registration date, it is built again
+        only if other object of user with same passport passed (e.g. data of
+        user updated from source). Payload removed after success
+        registration.
+        """
+        key = self._payload_key(user_data, registration_date, tip_formular)
+        cached = self._payloads.get(key)
+        if cached is not None and cached[0] is user_data:
+            return cached[1]
+
         data = {
             "tip_formular": tip_formular,
             "nume_pasaport": user_data["Nume Pasaport"].strip(),
@@ -441,36 +655,91 @@ class APIRomania:
             "data_programarii": registration_date.strftime("%Y-%m-%d"),
             "gdpr": "1",
             "honeypot": "",
-            "g-recaptcha-response": g_recaptcha_response,
+            "g-recaptcha-response": "",
         }
-        session = await self.get_session(with_proxy_if_exists=False)
-        session._default_headers = self.headers_registration_url
-        async with session:
-            try:
-                async with session.post(
-                    self.MAIN_URL, data=data, proxy=proxy
-                ) as resp:
-                    html = await resp.text()
+        payload = urlencode(data).encode()
+        self._payloads[key] = (user_data, payload)
+        return payload
 
-                if not isinstance(html, str):
-                    return
+    @staticmethod
+    def _payload_key(
+        user_data: UserData, registration_date: datetime, tip_formular: int
+    ) -> tuple:
+        passport = user_data["Serie și număr Pașaport"]
+        return passport, str(tip_formular), registration_date
 
-                if self.is_success_registration(html):
-                    if queue:
-                        await queue.put((user_data, html))
-
-                return html
-            except asyncio.CancelledError as e:
-                print(e)
-                raise e
-            except asyncio.TimeoutError as e:
-                print(e)
-                raise e
-            except AIOHTTP_NET_ERRORS as e:
-                print(e)
-                return e
-            except Exception as e:
-                logger.exception(e)
+    async def make_registration(
+        self,
+        user_data: UserData,
+        registration_date: datetime,
+        tip_formular: int,
+        proxy: str = None,
+        queue: asyncio.Queue = None,
+        g_recaptcha_response: str = None,
+    ):
+        r"""
+        Send form of registration. Token of captcha can be passed by
+        `g_recaptcha_response` (e.g. from pool), otherwise it is fetched.
+        """
+        tracer = get_tracer()
+        payload = self.registration_payload(
+            user_data, registration_date, tip_formular
+        )
+        if not g_recaptcha_response:
+            # g_recaptcha_response = await self.get_captcha_token()
+            with tracer.span("captcha"):
+                g_recaptcha_response = await self.get_recaptcha_token()
+        if not g_recaptcha_response:
+            return
+        data = payload + quote_plus(g_recaptcha_response).encode()
+
+        headers = merge_headers(
+            self.get_headers(
+                "registration",
+                key=proxy or user_data["Serie și număr Pașaport"],
+            ),
+            FORM_HEADERS,
+        )
+        try:
+            with tracer.span("rate_limit"):
+                await self._rate_limiter.acquire(
+                    self.MAIN_URL, proxy, Priority.REGISTRATION
+                )
+            with tracer.span("post"):
+                resp = await self._transport.request(
+                    "POST",
+                    self.MAIN_URL,
+                    data=data,
+                    headers=headers,
+                    proxy=proxy,
+                )
+                self._rate_limiter.report(
+                    self.MAIN_URL, proxy, resp.status, Priority.REGISTRATION
+                )
+                html = resp.text()
+
+            if self.is_success_registration(html):
+                self._payloads.pop(
+                    self._payload_key(
+                        user_data, registration_date, tip_formular
+                    ),
+                    None,
+                )
+                if queue:
+                    await queue.put((user_data, html))
+
+            return html
+        except asyncio.CancelledError as e:
+            print(e)
+            raise e
+        except asyncio.TimeoutError as e:
+            print(e)
+            raise e
+        except TRANSPORT_NET_ERRORS as e:
+            print(e)
+            return e
+        except Exception as e:
+            logger.exception(e)
 
     async def see_registrations(
         self,
@@ -482,7 +751,13 @@ class APIRomania:
         numar_pasaport: str = "",
         limit: int = 500,
         data_programarii: list[datetime] = None,
+        start: int = 0,
     ):
+        r"""
+        Return page of registrations (datatables response with `data`,
+        `recordsTotal`, `recordsFiltered`) from row `start`, filtered by
+        site with values of columns.
+        """
         if data_programarii:
             dt_start, dt_end = map(
                 lambda dt: dt.strftime("%Y-%m-%d"), data_programarii
@@ -539,24 +814,24 @@ class APIRomania:
             "columns[7][orderable]": "false",
             "columns[7][search][value]": numar_pasaport,
             "columns[7][search][regex]": "false",
-            "start": "0",
-            "length": limit,
+            "start": str(start),
+            "length": str(limit),
             "search[value]": "",
             "search[regex]": "false",
         }
 
-        session = self._sessionmaker.generate(
-            self._connections_pool, close_connector=False
-        )
-        session._default_headers = self.headers_registrations_list_url
-        async with session:
-            try:
-                async with session.post(
-                    self.REGISTRATIONS_LIST_URL, data=data
-                ) as resp:
-                    raw = await resp.read()
-                    return await resp.json(content_type=resp.content_type)
-            except AIOHTTP_NET_ERRORS:
-                pass
-            except Exception as e:
-                logger.exception(e)
+        url = self.REGISTRATIONS_LIST_URL
+        try:
+            await self._rate_limiter.acquire(url, None, Priority.VERIFICATION)
+            resp = await self._send(
+                "POST",
+                url,
+                data=data,
+                headers=self.headers_registrations_list_url,
+            )
+            self._rate_limiter.report(url, None, resp.status)
+            return resp.json()
+        except TRANSPORT_NET_ERRORS:
+            pass
+        except Exception as e:
+            logger.exception(e)
@@ -0,0 +1,186 @@
+"""Concurrent scan of free dates and places on site."""
+
+import asyncio
+from datetime import date
+import time
+from typing import Awaitable, Callable, TypedDict
+
+from loguru import logger
+
+from registrator_romania.backend.api.api_romania import APIRomania
+from registrator_romania.backend.net import AIOHTTP_NET_ERRORS
+
+
+DateAvailability = TypedDict(
+    "DateAvailability",
+    {"date": date, "tip_formular": int, "places": int},
+)
+
+
+class AvailabilityScanner:
+    r"""
+    Scan free dates of several months and types of form concurrently.
+    Requests to `status_zile` and `status_zii` limited by `concurrency`
+    and `rate` (requests per second), results cached for `days_ttl` and
+    `places_ttl` seconds. Concurrent calls for same key share one request.
+    """
+
+    def __init__(
+        self,
+        api: APIRomania = None,
+        concurrency: int = 10,
+        rate: float = 20,
+        days_ttl: float = 60,
+        places_ttl: float = 5,
+        weekdays_ttl: float = 3600,
+    ) -> None:
+        self._api = api or APIRomania()
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._interval = 1 / rate if rate else 0
+        self._next_request = 0.0
+        self._days_ttl = days_ttl
+        self._places_ttl = places_ttl
+        self._weekdays_ttl = weekdays_ttl
+        # key: (expires at, task with result)
+        self._cache: dict[tuple, tuple[float, asyncio.Task]] = {}
+
+    async def _throttle(self):
+        now = time.monotonic()
+        wait = self._next_request - now
+        self._next_request = max(now, self._next_request) + self._interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def _request(self, factory: Callable[[], Awaitable]):
+        async with self._semaphore:
+            await self._throttle()
+            try:
+                return await factory()
+            except AIOHTTP_NET_ERRORS:
+                return None
+
+    async def _cached(
+        self, key: tuple, ttl: float, factory: Callable[[], Awaitable]
+    ):
+        cached = self._cache.get(key)
+        if cached and (not cached[1].done() or cached[0] > time.monotonic()):
+            return await asyncio.shield(cached[1])
+
+        task = asyncio.create_task(self._request(factory))
+        self._cache[key] = (time.monotonic() + ttl, task)
+        try:
+            result = await asyncio.shield(task)
+        except Exception:
+            self._cache.pop(key, None)
+            raise
+
+        if result is None:
+            # Failed requests are not cached
+            self._cache.pop(key, None)
+        else:
+            self._cache[key] = (time.monotonic() + ttl, task)
+        return result
+
+    def clear(self):
+        self._cache.clear()
+
+    async def free_days(
+        self, year: int, month: int, tip_formular: int
+    ) -> list[date] | None:
+        r"""Return free days of month, None if site not responded."""
+        api = self._api
+        weekdays, days = await asyncio.gather(
+            self._cached(
+                ("weekdays", tip_formular),
+                self._weekdays_ttl,
+                lambda: api._get_default_disabled_weekdays(
+                    year=year, month=month, tip_formular=tip_formular
+                ),
+            ),
+            self._cached(
+                ("days", year, month, tip_formular),
+                self._days_ttl,
+                lambda: api._get_disabled_days(
+                    year=year, month=month, tip_formular=tip_formular
+                ),
+            ),
+        )
+        if weekdays is None or days is None:
+            return None
+        return api.filter_free_days(year, month, weekdays, days)
+
+    async def free_places(self, dt: date, tip_formular: int) -> int | None:
+        r"""Return count of free places for date, None if unknown."""
+        places = await self._cached(
+            ("places", dt, tip_formular),
+            self._places_ttl,
+            lambda: self._api.get_free_places_for_date(
+                tip_formular=tip_formular,
+                month=dt.month,
+                day=dt.day,
+                year=dt.year,
+            ),
+        )
+        try:
+            return int(places)
+        except (TypeError, ValueError):
+            return None
+
+    async def scan(
+        self,
+        months: list[tuple[int, int]],
+        tip_formulars: list[int],
+        min_places: int = 1,
+    ) -> list[DateAvailability]:
+        r"""
+        Return dates of `months` (list of `(year, month)`) for each type of
+        form with at least `min_places` free places, ranked by count of
+        places (more first), then by date.
+        """
+        combinations = [
+            (year, month, tip)
+            for year, month in months
+            for tip in tip_formulars
+        ]
+        days_results = await asyncio.gather(
+            *[self.free_days(*c) for c in combinations],
+            return_exceptions=True,
+        )
+
+        candidates = []
+        for (year, month, tip), days in zip(combinations, days_results):
+            if isinstance(days, BaseException):
+                logger.opt(exception=days).error(
+                    f"Free days of {month}.{year} ({tip}) not received"
+                )
+                continue
+            candidates.extend((dt, tip) for dt in days or [])
+
+        places_results = await asyncio.gather(
+            *[self.free_places(dt, tip) for dt, tip in candidates],
+            return_exceptions=True,
+        )
+
+        table: list[DateAvailability] = []
+        for (dt, tip), places in zip(candidates, places_results):
+            if isinstance(places, BaseException):
+                logger.opt(exception=places).error(
+                    f"Free places of {dt:%d.%m.%Y} ({tip}) not received"
+                )
+                continue
+            if places is not None and places >= min_places:
+                table.append(
+                    {"date": dt, "tip_formular": tip, "places": places}
+                )
+
+        table.sort(key=lambda r: (-r["places"], r["date"]))
+        return table
+
+    async def best_date(
+        self,
+        months: list[tuple[int, int]],
+        tip_formulars: list[int],
+        min_places: int = 1,
+    ) -> DateAvailability | None:
+        table = await self.scan(months, tip_formulars, min_places)
+        return table[0] if table else None
@@ -0,0 +1,119 @@
+"""Pool of prefetched captcha tokens shared between registrations."""
+
+import asyncio
+from collections import deque
+import time
+
+from loguru import logger
+
+from registrator_romania.backend.api.api_romania import APIRomania
+from registrator_romania.backend.net import metrics
+
+
+class CaptchaTokenPool:
+    r"""
+    Keep up to `size` fresh tokens of recaptcha, fetched in background by
+    `workers` tasks. Token of recaptcha valid about two minutes, tokens
+    older than `ttl` seconds are dropped. If pool is empty, token fetched
+    directly, so with `size` 0 tokens are not prefetched at all.
+    """
+
+    def __init__(
+        self,
+        api: APIRomania,
+        size: int = 10,
+        workers: int = 3,
+        ttl: float = 100,
+    ) -> None:
+        if size < 0:
+            raise ValueError(f"Size of pool can't be negative - {size}")
+        self._api = api
+        self._size = size
+        self._workers = workers
+        self._ttl = ttl
+        # (token, fetched at)
+        self._tokens: deque[tuple[str, float]] = deque()
+        self._tasks: list[asyncio.Task] = []
+        self._demand = asyncio.Event()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @size.setter
+    def size(self, size: int):
+        if size < 0:
+            raise ValueError(f"Size of pool can't be negative - {size}")
+        self._size = size
+        # Workers waiting on full pool fetch more tokens
+        self._demand.set()
+
+    def __len__(self) -> int:
+        self._drop_expired()
+        return len(self._tokens)
+
+    def _drop_expired(self):
+        deadline = time.monotonic() - self._ttl
+        while self._tokens and self._tokens[0][1] < deadline:
+            self._tokens.popleft()
+        metrics.CAPTCHA_POOL_DEPTH.set(len(self._tokens))
+
+    def start(self):
+        if self._tasks:
+            return
+        self._demand.set()
+        self._tasks = [
+            asyncio.create_task(self._refill()) for _ in range(self._workers)
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _refill(self):
+        while True:
+            self._drop_expired()
+            if len(self._tokens) >= self._size:
+                self._demand.clear()
+                # Wake up when oldest token expires, so pool is full of
+                # fresh tokens even if nobody takes them (e.g. before
+                # opening of places). Pool of zero size has no tokens, it
+                # waits only for change of size
+                expires_in = None
+                if self._tokens:
+                    expires_in = max(
+                        self._tokens[0][1] + self._ttl - time.monotonic(), 0
+                    )
+                try:
+                    async with asyncio.timeout(expires_in):
+                        await self._demand.wait()
+                except TimeoutError:
+                    pass
+                continue
+
+            try:
+                token = await self._api.get_recaptcha_token()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(e)
+                token = None
+
+            if token:
+                self._tokens.append((token, time.monotonic()))
+                metrics.CAPTCHA_POOL_DEPTH.set(len(self._tokens))
+            else:
+                await asyncio.sleep(1)
+
+    async def get(self) -> str | None:
+        r"""Return fresh token, each token returned only once."""
+        self._drop_expired()
+        self._demand.set()
+        if self._tokens:
+            # Oldest token first, so less tokens expire unused
+            token, _ = self._tokens.popleft()
+            metrics.CAPTCHA_POOL_DEPTH.set(len(self._tokens))
+            return token
+        return await self._api.get_recaptcha_token()
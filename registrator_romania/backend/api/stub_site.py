@@ -0,0 +1,423 @@
+"""
+Local stub of programarecetatenie.eu and recaptcha for offline load tests.
+"""
+
+import asyncio
+from datetime import date, datetime
+import random
+import secrets
+import ssl
+import time
+
+import aiohttp
+from aiohttp import web
+import h2.config
+import h2.connection
+import h2.events
+import h2.exceptions
+
+
+FORBIDDEN_HTML = "<html><head><title>Forbidden</title></head></html>"
+
+
+def _weekdays_script(weekdays: dict[int, list[int]]) -> str:
+    # Same shape of AST what `APIRomania._get_default_disabled_weekdays`
+    # walks in script of real page
+    statements = "".join(f"var v{i} = {i}; " for i in range(14))
+    properties = "".join(f"p{i}: {i}, " for i in range(6))
+    cases = "".join(
+        f'case "{tip}": var disabled = {days}; break; '
+        for tip, days in weekdays.items()
+    )
+    return (
+        "$(document).ready(function () { "
+        f"{statements}"
+        "if (true) { var a = 1; var b = 2; var c = 3; "
+        f"$('#data_programarii').datepicker({{{properties}"
+        "beforeShowDay: function (date) { switch (tip_formular) { "
+        f"{cases}"
+        "} } }); } });"
+    )
+
+
+def _alert(text: str) -> str:
+    return f'<html><p class="alert alert-danger">{text}</p></html>'
+
+
+class StubSite:
+    r"""
+    aiohttp application what emulate `programare_online`, `status_zile`,
+    `status_zii`, `verificare_programare` and anchor/reload of recaptcha.
+    Each date has `capacity` places for each type of form, places opened
+    `open_after` seconds after start. Each response delayed by `latency`
+    seconds (with `jitter`), `forbidden_rate` of requests get page
+    `Forbidden` with `forbidden_status` (403, 429 or even 200 on real site).
+    `connections` are addresses of clients, one for each opened connection.
+
+    With `certfile` and `keyfile` stub serves HTTP/2 over TLS (ALPN `h2`
+    only) like real site: frontend of h2 passes requests to application
+    served on other local port.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 100,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        forbidden_rate: float = 0.0,
+        forbidden_status: int = 403,
+        open_after: float = 0.0,
+        weekdays: dict[int, list[int]] = None,
+        certfile: str = None,
+        keyfile: str = None,
+    ) -> None:
+        self.capacity = capacity
+        self.latency = latency
+        self.jitter = jitter
+        self.forbidden_rate = forbidden_rate
+        self.forbidden_status = forbidden_status
+        self.open_after = open_after
+        self.weekdays = weekdays or {tip: [0, 6] for tip in range(1, 7)}
+        self.registrations: list[dict] = []
+        self.requests: dict[str, int] = {}
+        self.connections: set[tuple] = set()
+        self._started = time.monotonic()
+        self._runner: web.AppRunner = None
+        self.url: str = None
+        self._certfile = certfile
+        self._keyfile = keyfile
+        self._h2_server: asyncio.Server = None
+        self._h2_session: aiohttp.ClientSession = None
+        self._app_url: str = None
+
+    @property
+    def is_open(self) -> bool:
+        return time.monotonic() - self._started >= self.open_after
+
+    def places(self, dt: str, tip_formular: int) -> int:
+        if not self.is_open:
+            return 0
+        taken = sum(
+            1
+            for r in self.registrations
+            if r["data_programarii"] == dt
+            and r["tip_formular"] == str(tip_formular)
+        )
+        return max(self.capacity - taken, 0)
+
+    def create_app(self) -> web.Application:
+        app = web.Application(middlewares=[self._middleware])
+        app.add_routes(
+            [
+                web.get("/programare_online", self.main_page),
+                web.post("/programare_online", self.registrate),
+                web.post("/status_zile", self.status_days),
+                web.post("/status_zii", self.status_places),
+                web.post("/verificare_programare", self.registrations_list),
+                web.get("/recaptcha/api2/anchor", self.captcha_anchor),
+                web.post("/recaptcha/api2/reload", self.captcha_reload),
+            ]
+        )
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        r"""Start server, return base url of it."""
+        self._runner = web.AppRunner(self.create_app())
+        await self._runner.setup()
+        if self._certfile:
+            # Application only behind frontend of h2
+            site = web.TCPSite(self._runner, host, 0)
+        else:
+            site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        app_port = self._runner.addresses[0][1]
+        self._started = time.monotonic()
+        self._app_url = f"http://{host}:{app_port}"
+        self.url = self._app_url
+        if self._certfile:
+            self.url = await self._start_h2(host, port)
+        return self.url
+
+    async def stop(self):
+        if self._h2_server:
+            self._h2_server.close()
+            self._h2_server = None
+        if self._h2_session:
+            await self._h2_session.close()
+            self._h2_session = None
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _start_h2(self, host: str, port: int) -> str:
+        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        context.load_cert_chain(self._certfile, self._keyfile)
+        context.set_alpn_protocols(["h2"])
+        self._h2_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=0)
+        )
+        self._h2_server = await asyncio.start_server(
+            self._serve_h2, host, port, ssl=context
+        )
+        port = self._h2_server.sockets[0].getsockname()[1]
+        return f"https://{host}:{port}"
+
+    async def _serve_h2(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        self.connections.add(writer.get_extra_info("peername"))
+        conn = h2.connection.H2Connection(
+            h2.config.H2Configuration(
+                client_side=False, header_encoding="utf-8"
+            )
+        )
+        conn.initiate_connection()
+        writer.write(conn.data_to_send())
+
+        requests: dict[int, tuple[list, bytearray]] = {}
+        windows: dict[int, asyncio.Event] = {}
+        tasks = set()
+
+        def respond(stream_id: int):
+            headers, body = requests.pop(stream_id)
+            windows[stream_id] = asyncio.Event()
+            task = asyncio.create_task(
+                self._respond_h2(
+                    conn, writer, stream_id, headers, body, windows
+                )
+            )
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        try:
+            while data := await reader.read(65535):
+                for event in conn.receive_data(data):
+                    if isinstance(event, h2.events.RequestReceived):
+                        body = bytearray()
+                        requests[event.stream_id] = (event.headers, body)
+                        if event.stream_ended:
+                            respond(event.stream_id)
+                    elif isinstance(event, h2.events.DataReceived):
+                        requests[event.stream_id][1].extend(event.data)
+                        conn.acknowledge_received_data(
+                            event.flow_controlled_length, event.stream_id
+                        )
+                    elif isinstance(event, h2.events.StreamEnded):
+                        if event.stream_id in requests:
+                            respond(event.stream_id)
+                    elif isinstance(event, h2.events.StreamReset):
+                        requests.pop(event.stream_id, None)
+                        # Response wakes up to find out stream is closed
+                        if event.stream_id in windows:
+                            windows[event.stream_id].set()
+                    elif isinstance(event, h2.events.WindowUpdated):
+                        # Zero stream is window of whole connection
+                        for window in windows.values():
+                            window.set()
+                    elif isinstance(event, h2.events.ConnectionTerminated):
+                        return
+                writer.write(conn.data_to_send())
+                await writer.drain()
+        except (ConnectionError, ssl.SSLError):
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def _respond_h2(
+        self,
+        conn: h2.connection.H2Connection,
+        writer: asyncio.StreamWriter,
+        stream_id: int,
+        headers: list[tuple[str, str]],
+        body: bytes,
+        windows: dict[int, asyncio.Event],
+    ):
+        pseudo = {k: v for k, v in headers if k.startswith(":")}
+        headers = [(k, v) for k, v in headers if not k.startswith(":")]
+        try:
+            async with self._h2_session.request(
+                pseudo[":method"],
+                f"{self._app_url}{pseudo[':path']}",
+                data=bytes(body),
+                headers=headers,
+            ) as resp:
+                content = await resp.read()
+                response_headers = [
+                    (":status", str(resp.status)),
+                    ("content-type", resp.headers.get("Content-Type", "")),
+                    ("content-length", str(len(content))),
+                ]
+
+            conn.send_headers(stream_id, response_headers)
+            while content:
+                # Send as much as windows of flow control allow
+                size = min(
+                    conn.local_flow_control_window(stream_id),
+                    conn.max_outbound_frame_size,
+                    len(content),
+                )
+                if not size:
+                    windows[stream_id].clear()
+                    writer.write(conn.data_to_send())
+                    await windows[stream_id].wait()
+                    continue
+                conn.send_data(stream_id, content[:size])
+                content = content[size:]
+            conn.end_stream(stream_id)
+            writer.write(conn.data_to_send())
+        except h2.exceptions.StreamClosedError:
+            pass
+        finally:
+            windows.pop(stream_id, None)
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, type, value, traceback):
+        await self.stop()
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        self.requests[request.path] = self.requests.get(request.path, 0) + 1
+        # Behind frontend of h2 connections are counted by it
+        if request.transport and not self._certfile:
+            self.connections.add(request.transport.get_extra_info("peername"))
+        delay = self.latency + random.uniform(0, self.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+        if random.random() < self.forbidden_rate:
+            return web.Response(
+                status=self.forbidden_status,
+                reason="Forbidden",
+                text=FORBIDDEN_HTML,
+                content_type="text/html",
+            )
+        return await handler(request)
+
+    async def main_page(self, request: web.Request):
+        html = (
+            "<html><body><form></form>"
+            "<script></script>"
+            f"<script>{_weekdays_script(self.weekdays)}</script>"
+            "<script></script></body></html>"
+        )
+        return web.Response(text=html, content_type="text/html")
+
+    async def registrate(self, request: web.Request):
+        form = await request.post()
+        if not form.get("g-recaptcha-response"):
+            return web.Response(
+                text=_alert("Captcha invalid"), content_type="text/html"
+            )
+
+        dt, tip = form["data_programarii"], form["tip_formular"]
+        passport = form["numar_pasaport"]
+        if any(r["numar_pasaport"] == passport for r in self.registrations):
+            return web.Response(
+                text=_alert(
+                    "Deja a fost înregistrată o programare cu acest "
+                    "număr de pașaport"
+                ),
+                content_type="text/html",
+            )
+        if not self.places(dt, int(tip)):
+            return web.Response(
+                text=_alert("Nu mai sunt locuri disponibile"),
+                content_type="text/html",
+            )
+
+        self.registrations.append(dict(form))
+        return web.Response(
+            text="<html><p>Felicitări!</p></html>", content_type="text/html"
+        )
+
+    async def status_days(self, request: web.Request):
+        form = await request.post()
+        year, month = map(int, form["azi"].split("-"))
+        tip = int(form["tip_formular"])
+        full = []
+        day = 1
+        while True:
+            try:
+                dt = date(year, month, day)
+            except ValueError:
+                break
+            if not self.places(dt.strftime("%Y-%m-%d"), tip):
+                full.append(dt.strftime("%Y-%m-%d"))
+            day += 1
+        return web.json_response({"data": full})
+
+    async def status_places(self, request: web.Request):
+        form = await request.post()
+        # Day of month sent without leading zero
+        dt = datetime.strptime(form["azi"], "%Y-%m-%d").strftime("%Y-%m-%d")
+        places = self.places(dt, int(form["tip_formular"]))
+        return web.json_response({"numar_ramase": places})
+
+    async def registrations_list(self, request: web.Request):
+        form = await request.post()
+        tip = form.get("columns[0][search][value]", "")
+        dates = form.get("columns[5][search][value]", "").split(" AND ")
+        rows = [
+            r
+            for r in self.registrations
+            if (not tip or r["tip_formular"] == tip)
+            and (
+                not all(dates)
+                or dates[0] <= r["data_programarii"] <= dates[1]
+            )
+        ]
+        start = int(form.get("start", 0))
+        length = int(form.get("length", 10))
+        return web.json_response(
+            {
+                "draw": form.get("draw", "1"),
+                "recordsTotal": len(self.registrations),
+                "recordsFiltered": len(rows),
+                "data": rows[start : start + length],
+            }
+        )
+
+    async def captcha_anchor(self, request: web.Request):
+        token = secrets.token_urlsafe(16)
+        html = f'<input type="hidden" id="recaptcha-token" value="{token}">'
+        return web.Response(text=html, content_type="text/html")
+
+    async def captcha_reload(self, request: web.Request):
+        token = secrets.token_urlsafe(32)
+        return web.Response(
+            text=f')]}}\'\n["rresp","{token}",null,120]',
+            content_type="application/javascript",
+        )
+
+
+class MemoryUsersService:
+    r"""In-memory replacement of `UsersService` for runs without database."""
+
+    def __init__(self, users: list[dict] = None) -> None:
+        self.users = list(users or [])
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, type, value, traceback):
+        pass
+
+    async def get_users_by_reg_date(self, registration_date) -> list[dict]:
+        return list(self.users)
+
+    async def add_user(self, user_data: dict, registration_date=None):
+        if user_data not in self.users:
+            self.users.append(user_data)
+
+    async def add_users(self, users_data, registration_date=None, **kwargs):
+        new = [u for u in users_data if u not in self.users]
+        self.users.extend(new)
+        return len(new)
+
+    async def remove_user(self, user_data: dict):
+        if user_data in self.users:
+            self.users.remove(user_data)
@@ -0,0 +1,167 @@
+"""Verification of registrations by pages of `verificare_programare`."""
+
+import asyncio
+from datetime import datetime
+
+from loguru import logger
+
+from registrator_romania.backend.api.api_romania import APIRomania
+from registrator_romania.backend.net import AIOHTTP_NET_ERRORS
+
+
+def registration_key(
+    nume: str, prenume: str, numar_pasaport: str = ""
+) -> tuple[str, str, str]:
+    r"""Key of registration: names in lower case and number of passport."""
+    return (
+        (nume or "").strip().lower(),
+        (prenume or "").strip().lower(),
+        (numar_pasaport or "").strip().upper(),
+    )
+
+
+class RegistrationsVerifier:
+    r"""
+    Index of registrations on site filtered by type of form and range of
+    dates. Pages of `length` rows fetched concurrently, first page also
+    give count of rows. Next refreshes fetch only pages from last known
+    row, if rows of that page are not same as before (rows removed or
+    inserted not at end, site does not promise any order) or count of rows
+    decreased, full rescan done. Also full rescan done each `full_every`
+    refreshes.
+    """
+
+    def __init__(
+        self,
+        api: APIRomania,
+        tip_formular: int | str = "",
+        data_programarii: list[datetime] = None,
+        length: int = 500,
+        concurrency: int = 5,
+        full_every: int = 10,
+    ) -> None:
+        if length < 1:
+            raise ValueError(f"Length of page should be positive - {length}")
+
+        self._api = api
+        self._tip_formular = str(tip_formular)
+        self._data_programarii = data_programarii
+        self._length = length
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._full_every = full_every
+        self._lock = asyncio.Lock()
+        self._keys: set[tuple[str, str, str]] = set()
+        # Keys of rows in order of site, as they were on last refresh
+        self._rows: list[tuple[str, str, str]] = []
+        self._refreshes = 0
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @property
+    def rows_count(self) -> int:
+        return len(self._rows)
+
+    async def _fetch_page(self, start: int) -> dict | None:
+        async with self._semaphore:
+            try:
+                return await self._api.see_registrations(
+                    tip_formular=self._tip_formular,
+                    data_programarii=self._data_programarii,
+                    limit=self._length,
+                    start=start,
+                )
+            except AIOHTTP_NET_ERRORS:
+                return None
+
+    @staticmethod
+    def _row_keys(rows: list[dict]) -> list[tuple[str, str, str]]:
+        return [
+            registration_key(
+                row.get("nume_pasaport"),
+                row.get("prenume_pasaport"),
+                row.get("numar_pasaport"),
+            )
+            for row in rows
+        ]
+
+    async def refresh(self) -> bool:
+        r"""
+        Update index from site. Return False if some page not received,
+        in this case index can be incomplete.
+        """
+        async with self._lock:
+            self._refreshes += 1
+            full = (self._refreshes - 1) % self._full_every == 0
+            result = await self._refresh(full)
+            if result is None:
+                # Known rows moved, pages before last one can have new rows
+                self._refreshes = 1
+                result = await self._refresh(full=True)
+            return bool(result)
+
+    async def _refresh(self, full: bool) -> bool | None:
+        # Page with last known row is fetched again, it shows whether rows
+        # before it stayed at their places
+        offset = 0 if full else max(len(self._rows) - 1, 0)
+        offset -= offset % self._length
+
+        first = await self._fetch_page(offset)
+        if not first:
+            return False
+
+        total = int(first.get("recordsFiltered", len(first["data"])))
+        rows = self._row_keys(first["data"])
+        if not full:
+            known = self._rows[offset:]
+            if total < len(self._rows) or rows[: len(known)] != known:
+                return None
+
+        if full:
+            self._keys.clear()
+        self._keys.update(rows)
+
+        starts = range(offset + self._length, total, self._length)
+        pages = await asyncio.gather(
+            *[self._fetch_page(start) for start in starts]
+        )
+        complete = True
+        for page in pages:
+            if not page:
+                complete = False
+                continue
+            page_rows = self._row_keys(page["data"])
+            self._keys.update(page_rows)
+            rows.extend(page_rows)
+
+        if complete:
+            self._rows[offset:] = rows
+        elif full:
+            # Next refresh is full again
+            self._refreshes = 0
+        logger.debug(
+            f"Verified {len(self._keys)} registrations, fetched "
+            f"{len(starts) + 1} pages"
+        )
+        return complete
+
+    def is_registered(self, user_data: dict) -> bool:
+        key = registration_key(
+            user_data["Nume Pasaport"],
+            user_data["Prenume Pasaport"],
+            user_data["Serie și număr Pașaport"],
+        )
+        # Site can return rows without number of passport
+        return key in self._keys or (key[0], key[1], "") in self._keys
+
+    def filter_unregistered(self, users_data: list[dict]) -> list[dict]:
+        return [u for u in users_data if not self.is_registered(u)]
+
+    async def watch(self, interval: float = 30):
+        r"""Refresh index each `interval` seconds, run as task."""
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.exception(e)
+            await asyncio.sleep(interval)
@@ -0,0 +1,166 @@
+"""Offset of local clock from clock of site and precise firing by it."""
+
+import asyncio
+from datetime import datetime
+import statistics
+import time
+from typing import NamedTuple, TypedDict
+from zoneinfo import ZoneInfo
+
+from loguru import logger
+
+from registrator_romania.backend.api.api_romania import APIRomania
+
+
+TIMEZONE = ZoneInfo("Europe/Moscow")
+
+
+class ClockSample(NamedTuple):
+    # Local unix time before request and when headers received
+    sent: float
+    received: float
+    # Unix time of `Date` header, whole seconds
+    server: float
+
+
+ClockEstimate = TypedDict(
+    "ClockEstimate",
+    {
+        "offset": float,
+        "error": float,
+        "latency": float,
+        "samples": int,
+    },
+)
+
+
+def estimate_offset(samples: list[ClockSample]) -> ClockEstimate:
+    r"""
+    Estimate offset (server time minus local time) in seconds. Server
+    wrote `Date` between `sent` and `received`, and real time of server
+    was in `[server, server + 1)`, so each sample bounds offset by
+    `[server - received, server + 1 - sent]`. Intersection of bounds of
+    samples taken at different fractions of second is much narrower than
+    one second. `error` is half of width of intersection, `latency` is
+    half of median round trip.
+    """
+    if not samples:
+        raise ValueError("No samples of clock")
+
+    lower = max(s.server - s.received for s in samples)
+    upper = min(s.server + 1 - s.sent for s in samples)
+    rtts = [s.received - s.sent for s in samples]
+    if lower <= upper:
+        offset, error = (lower + upper) / 2, (upper - lower) / 2
+    else:
+        # Bounds don't intersect (server behind balancer with different
+        # clocks), median of middles of samples
+        offset = statistics.median(
+            s.server + 0.5 - (s.sent + s.received) / 2 for s in samples
+        )
+        error = 0.5 + max(rtts) / 2
+    return {
+        "offset": offset,
+        "error": error,
+        "latency": statistics.median(rtts) / 2,
+        "samples": len(samples),
+    }
+
+
+class ServerClock:
+    r"""
+    Clock of site estimated by `Date` headers of `samples` requests, spread
+    so they hit different fractions of second. Before estimate it is local
+    clock.
+    """
+
+    def __init__(self, api: APIRomania, samples: int = 12) -> None:
+        if samples < 1:
+            raise ValueError(f"Count of samples should be positive {samples}")
+
+        self._api = api
+        self._samples = samples
+        self.estimate: ClockEstimate = None
+
+    @property
+    def offset(self) -> float:
+        return self.estimate["offset"] if self.estimate else 0.0
+
+    @property
+    def latency(self) -> float:
+        r"""Estimated one-way latency to site in seconds."""
+        return self.estimate["latency"] if self.estimate else 0.0
+
+    def time(self) -> float:
+        r"""Unix time of server."""
+        return time.time() + self.offset
+
+    def now(self) -> datetime:
+        return datetime.fromtimestamp(self.time(), tz=TIMEZONE)
+
+    async def sync(self) -> ClockEstimate | None:
+        r"""Take samples and update estimate, None if no sample received."""
+        samples = []
+        # Step is not multiple of second, so samples cover whole second
+        step = 1 / self._samples + 0.037
+        for _ in range(self._samples):
+            result = await self._api.get_server_date()
+            if result:
+                sent, received, server = result
+                samples.append(
+                    ClockSample(sent, received, server.timestamp())
+                )
+            await asyncio.sleep(step)
+
+        if not samples:
+            logger.error("Clock of site not estimated, no responses")
+            return
+
+        self.estimate = estimate_offset(samples)
+        logger.info(
+            f"Clock of site: offset {self.offset * 1000:+.0f} ms "
+            f"(±{self.estimate['error'] * 1000:.0f} ms), one-way latency "
+            f"{self.latency * 1000:.0f} ms, {len(samples)} samples"
+        )
+        return self.estimate
+
+    async def sleep_until(
+        self,
+        target: datetime,
+        lead: float = None,
+        resync_before: float = 60,
+        spin: float = 0.05,
+    ) -> float:
+        r"""
+        Sleep until server time `target` minus `lead` (by default one-way
+        latency, so request arrives at `target`). Clock synced again
+        `resync_before` seconds before, last `spin` seconds slept by short
+        steps. Return error of firing in seconds (positive if late).
+        """
+        deadline = target.timestamp()
+        remaining = deadline - self.latency - self.time()
+        if remaining > resync_before:
+            # Clock of container can drift while waiting
+            await asyncio.sleep(remaining - resync_before)
+            await self.sync()
+        if lead is None:
+            lead = self.latency
+
+        fire_at = deadline - lead
+        while True:
+            remaining = fire_at - self.time()
+            if remaining <= 0:
+                break
+            if remaining > spin:
+                await asyncio.sleep(remaining - spin)
+            else:
+                # Timers of loop are not precise, last part by small steps
+                await asyncio.sleep(min(remaining, 0.001))
+
+        error = self.time() - fire_at
+        logger.info(
+            f"Fired at {datetime.fromtimestamp(fire_at, tz=TIMEZONE)} of "
+            f"site (target {target}, lead {lead * 1000:.0f} ms), error "
+            f"{error * 1000:+.1f} ms"
+        )
+        return error
@@ -1,4 +1,5 @@
 from datetime import date
+import time
 
 from loguru import logger
 from sqlalchemy import (
@@ -19,6 +20,7 @@ from sqlalchemy.ext.asyncio import (
     AsyncSession,
 )
 
+from registrator_romania.backend.net import metrics
 from registrator_romania.backend.database.sqlalchemy_models import (
     Base,
     ListUsers,
@@ -69,6 +71,10 @@ def to_dict_cursor_result(curresultl: CursorResult, data: tuple) -> dict:
     return dict(zip(curresultl.keys(), data))
 
 
+def _hashable_user(user_data: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in user_data.items()))
+
+
 class UsersService:
     _model = ListUsers
 
@@ -85,7 +91,10 @@ class UsersService:
             f"LOCK TABLE {self._model.__tablename__} IN ACCESS EXCLUSIVE MODE;"
         )
         self._conn = await self._session.connection()
+        start = time.perf_counter()
         await self._conn.execute(text(cmd))
+        # Lock waits for other containers, it is the slowest part
+        metrics.DB_QUERY_LATENCY.observe(time.perf_counter() - start, "lock")
         return self
 
     async def __aexit__(self, type, value, traceback):
@@ -102,7 +111,13 @@ class UsersService:
     ) -> CursorResult:
         conn = await self._session.connection()
 
-        return await conn.execute(stmt)
+        start = time.perf_counter()
+        try:
+            return await conn.execute(stmt)
+        finally:
+            metrics.DB_QUERY_LATENCY.observe(
+                time.perf_counter() - start, stmt.__class__.__name__
+            )
 
     async def clear_table(self):
         stmt = "truncate table list_users cascade;"
@@ -140,6 +155,40 @@ class UsersService:
             data = to_dict_cursor_result(cur, result[0].tuple())
             return data["user_data"]
 
+    async def add_users(
+        self,
+        users_data: list[dict],
+        registration_date: date,
+        skip_existing: bool = True,
+    ) -> int:
+        r"""
+        Insert users what are not in database yet by one statement and
+        return count of inserted users. With `skip_existing=False` users
+        inserted without check.
+        """
+        seen = set()
+        if skip_existing:
+            users_in_db = await self.get_users_by_reg_date(registration_date)
+            seen = {_hashable_user(u) for u in users_in_db}
+        users = []
+        for user_data in users_data:
+            key = _hashable_user(user_data)
+            if key not in seen:
+                seen.add(key)
+                users.append(user_data)
+
+        if not users:
+            return 0
+
+        stmt = insert(self._model).values(
+            [
+                {"user_data": user, "registration_date": registration_date}
+                for user in users
+            ]
+        )
+        await self._execute_stmt(stmt)
+        return len(users)
+
     async def remove_user(self, user_data: dict) -> None:
         stmt = delete(self._model).where(self._model.user_data == user_data)
         await self._execute_stmt(stmt)
@@ -0,0 +1,207 @@
+"""Health of event loop: lag, blocking call sites and saturation of threads."""
+
+import asyncio
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import re
+import sys
+import threading
+import time
+import traceback
+from typing import TypedDict
+
+
+LoopSummary = TypedDict(
+    "LoopSummary",
+    {
+        "probes": int,
+        "lag_p50": float,
+        "lag_p99": float,
+        "lag_max": float,
+        "blocked_seconds": float,
+        "blocking_sites": list[tuple[str, float]],
+        "slow_callbacks": list[tuple[str, int]],
+        "executor_queue_max": int,
+    },
+)
+
+
+# Location of coroutine or callback in repr of handle of asyncio
+_HANDLE_LOCATION = re.compile(r"(?:running|created) at (\S+:\d+)")
+
+
+def _site_of(stack: traceback.StackSummary) -> str:
+    # Innermost frame of our code, libraries (bs4, pandas) are shown
+    # after it, so place of call and place of work are both visible
+    inner = stack[-1]
+    for frame in reversed(stack):
+        if "registrator_romania" in frame.filename:
+            own = f"{frame.filename}:{frame.lineno} {frame.name}"
+            if frame is inner:
+                return own
+            return f"{own} -> {inner.filename}:{inner.lineno} {inner.name}"
+    return f"{inner.filename}:{inner.lineno} {inner.name}"
+
+
+class _SlowCallbacksHandler(logging.Handler):
+    def __init__(self, counter: Counter) -> None:
+        super().__init__(level=logging.WARNING)
+        self._counter = counter
+
+    def emit(self, record: logging.LogRecord):
+        if not record.msg.startswith("Executing"):
+            return
+        handle = str(record.args[0]) if record.args else record.getMessage()
+        match = _HANDLE_LOCATION.search(handle)
+        self._counter[match.group(1) if match else handle[:200]] += 1
+
+
+class LoopMonitor:
+    r"""
+    Probe task sleeps `interval` seconds and measures how late it wakes up.
+    Thread samples stack of loop each `sample_interval` seconds while loop
+    is late more than `block_threshold`, so call sites what block loop are
+    counted with approximate blocked time. Also depth of queue of default
+    executor (`asyncio.to_thread`) is sampled. With `asyncio_debug` loop
+    runs in debug mode and callbacks slower than `block_threshold` are
+    counted by place in code, debug mode slows loop.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.1,
+        block_threshold: float = 0.05,
+        sample_interval: float = 0.01,
+        asyncio_debug: bool = False,
+    ) -> None:
+        self._interval = interval
+        self._block_threshold = block_threshold
+        self._sample_interval = sample_interval
+        self._asyncio_debug = asyncio_debug
+
+        self._lags: list[float] = []
+        self._sites: Counter[str] = Counter()
+        self._slow_callbacks: Counter[str] = Counter()
+        self._executor_queue_max = 0
+        self._expected_wakeup = 0.0
+
+        self._loop: asyncio.AbstractEventLoop = None
+        self._loop_thread_id: int = None
+        self._task: asyncio.Task = None
+        self._thread: threading.Thread = None
+        self._stopped = threading.Event()
+        self._handler: _SlowCallbacksHandler = None
+
+    def start(self):
+        r"""Start monitor of running loop."""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._expected_wakeup = time.monotonic() + self._interval
+        self._task = asyncio.create_task(self._probe())
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._sample, name="loop-monitor", daemon=True
+        )
+        self._thread.start()
+
+        if self._asyncio_debug:
+            self._loop.set_debug(True)
+            self._loop.slow_callback_duration = self._block_threshold
+            self._handler = _SlowCallbacksHandler(self._slow_callbacks)
+            logging.getLogger("asyncio").addHandler(self._handler)
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._thread:
+            self._stopped.set()
+            await asyncio.to_thread(self._thread.join)
+            self._thread = None
+        if self._handler:
+            logging.getLogger("asyncio").removeHandler(self._handler)
+            self._loop.set_debug(False)
+            self._handler = None
+
+    async def _probe(self):
+        while True:
+            self._expected_wakeup = time.monotonic() + self._interval
+            await asyncio.sleep(self._interval)
+            self._lags.append(
+                max(0.0, time.monotonic() - self._expected_wakeup)
+            )
+
+            executor = getattr(self._loop, "_default_executor", None)
+            if isinstance(executor, ThreadPoolExecutor):
+                # Private, but there is no other way to see waiting jobs
+                depth = executor._work_queue.qsize()
+                self._executor_queue_max = max(
+                    self._executor_queue_max, depth
+                )
+
+    def _sample(self):
+        while not self._stopped.wait(self._sample_interval):
+            late = time.monotonic() - self._expected_wakeup
+            if late < self._block_threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)
+            if stack and stack[-1].name == "select":
+                # Loop waits for events, it is not blocked
+                continue
+            self._sites[_site_of(stack)] += 1
+
+    def summary(self, top: int = 10) -> LoopSummary:
+        lags = sorted(self._lags)
+
+        def percentile(q: float) -> float:
+            if not lags:
+                return 0.0
+            return lags[min(len(lags) - 1, int(q / 100 * len(lags)))]
+
+        return {
+            "probes": len(lags),
+            "lag_p50": percentile(50),
+            "lag_p99": percentile(99),
+            "lag_max": lags[-1] if lags else 0.0,
+            "blocked_seconds": (
+                sum(self._sites.values()) * self._sample_interval
+            ),
+            "blocking_sites": [
+                (site, count * self._sample_interval)
+                for site, count in self._sites.most_common(top)
+            ],
+            "slow_callbacks": self._slow_callbacks.most_common(top),
+            "executor_queue_max": self._executor_queue_max,
+        }
+
+
+def format_summary(summary: LoopSummary) -> str:
+    lines = [
+        f"Event loop: {summary['probes']} probes, lag "
+        f"p50 {summary['lag_p50'] * 1000:.1f} ms, "
+        f"p99 {summary['lag_p99'] * 1000:.1f} ms, "
+        f"max {summary['lag_max'] * 1000:.1f} ms, "
+        f"blocked ~{summary['blocked_seconds']:.2f} s, "
+        f"max queue of to_thread {summary['executor_queue_max']}",
+    ]
+    if summary["blocking_sites"]:
+        lines.append("Top blocking call sites (approximate seconds):")
+        lines.extend(
+            f"  {seconds:8.2f}  {site}"
+            for site, seconds in summary["blocking_sites"]
+        )
+    if summary["slow_callbacks"]:
+        lines.append("Slow callbacks of asyncio debug mode (count):")
+        lines.extend(
+            f"  {count:8d}  {site}"
+            for site, count in summary["slow_callbacks"]
+        )
+    return "\n".join(lines)
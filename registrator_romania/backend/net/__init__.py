@@ -1,7 +1,14 @@
 import asyncio
 import aiohttp
+from aiohttp_socks import ProxyConnectionError, ProxyError, ProxyTimeoutError
 
 
+SOCKS_NET_ERRORS = (
+    ProxyError,
+    ProxyConnectionError,
+    ProxyTimeoutError,
+)
+
 AIOHTTP_NET_ERRORS = (
     aiohttp.client_exceptions.ContentTypeError,
     aiohttp.client_exceptions.ClientConnectionError,
@@ -11,4 +18,5 @@ AIOHTTP_NET_ERRORS = (
     aiohttp.ClientOSError,
     aiohttp.ServerDisconnectedError,
     asyncio.TimeoutError,
-)
\ No newline at end of file
+    *SOCKS_NET_ERRORS,
+)
@@ -1,5 +1,17 @@
-
 import aiohttp
+from aiohttp_socks import ProxyConnector
+
+from registrator_romania.backend.net import metrics
+from registrator_romania.backend.net.tracing import get_tracer
+
+
+SOCKS_SCHEMES = ("socks4", "socks5")
+
+
+def is_socks_proxy(proxy: str | None) -> bool:
+    if not proxy:
+        return False
+    return proxy.split("://", 1)[0].lower() in SOCKS_SCHEMES
 
 
 class AiohttpSession:
@@ -9,6 +21,18 @@ class AiohttpSession:
             limit_per_host=0,
         )
 
+    def generate_proxy_connector(self, proxy: str) -> ProxyConnector:
+        r"""
+        Return connector what tunnel all connections through socks proxy.
+        aiohttp can't pass socks proxy in `proxy` parameter of request, so
+        socks proxy is a property of connector.
+        """
+        return ProxyConnector.from_url(
+            proxy,
+            limit=0,
+            limit_per_host=0,
+        )
+
     def generate(
         self,
         connector: aiohttp.TCPConnector = None,
@@ -25,5 +49,9 @@ class AiohttpSession:
             # json_serialize=orjson.dumps,
             connector_owner=close_connector,
             timeout=timeout,
+            trace_configs=[
+                *get_tracer().trace_configs(),
+                *metrics.trace_configs(),
+            ],
         )
         return session
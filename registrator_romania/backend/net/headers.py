@@ -0,0 +1,65 @@
+import random
+
+from multidict import CIMultiDict, CIMultiDictProxy
+import ua_generator
+
+
+class HeaderProfiles:
+    r"""
+    Pool of browser profiles (User-Agent with client hints) generated once.
+    Profile can be sticky by key (proxy url, user), so one egress keeps one
+    fingerprint. Headers of page merged with profile once and reused as
+    immutable multidict.
+    """
+
+    def __init__(self, size: int = 32) -> None:
+        if size < 1:
+            raise ValueError(f"Size of profiles should be positive - {size}")
+
+        self._profiles = [
+            dict(ua_generator.generate().headers.get()) for _ in range(size)
+        ]
+        self._sticky: dict[str, int] = {}
+        self._headers: dict[tuple[str, int], CIMultiDictProxy[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+    def profile_index(self, key: str = None) -> int:
+        r"""
+        Return index of profile for key, random index if key is None. Keys
+        get profiles round-robin on first use.
+        """
+        if key is None:
+            return random.randrange(len(self._profiles))
+
+        i = self._sticky.get(key)
+        if i is None:
+            i = self._sticky[key] = len(self._sticky) % len(self._profiles)
+        return i
+
+    def get(
+        self, name: str, base: dict[str, str], key: str = None
+    ) -> CIMultiDictProxy[str]:
+        r"""
+        Return headers `base` of page `name` merged with profile of `key`.
+        """
+        i = self.profile_index(key)
+        headers = self._headers.get((name, i))
+        if headers is None:
+            merged = CIMultiDict(base)
+            for k, v in self._profiles[i].items():
+                merged[k] = v
+            headers = self._headers[(name, i)] = CIMultiDictProxy(merged)
+        return headers
+
+
+_default_profiles: HeaderProfiles = None
+
+
+def get_header_profiles() -> HeaderProfiles:
+    r"""Return shared pool of profiles, created on first call."""
+    global _default_profiles
+    if _default_profiles is None:
+        _default_profiles = HeaderProfiles()
+    return _default_profiles
@@ -0,0 +1,392 @@
+"""
+Counters, gauges and histograms of process in format of Prometheus. Each
+process writes snapshot of its metrics into shared directory, endpoint
+`/metrics` sums snapshots of all processes (containers).
+"""
+
+import asyncio
+import bisect
+import glob
+import json
+import os
+from pathlib import Path
+import socket
+import time
+from types import SimpleNamespace
+from typing import Literal
+
+import aiohttp
+from aiohttp import web
+from loguru import logger
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class Metric:
+    r"""
+    Base of metrics. Values stored by tuple of values of labels. Gauges
+    of several processes aggregated by `aggregate` (sum or max), counters
+    and histograms are summed.
+    """
+
+    type = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        aggregate: Literal["sum", "max"] = "sum",
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.aggregate = aggregate
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def _key(self, labels: tuple) -> tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(
+                f"Metric {self.name} has labels {self.labelnames}, "
+                f"got {labels}"
+            )
+        return tuple(str(label) for label in labels)
+
+    def snapshot(self) -> dict:
+        return {
+            "type": self.type,
+            "help": self.documentation,
+            "labels": list(self.labelnames),
+            "aggregate": self.aggregate,
+            "values": [[list(k), v] for k, v in self._values.items()],
+        }
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, value: float, *labels):
+        self._values[self._key(labels)] = value
+
+    def inc(self, *labels, amount: float = 1):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key: [counts of buckets..., count of +Inf, sum]
+        self._values: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, *labels):
+        key = self._key(labels)
+        row = self._values.get(key)
+        if row is None:
+            row = self._values[key] = [0] * (len(self.buckets) + 2)
+        row[bisect.bisect_left(self.buckets, value)] += 1
+        row[-1] += value
+
+    def snapshot(self) -> dict:
+        data = super().snapshot()
+        data["values"] = [[k, list(v)] for k, v in data["values"]]
+        data["buckets"] = list(self.buckets)
+        return data
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Metric:
+        registered = self._metrics.get(metric.name)
+        if registered is not None:
+            # Same metric declared by several modules
+            return registered
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        labelnames=(),
+        aggregate: Literal["sum", "max"] = "sum",
+    ):
+        return self._register(
+            Gauge(name, documentation, labelnames, aggregate=aggregate)
+        )
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames=(),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        return self._register(
+            Histogram(name, documentation, labelnames, buckets=buckets)
+        )
+
+    def snapshot(self) -> dict[str, dict]:
+        return {name: m.snapshot() for name, m in self._metrics.items()}
+
+
+REGISTRY = MetricsRegistry()
+
+ATTEMPTS = REGISTRY.counter(
+    "registrator_attempts_total", "Sent forms of registration"
+)
+SUCCESSES = REGISTRY.counter(
+    "registrator_successes_total", "Successful registrations"
+)
+ALREADY_REGISTERED = REGISTRY.counter(
+    "registrator_already_registered_total",
+    "Responses what user already registered",
+)
+ERRORS = REGISTRY.counter(
+    "registrator_errors_total", "Failed attempts by type of error", ("type",)
+)
+PLACES_REMAINING = REGISTRY.gauge(
+    "registrator_places_remaining",
+    "Free places of date and type of form",
+    ("date", "tip_formular"),
+    aggregate="max",
+)
+REQUEST_ERRORS = REGISTRY.counter(
+    "registrator_request_errors_total",
+    "Network errors of requests by type",
+    ("type",),
+)
+IN_FLIGHT = REGISTRY.gauge(
+    "registrator_requests_in_flight", "Requests waiting for response"
+)
+REQUEST_LATENCY = REGISTRY.histogram(
+    "registrator_request_seconds",
+    "Time to headers of response by path and status",
+    ("path", "status"),
+)
+PROXY_POOL_SIZE = REGISTRY.gauge(
+    "registrator_proxy_pool_size", "Working proxies in pool"
+)
+PROXY_REPORTS = REGISTRY.counter(
+    "registrator_proxy_reports_total",
+    "Reports of requests through proxies",
+    ("result",),
+)
+CAPTCHA_POOL_DEPTH = REGISTRY.gauge(
+    "registrator_captcha_pool_depth", "Prefetched tokens of captcha"
+)
+DB_QUERY_LATENCY = REGISTRY.histogram(
+    "registrator_db_query_seconds", "Time of queries to database", ("query",)
+)
+
+
+def _trace_config() -> aiohttp.TraceConfig:
+    config = aiohttp.TraceConfig()
+
+    async def on_request_start(session, ctx: SimpleNamespace, params):
+        ctx.metrics_start = time.perf_counter()
+        IN_FLIGHT.inc()
+
+    async def on_request_end(session, ctx: SimpleNamespace, params):
+        IN_FLIGHT.dec()
+        REQUEST_LATENCY.observe(
+            time.perf_counter() - ctx.metrics_start,
+            params.url.path,
+            params.response.status,
+        )
+
+    async def on_request_exception(session, ctx: SimpleNamespace, params):
+        IN_FLIGHT.dec()
+        REQUEST_ERRORS.inc(params.exception.__class__.__name__)
+
+    config.on_request_start.append(on_request_start)
+    config.on_request_end.append(on_request_end)
+    config.on_request_exception.append(on_request_exception)
+    config.freeze()
+    return config
+
+
+_trace_configs: list[aiohttp.TraceConfig] = []
+
+
+def trace_configs() -> list[aiohttp.TraceConfig]:
+    r"""Return trace configs of aiohttp sessions, empty if disabled."""
+    return _trace_configs
+
+
+def aggregate(snapshots: list[dict[str, dict]]) -> dict[str, dict]:
+    r"""Merge snapshots of processes into one."""
+    merged: dict[str, dict] = {}
+    for snapshot in snapshots:
+        for name, metric in snapshot.items():
+            target = merged.setdefault(name, {**metric, "values": {}})
+            values = target["values"]
+            for labels, value in metric["values"]:
+                key = tuple(labels)
+                if key not in values:
+                    values[key] = value
+                elif metric["type"] == "histogram":
+                    values[key] = [a + b for a, b in zip(values[key], value)]
+                elif metric["aggregate"] == "max":
+                    values[key] = max(values[key], value)
+                else:
+                    values[key] += value
+    return merged
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _labels(names: list[str], values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def render(merged: dict[str, dict]) -> str:
+    r"""Return metrics in text format of Prometheus."""
+    lines = []
+    for name, metric in sorted(merged.items()):
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        names = metric["labels"]
+        for key, value in metric["values"].items():
+            if metric["type"] != "histogram":
+                lines.append(f"{name}{_labels(names, key)} {value}")
+                continue
+
+            cumulative = 0
+            bounds = [*metric["buckets"], "+Inf"]
+            for bound, count in zip(bounds, value[:-1]):
+                cumulative += count
+                le = _labels(names, key, extra=f'le="{bound}"')
+                lines.append(f"{name}_bucket{le} {cumulative}")
+            lines.append(f"{name}_sum{_labels(names, key)} {value[-1]}")
+            lines.append(f"{name}_count{_labels(names, key)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsExporter:
+    r"""
+    Write snapshot of metrics of process into `directory` each `interval`
+    seconds and serve `/metrics` with sum of snapshots of all processes.
+    Snapshots older than `stale_after` seconds (stopped processes) are
+    ignored, so counters of stopped process drop out of sum and Prometheus
+    sees it as reset of counter (`rate()` and `increase()` handle it).
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        registry: MetricsRegistry = REGISTRY,
+        interval: float = 5,
+        stale_after: float = 60,
+    ) -> None:
+        self._directory = directory
+        self._registry = registry
+        self._interval = interval
+        self._stale_after = stale_after
+        fn = f"metrics-{socket.gethostname()}-{os.getpid()}.json"
+        self._path = Path(directory, fn)
+        self._task: asyncio.Task = None
+        self._runner: web.AppRunner = None
+
+    def write_snapshot(self):
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self._path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._registry.snapshot()))
+        # Readers never see half-written file
+        os.replace(tmp, self._path)
+
+    def read_snapshots(self) -> list[dict]:
+        snapshots = [self._registry.snapshot()]
+        now = time.time()
+        for path in glob.glob(str(Path(self._directory, "metrics-*.json"))):
+            if Path(path) == self._path:
+                continue
+            try:
+                if now - os.path.getmtime(path) > self._stale_after:
+                    continue
+                with open(path, encoding="utf-8") as f:
+                    snapshots.append(json.load(f))
+            except (OSError, json.JSONDecodeError):
+                continue
+        return snapshots
+
+    async def _write_loop(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.write_snapshot)
+            except OSError as e:
+                logger.exception(e)
+            await asyncio.sleep(self._interval)
+
+    async def handle_metrics(self, request: web.Request):
+        snapshots = await asyncio.to_thread(self.read_snapshots)
+        return web.Response(
+            text=render(aggregate(snapshots)),
+            content_type="text/plain",
+            charset="utf-8",
+        )
+
+    async def start(self, host: str = "0.0.0.0", port: int = None):
+        r"""
+        Start writing of snapshots and, if `port` passed, endpoint. Port
+        can be busy by other process, then process only writes snapshots.
+        """
+        if not _trace_configs:
+            _trace_configs.append(_trace_config())
+        self._task = asyncio.create_task(self._write_loop())
+        if port is None:
+            return
+
+        app = web.Application()
+        app.add_routes([web.get("/metrics", self.handle_metrics)])
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        try:
+            await web.TCPSite(self._runner, host, port).start()
+        except OSError as e:
+            logger.debug(f"Metrics endpoint not started: {e}")
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+        try:
+            self._path.unlink(missing_ok=True)
+        except OSError:
+            pass
@@ -0,0 +1,233 @@
+"""Token-bucket rate limit of outbound requests per host and egress."""
+
+import asyncio
+from enum import IntEnum
+import heapq
+import itertools
+import time
+from urllib.parse import urlsplit
+
+
+class Priority(IntEnum):
+    r"""Classes of requests, lower value served first."""
+
+    REGISTRATION = 0
+    POLLING = 1
+    VERIFICATION = 2
+    PROXY_CHECK = 3
+
+
+# Statuses what site return when it limits or blocks client
+BACKOFF_STATUSES = (403, 429)
+
+
+class TokenBucket:
+    r"""
+    Bucket of `capacity` tokens refilled by `rate` tokens per second.
+    Waiters served by priority, then in order of arrival. Rate halved on
+    403/429 responses (down to `min_rate`) with pause, and restored step by
+    step on successful responses.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float = None,
+        min_rate: float = None,
+        backoff: float = 1,
+        max_backoff: float = 60,
+    ) -> None:
+        if rate <= 0:
+            raise ValueError(f"Rate should be positive - {rate}")
+
+        self.base_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate or rate / 16
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._backoff = backoff
+        self._max_backoff = max_backoff
+        self._current_backoff = 0.0
+        self._paused_until = 0.0
+
+        self._counter = itertools.count()
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._dispatcher: asyncio.Task = None
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._updated = now
+        if now >= self._paused_until:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, priority: Priority = Priority.POLLING):
+        r"""Wait for token of bucket."""
+        now = time.monotonic()
+        self._refill(now)
+        if not self._waiters and self.tokens >= 1:
+            self.tokens -= 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(
+            self._waiters, (int(priority), next(self._counter), future)
+        )
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        await future
+
+    async def _dispatch(self):
+        while self._waiters:
+            now = time.monotonic()
+            self._refill(now)
+            while self._waiters and self.tokens >= 1:
+                _, _, future = heapq.heappop(self._waiters)
+                if future.done():
+                    # Waiter cancelled
+                    continue
+                self.tokens -= 1
+                future.set_result(None)
+
+            if not self._waiters:
+                break
+
+            wait = (1 - self.tokens) / self.rate
+            if now < self._paused_until:
+                wait = self._paused_until - now
+            await asyncio.sleep(max(wait, 0.001))
+
+    def report(self, status: int | None):
+        r"""
+        Report status of response: back off on 403/429, slowly restore rate
+        on other responses.
+        """
+        if status in BACKOFF_STATUSES:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._current_backoff = min(
+                self._max_backoff, (self._current_backoff * 2) or self._backoff
+            )
+            self._paused_until = time.monotonic() + self._current_backoff
+            self.tokens = 0
+        elif status is not None:
+            self._current_backoff = 0.0
+            self.rate = min(self.base_rate, self.rate + self.base_rate / 20)
+
+
+class RateLimiter:
+    r"""
+    Token buckets per (target host, egress). Egress is url of proxy, or
+    None for requests without proxy (one address of machine).
+    Registrations (and their captcha) are not limited by default, burst at
+    opening of places is sent at once. With `registration_rate` they have
+    own buckets with this rate, so their 403 don't pause polling.
+    """
+
+    def __init__(
+        self,
+        rate: float = 5,
+        capacity: float = None,
+        registration_rate: float = None,
+        **bucket_kwargs,
+    ) -> None:
+        self._rate = rate
+        self._capacity = capacity
+        self._registration_rate = registration_rate
+        self._bucket_kwargs = bucket_kwargs
+        self._buckets: dict[tuple[str, str | None], TokenBucket] = {}
+        self._registration_buckets: dict[
+            tuple[str, str | None], TokenBucket
+        ] = {}
+
+    def bucket(self, url: str, proxy: str = None) -> TokenBucket:
+        key = (urlsplit(url).hostname, proxy or None)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(
+                self._rate, self._capacity, **self._bucket_kwargs
+            )
+        return bucket
+
+    def registration_bucket(
+        self, url: str, proxy: str = None
+    ) -> TokenBucket | None:
+        r"""Bucket of registrations, None if they are not limited."""
+        if not self._registration_rate:
+            return None
+        key = (urlsplit(url).hostname, proxy or None)
+        bucket = self._registration_buckets.get(key)
+        if bucket is None:
+            bucket = self._registration_buckets[key] = TokenBucket(
+                self._registration_rate, **self._bucket_kwargs
+            )
+        return bucket
+
+    async def acquire(
+        self,
+        url: str,
+        proxy: str = None,
+        priority: Priority = Priority.POLLING,
+    ):
+        if priority == Priority.REGISTRATION:
+            bucket = self.registration_bucket(url, proxy)
+            if bucket:
+                await bucket.acquire(priority)
+            return
+        await self.bucket(url, proxy).acquire(priority)
+
+    def report(
+        self,
+        url: str,
+        proxy: str = None,
+        status: int = None,
+        priority: Priority = Priority.POLLING,
+    ):
+        if priority == Priority.REGISTRATION:
+            bucket = self.registration_bucket(url, proxy)
+            if bucket:
+                bucket.report(status)
+            return
+        self.bucket(url, proxy).report(status)
+
+    def stats(self) -> list[dict]:
+        return [
+            {
+                "host": host,
+                "egress": egress,
+                "rate": bucket.rate,
+                "waiting": bucket.waiting,
+                "registration": False,
+            }
+            for (host, egress), bucket in self._buckets.items()
+        ] + [
+            {
+                "host": host,
+                "egress": egress,
+                "rate": bucket.rate,
+                "waiting": bucket.waiting,
+                "registration": True,
+            }
+            for (host, egress), bucket in self._registration_buckets.items()
+        ]
+
+
+_default_limiter: RateLimiter = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    r"""Return shared rate limiter of process, created on first call."""
+    global _default_limiter
+    if _default_limiter is None:
+        _default_limiter = RateLimiter()
+    return _default_limiter
+
+
+def configure_rate_limiter(**kwargs) -> RateLimiter:
+    r"""Replace shared rate limiter of process (before api created)."""
+    global _default_limiter
+    _default_limiter = RateLimiter(**kwargs)
+    return _default_limiter
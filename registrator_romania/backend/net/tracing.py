@@ -0,0 +1,214 @@
+"""Per-phase timings of registration attempts, written as JSON lines."""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+import itertools
+import json
+from pathlib import Path
+import time
+from types import SimpleNamespace
+from typing import TypedDict
+
+import aiohttp
+
+
+# Attempt of registration what current task does, spans outside of attempts
+# (e.g. polling of places) are not written
+_attempt: ContextVar[str | None] = ContextVar("trace_attempt", default=None)
+
+
+PhaseSummary = TypedDict(
+    "PhaseSummary",
+    {
+        "count": int,
+        "p50": float,
+        "p95": float,
+        "p99": float,
+        "max": float,
+    },
+)
+
+
+class Tracer:
+    r"""
+    Write spans of registration attempts into `path`, one JSON per line:
+    `{"t": unix time, "a": attempt, "p": phase, "d": milliseconds, ...}`.
+    Without `path` tracer is disabled and spans cost nothing.
+    """
+
+    def __init__(self, path: str = None) -> None:
+        self._path = path
+        self._file = None
+        self._counter = itertools.count(1)
+        self._trace_config: aiohttp.TraceConfig = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._path)
+
+    @contextmanager
+    def attempt(self, key: str):
+        r"""
+        Attempt of registration (e.g. number of passport as `key`), spans
+        of current task inside of block belong to it.
+        """
+        if not self.enabled:
+            yield None
+            return
+
+        attempt = f"{key}#{next(self._counter)}"
+        token = _attempt.set(attempt)
+        try:
+            yield attempt
+        finally:
+            _attempt.reset(token)
+
+    def record(self, phase: str, duration: float, **fields):
+        r"""Write span of current attempt, `duration` in seconds."""
+        attempt = _attempt.get()
+        if not self.enabled or attempt is None:
+            return
+
+        if self._file is None:
+            Path(self._path).parent.mkdir(parents=True, exist_ok=True)
+            # Line buffered, so spans are not lost if process killed
+            self._file = open(self._path, "a", buffering=1, encoding="utf-8")
+        span = {
+            "t": round(time.time(), 3),
+            "a": attempt,
+            "p": phase,
+            "d": round(duration * 1000, 2),
+            **fields,
+        }
+        self._file.write(json.dumps(span, separators=(",", ":")) + "\n")
+
+    @contextmanager
+    def span(self, phase: str, **fields):
+        if not self.enabled or _attempt.get() is None:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            fields["error"] = e.__class__.__name__
+            raise
+        finally:
+            self.record(phase, time.perf_counter() - start, **fields)
+
+    def trace_configs(self) -> list[aiohttp.TraceConfig]:
+        r"""
+        Return trace configs for aiohttp session. aiohttp don't separate
+        TLS handshake, it is part of `connect`. `first_byte` is time from
+        start of request to headers of response.
+        """
+        if not self.enabled:
+            return []
+        if self._trace_config is None:
+            self._trace_config = self._create_trace_config()
+        return [self._trace_config]
+
+    def _create_trace_config(self) -> aiohttp.TraceConfig:
+        config = aiohttp.TraceConfig()
+
+        def start_of(name: str):
+            async def handler(session, ctx: SimpleNamespace, params):
+                setattr(ctx, name, time.perf_counter())
+
+            return handler
+
+        def end_of(name: str):
+            async def handler(session, ctx: SimpleNamespace, params):
+                start = getattr(ctx, name, None)
+                if start is not None:
+                    self.record(name, time.perf_counter() - start)
+
+            return handler
+
+        async def on_request_end(session, ctx: SimpleNamespace, params):
+            start = getattr(ctx, "request", None)
+            if start is not None:
+                self.record(
+                    "first_byte",
+                    time.perf_counter() - start,
+                    path=params.url.path,
+                    status=params.response.status,
+                )
+
+        async def on_request_exception(session, ctx: SimpleNamespace, params):
+            start = getattr(ctx, "request", None)
+            if start is not None:
+                self.record(
+                    "request_error",
+                    time.perf_counter() - start,
+                    path=params.url.path,
+                    error=params.exception.__class__.__name__,
+                )
+
+        config.on_request_start.append(start_of("request"))
+        config.on_connection_queued_start.append(start_of("pool_wait"))
+        config.on_connection_queued_end.append(end_of("pool_wait"))
+        config.on_dns_resolvehost_start.append(start_of("dns"))
+        config.on_dns_resolvehost_end.append(end_of("dns"))
+        config.on_connection_create_start.append(start_of("connect"))
+        config.on_connection_create_end.append(end_of("connect"))
+        config.on_request_end.append(on_request_end)
+        config.on_request_exception.append(on_request_exception)
+        config.freeze()
+        return config
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+_default_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    return _default_tracer
+
+
+def configure_tracer(path: str = None) -> Tracer:
+    r"""Replace shared tracer of process, tracing enabled if `path` set."""
+    global _default_tracer
+    _default_tracer.close()
+    _default_tracer = Tracer(path)
+    return _default_tracer
+
+
+def _percentile(values: list[float], q: float) -> float:
+    # Nearest rank, values are sorted
+    index = max(0, min(len(values) - 1, round(q / 100 * len(values)) - 1))
+    return values[index]
+
+
+def summarize(paths: list[str]) -> dict[str, PhaseSummary]:
+    r"""
+    Return percentiles of durations (milliseconds) of each phase in files
+    of traces.
+    """
+    durations: dict[str, list[float]] = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    span = json.loads(line)
+                except json.JSONDecodeError:
+                    # Last line can be cut if process was killed
+                    continue
+                durations.setdefault(span["p"], []).append(span["d"])
+
+    summary = {}
+    for phase, values in durations.items():
+        values.sort()
+        summary[phase] = {
+            "count": len(values),
+            "p50": _percentile(values, 50),
+            "p95": _percentile(values, 95),
+            "p99": _percentile(values, 99),
+            "max": values[-1],
+        }
+    return summary
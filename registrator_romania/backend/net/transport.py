@@ -0,0 +1,268 @@
+"""
+Transports of requests to site: aiohttp (HTTP/1.1, request per connection)
+and httpx (HTTP/2, requests multiplexed over few connections).
+"""
+
+from abc import ABC, abstractmethod
+import json
+import time
+from typing import Any, Literal, Mapping
+
+import aiohttp
+import httpx
+from multidict import CIMultiDict
+
+from registrator_romania.backend.net import AIOHTTP_NET_ERRORS, metrics
+from registrator_romania.backend.net.aiohttp_ext import AiohttpSession
+from registrator_romania.backend.net.httpx_ext import HTTPX_NET_ERRORS
+from registrator_romania.backend.net.tracing import get_tracer
+
+
+TransportName = Literal["aiohttp", "httpx"]
+
+# Errors of network of both transports
+TRANSPORT_NET_ERRORS = (
+    *AIOHTTP_NET_ERRORS,
+    *HTTPX_NET_ERRORS,
+    httpx.TransportError,
+)
+
+# Headers of connection are forbidden in HTTP/2
+HOP_BY_HOP_HEADERS = (
+    "connection",
+    "keep-alive",
+    "proxy-connection",
+    "transfer-encoding",
+    "upgrade",
+)
+
+
+class Response:
+    r"""Response with read body, same for all transports."""
+
+    __slots__ = (
+        "status",
+        "reason",
+        "headers",
+        "content",
+        "encoding",
+        "http_version",
+    )
+
+    def __init__(
+        self,
+        status: int,
+        reason: str,
+        headers: Mapping[str, str],
+        content: bytes,
+        encoding: str = None,
+        http_version: str = "HTTP/1.1",
+    ) -> None:
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding or "utf-8"
+        self.http_version = http_version
+
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors="replace")
+
+    def json(self) -> Any:
+        # Site answers json with `text/html` content type, it is not checked
+        return json.loads(self.content)
+
+
+async def read_response(resp: aiohttp.ClientResponse) -> Response:
+    r"""Read body of response of aiohttp into `Response`."""
+    content = await resp.read()
+    return Response(
+        resp.status,
+        resp.reason or "",
+        resp.headers,
+        content,
+        # Body is read, so charset can be detected
+        resp.get_encoding(),
+        f"HTTP/{resp.version.major}.{resp.version.minor}",
+    )
+
+
+class Transport(ABC):
+    name: TransportName
+
+    @abstractmethod
+    async def request(
+        self,
+        method: str,
+        url: str,
+        data: Mapping | bytes = None,
+        headers: Mapping[str, str] = None,
+        proxy: str = None,
+    ) -> Response:
+        r"""Send request and read body, errors of network are raised."""
+
+    async def close(self):
+        pass
+
+
+class AiohttpTransport(Transport):
+    r"""
+    Sessions of aiohttp over one pool of connections. Each request holds
+    connection until response read, burst of requests opens as many
+    connections as requests sent at same time.
+    """
+
+    name = "aiohttp"
+
+    def __init__(
+        self,
+        connector: aiohttp.TCPConnector = None,
+        timeout: int = 5,
+    ) -> None:
+        self._sessionmaker = AiohttpSession()
+        self._connector = connector or self._sessionmaker.generate_connector()
+        self._timeout = timeout
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        data: Mapping | bytes = None,
+        headers: Mapping[str, str] = None,
+        proxy: str = None,
+    ) -> Response:
+        session = self._sessionmaker.generate(
+            self._connector, total_timeout=self._timeout
+        )
+        async with session:
+            async with session.request(
+                method, url, data=data, headers=headers, proxy=proxy
+            ) as resp:
+                return await read_response(resp)
+
+    async def close(self):
+        await self._connector.close()
+
+
+class HttpxTransport(Transport):
+    r"""
+    Clients of httpx with HTTP/2, one client for each proxy (None is direct
+    connection). If site supports HTTP/2 (ALPN of TLS), requests sent at
+    same time are streams of one connection, new connection opened only
+    when limit of streams of server reached. Without HTTP/2 (e.g. plain
+    http of local stub) it is HTTP/1.1 with pool of `max_connections`
+    (None is unlimited). `verify` is passed to httpx (e.g. certificate of
+    local stub with TLS). Socks proxies need `httpx[socks]`.
+    """
+
+    name = "httpx"
+
+    def __init__(
+        self,
+        http2: bool = True,
+        max_connections: int = None,
+        timeout: int = 5,
+        verify: bool | str = True,
+    ) -> None:
+        self._http2 = http2
+        self._verify = verify
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        )
+        # Like aiohttp transport only connecting is limited by time
+        self._timeout = httpx.Timeout(None, connect=timeout)
+        self._clients: dict[str | None, httpx.AsyncClient] = {}
+
+    def _client(self, proxy: str = None) -> httpx.AsyncClient:
+        client = self._clients.get(proxy)
+        if client is None:
+            client = httpx.AsyncClient(
+                http2=self._http2,
+                proxy=proxy,
+                limits=self._limits,
+                timeout=self._timeout,
+                verify=self._verify,
+                trust_env=True,
+            )
+            self._clients[proxy] = client
+        return client
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        data: Mapping | bytes = None,
+        headers: Mapping[str, str] = None,
+        proxy: str = None,
+    ) -> Response:
+        headers = [
+            (k, v)
+            for k, v in (headers or {}).items()
+            if k.lower() not in HOP_BY_HOP_HEADERS
+        ]
+        if isinstance(data, bytes):
+            kwargs = {"content": data}
+        else:
+            kwargs = {"data": data}
+
+        observed = bool(metrics.trace_configs())
+        if observed:
+            metrics.IN_FLIGHT.inc()
+        path = httpx.URL(url).path
+        start = time.perf_counter()
+        try:
+            resp = await self._client(proxy).request(
+                method, url, headers=headers, **kwargs
+            )
+        except Exception as e:
+            # Same records what trace configs of aiohttp write
+            get_tracer().record(
+                "request_error",
+                time.perf_counter() - start,
+                path=path,
+                error=e.__class__.__name__,
+            )
+            if observed:
+                metrics.REQUEST_ERRORS.inc(e.__class__.__name__)
+            raise
+        finally:
+            if observed:
+                metrics.IN_FLIGHT.dec()
+
+        duration = time.perf_counter() - start
+        get_tracer().record(
+            "first_byte", duration, path=path, status=resp.status_code
+        )
+        if observed:
+            metrics.REQUEST_LATENCY.observe(duration, path, resp.status_code)
+        return Response(
+            resp.status_code,
+            resp.reason_phrase,
+            resp.headers,
+            resp.content,
+            resp.encoding,
+            resp.http_version,
+        )
+
+    async def close(self):
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+
+def create_transport(name: TransportName = "aiohttp", **kwargs) -> Transport:
+    if name == "aiohttp":
+        return AiohttpTransport(**kwargs)
+    if name == "httpx":
+        return HttpxTransport(**kwargs)
+    raise ValueError(f"Unknown transport {name}")
+
+
+def merge_headers(*headers: Mapping[str, str]) -> CIMultiDict[str]:
+    r"""Merge headers, later values replace earlier ones (any case of key)."""
+    merged = CIMultiDict()
+    for mapping in headers:
+        if mapping:
+            merged.update(mapping)
+    return merged
@@ -3,13 +3,14 @@ from __future__ import annotations
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 import datetime
+import functools
 import multiprocessing
 import os
 import queue
 import random
 import time
 import traceback
-from typing import Type
+from typing import AsyncIterator, Type
 
 import aiohttp.client_exceptions
 import httpx
@@ -17,9 +18,20 @@ from loguru import logger
 import aiohttp
 from apscheduler.schedulers.background import BackgroundScheduler
 
-from registrator_romania.backend.net.aiohttp_ext import AiohttpSession
+from registrator_romania.backend.net import SOCKS_NET_ERRORS, metrics
+from registrator_romania.backend.net.aiohttp_ext import (
+    AiohttpSession,
+    is_socks_proxy,
+)
 from registrator_romania.backend.net.httpx_ext import HTTPX_NET_ERRORS
+from registrator_romania.backend.net.ratelimit import Priority, RateLimiter
 from registrator_romania.backend.proxies import providers
+from registrator_romania.backend.proxies.providers.base import BaseProxyProvider
+from registrator_romania.backend.proxies.records import (
+    Proxy,
+    ProxyRegistry,
+    ProxyStats,
+)
 from registrator_romania.backend.utils import divide_list
 
 
@@ -33,52 +45,126 @@ AIOHTTP_NET_ERRORS = (
     aiohttp.ClientOSError,
     aiohttp.ServerDisconnectedError,
     asyncio.TimeoutError,
+    *SOCKS_NET_ERRORS,
 )
 
 
+# Url what return address of client, proxy is alive if it respond
+CHECK_URL = "https://api.ipify.org"
+
+
+@functools.cache
+def _ssl_context():
+    # Creating of ssl context (load of certificates) takes tens of
+    # milliseconds, httpx client do it on each creation if not passed
+    return httpx.create_ssl_context()
+
+
 async def check_proxy(
     proxy: str,
     queue: multiprocessing.Queue = None,
     connector: aiohttp.TCPConnector = None,
     timeout: int = None,
     close_connector: bool = False,
+    url: str = None,
 ) -> dict:
-    url = "https://api.ipify.org"
-
-    # async with AiohttpSession().generate(
-    #     close_connector=close_connector,
-    #     connector=connector,
-    #     total_timeout=timeout or 15,
-    # ) as session:
-    async with httpx.AsyncClient(proxy=httpx.Proxy(proxy)) as session:
+    url = url or CHECK_URL
+
+    try:
+        start = datetime.datetime.now()
+        if is_socks_proxy(proxy):
+            # httpx can't work with socks proxies without extra dependencies,
+            # so we are check them by aiohttp with socks connector
+            async with AiohttpSession().generate(
+                close_connector=True,
+                connector=AiohttpSession().generate_proxy_connector(proxy),
+                total_timeout=timeout or 15,
+            ) as session:
+                async with session.get(url) as resp:
+                    text = await resp.text()
+        else:
+            async with httpx.AsyncClient(
+                proxy=httpx.Proxy(proxy), verify=_ssl_context()
+            ) as session:
+                resp = await session.get(url)
+                text = resp.text
+
+        result = (
+            text,
+            proxy,
+            datetime.datetime.now() - start,
+        )
+        if queue:
+            await asyncio.to_thread(queue.put, result, block=False)
+        return result
+    except (*AIOHTTP_NET_ERRORS, *HTTPX_NET_ERRORS):
+        return tuple()
+    except UnicodeError:
+        return tuple()
+    except Exception as e:
+        tb = traceback.format_exc()
+        msg = f"check_proxy got an error {e} with traceback:\n{tb}"
+        # logger.exception(msg)
+        print(f"{e.__class__.__name__}: {e}")
+        return tuple()
+
+
+async def stream_proxies(
+    sources: list[BaseProxyProvider], offset: int = 0
+) -> AsyncIterator[str]:
+    r"""
+    Yield proxies of all `sources` as soon as they parsed. Sources are
+    downloaded concurrently, first `offset` proxies are skipped.
+    """
+    proxies_queue = asyncio.Queue(maxsize=10_000)
+    finished = object()
+
+    async def produce(source: BaseProxyProvider):
         try:
-            start = datetime.datetime.now()
-            # async with session.get(url, proxy=proxy) as resp:
-            resp = await session.get(url)
-            result = (
-                resp.text,
-                proxy,
-                datetime.datetime.now() - start,
-            )
-            if queue:
-                await asyncio.to_thread(queue.put, result, block=False)
-            return result
-        except (AIOHTTP_NET_ERRORS, HTTPX_NET_ERRORS):
-            return tuple()
-        except UnicodeError:
-            return tuple()
+            async for proxy in source.iter_proxies():
+                await proxies_queue.put(proxy)
+        except asyncio.CancelledError:
+            # Consumer stopped, nobody waits for end of source, and queue
+            # can be full
+            raise
         except Exception as e:
-            tb = traceback.format_exc()
-            msg = f"check_proxy got an error {e} with traceback:\n{tb}"
-            # logger.exception(msg)
-            print(f"{e.__class__.__name__}: {e}")
-            return tuple()
-
+            logger.exception(
+                f"Proxies of {source.__class__.__name__} not received: {e}"
+            )
+        await proxies_queue.put(finished)
+
+    tasks = [asyncio.create_task(produce(source)) for source in sources]
+    try:
+        remaining = len(tasks)
+        while remaining:
+            proxy = await proxies_queue.get()
+            if proxy is finished:
+                remaining -= 1
+                continue
+
+            if offset:
+                offset -= 1
+                continue
+            yield proxy
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def run_th(
+    proxies: list[Proxy], q: multiprocessing.Queue, url: str = CHECK_URL
+):
+    async def check(proxy: Proxy):
+        result = await check_proxy(proxy.url, close_connector=True, url=url)
+        if result:
+            # Parent process know proxies by id, send only id and seconds
+            item = (proxy.id, result[2].total_seconds())
+            await asyncio.to_thread(q.put, item, block=False)
+        return result
 
-def run_th(proxies: list[str], q: multiprocessing.Queue):
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
-    tasks = [check_proxy(p, queue=q, close_connector=True) for p in proxies]
+    tasks = [check(p) for p in proxies]
     results = loop.run_until_complete(
         asyncio.gather(*tasks, return_exceptions=True)
     )
@@ -95,6 +181,7 @@ class AutomaticProxyPool:
         second_check: bool = False,
         second_check_url: str = None,
         second_check_headers: dict = None,
+        check_url: str = None,
     ) -> None:
         self._scheduler = BackgroundScheduler()
         self._scheduler.add_job(self._add_new_proxies, "interval", minutes=10)
@@ -104,13 +191,21 @@ class AutomaticProxyPool:
         self._queue = multiprocessing.Queue()
         self._event = multiprocessing.Event()
         self._pool = AiohttpSession().generate_connector()
-        self._proxies = []
-        self._proxies_reports = {}
+        # Socks proxies can't be passed into `proxy` parameter of aiohttp
+        # request, so each of them has own connector and session
+        self._proxy_connectors: dict[str, aiohttp.BaseConnector] = {}
+        self._proxy_sessions: dict[str, aiohttp.ClientSession] = {}
+        # All proxies what pool know interned in registry, structures below
+        # store records or ids of them, statistics stored in arrays by id
+        self._registry = ProxyRegistry()
+        self._stats = ProxyStats()
+        self._proxies: dict[int, Proxy] = {}
         self.debug = debug
         self._append_pool_task: asyncio.Task = None
-        self._src_proxies_list = proxies
+        self._ingest_task: asyncio.Task = None
+        self._src_proxies_list: list[Proxy] = []
+        self._extend_src_proxies(proxies)
         self._do_second_check = second_check
-        self._timeout_proxies = {}
         self._last_proxy_used: str = None
         self._proxy_for = {
             "url": "",
@@ -119,36 +214,109 @@ class AutomaticProxyPool:
             "proxies": [],
         }
         self._lock = asyncio.Lock()
-        self._urls: list[dict[str, dict[str, str]]] = {}
-        
+        self._urls: dict[str, dict[int, float]] = {}
+
         # Example:
-        # [{"https://url1.com": {"proxy": "https://proxy:8080", "timeout": 2}}]
+        # {"https://url1.com": {<id of proxy>: 0.2}}
         # (timeout in seconds)
-        
+
         self._sources_cls = [] if not sources_classes else sources_classes
-        self._second_check_url = second_check_url or "https://api.ipify.org"
+        self._check_url = check_url or CHECK_URL
+        self._second_check_url = second_check_url or CHECK_URL
         self._second_check_headers = second_check_headers or {"Accept": "*/*"}
 
+        # Second stage of checks: proxies what passed liveness check are
+        # validated against target sites in background, so `_urls` already
+        # have ranked proxies for them before first request
+        self._targets: dict[str, dict[str, str]] = {}
+        self._targets_queue: asyncio.Queue[Proxy] = None
+        self._targets_tasks: list[asyncio.Task] = []
+        # Shared limiter of requests, checks of proxies on targets have
+        # lowest priority in it
+        self.rate_limiter: RateLimiter = None
+
     @property
     def last_proxy_used(self):
         return self._last_proxy_used
 
+    def _extend_src_proxies(self, proxies: list[str]) -> list[Proxy]:
+        r"""
+        Intern new proxies and append them into source list. Return records
+        of new proxies, invalid and already known proxies are skipped.
+        """
+        records = []
+        for url in proxies:
+            if url in self._registry:
+                continue
+            try:
+                records.append(self._registry.intern(url))
+            except ValueError:
+                continue
+        self._src_proxies_list.extend(records)
+        return records
+
+    def _get_pooled(self, proxy: str) -> Proxy | None:
+        record = self._registry.find(proxy)
+        if record is not None and record.id in self._proxies:
+            return record
+
+    @property
+    def ingesting(self) -> bool:
+        return bool(self._ingest_task) and not self._ingest_task.done()
+
+    def start_ingest(self, proxies: AsyncIterator[str], limit: int = 500):
+        r"""
+        Start check proxies from `proxies` iterator in background. Call it
+        before await the pool, so background process start recheck proxies
+        only after iterator will be exhausted.
+        """
+        self._ingest_task = asyncio.create_task(
+            self.ingest(proxies, limit=limit)
+        )
+        return self._ingest_task
+
+    async def ingest(self, proxies: AsyncIterator[str], limit: int = 500):
+        r"""
+        Check proxies as soon as they come from `proxies` iterator and
+        append working of them to the pool. New proxies also appended into
+        source list, so background process will recheck them.
+        """
+        semaphore = asyncio.Semaphore(limit)
+        tasks = set()
+        total = 0
+
+        async def check(proxy: Proxy):
+            try:
+                if await check_proxy(proxy.url, url=self._check_url):
+                    await self._accept_proxy(proxy)
+            finally:
+                semaphore.release()
+
+        async for url in proxies:
+            for proxy in self._extend_src_proxies([url]):
+                total += 1
+
+                await semaphore.acquire()
+                task = asyncio.create_task(check(proxy))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self.debug:
+            logger.debug(
+                f"Ingested {total} raw proxies, {len(self._proxies)} in pool"
+            )
+
     def _add_new_proxies(self):
         async def add_new_proxies_async():
             proxies_classes = self._sources_cls
             for proxy_class in proxies_classes:
                 try:
-                    proxies = await proxy_class.list_http_proxy()
+                    proxies = await proxy_class.list_proxies()
                 except Exception:
                     continue
                 else:
-                    self._src_proxies_list.extend(
-                        [
-                            proxy
-                            for proxy in proxies
-                            if proxy not in self.proxies
-                        ]
-                    )
+                    self._extend_src_proxies(proxies)
 
         loop = asyncio.new_event_loop()
         loop.run_until_complete(add_new_proxies_async())
@@ -158,56 +326,73 @@ class AutomaticProxyPool:
         return self
 
     def __await__(self):
-        self.start_background()
+        if not self.ingesting:
+            self.start_background()
         return self._append_pool().__await__()
 
     def __del__(self):
-        print(
-            "Unstopped background proccess filter "
-            f"proxies: {self._process.name}. Stopping at now..."
-        )
+        if self._process:
+            print(
+                "Unstopped background proccess filter "
+                f"proxies: {self._process.name}. Stopping at now..."
+            )
         self.drop_background()
         self._scheduler.remove_all_jobs()
         del self._scheduler
 
-    async def _append_pool(self):
-        async def send_request(proxy: str):
-            if proxy in self.proxies:
-                return
+    async def _accept_proxy(self, record: Proxy):
+        r"""
+        Append checked proxy to the pool. If second check enabled, proxy
+        appended only if it works with `second_check_url`.
+        """
+        if record.id in self._proxies:
+            return
+        proxy = record.url
 
-            async with AiohttpSession().generate(
-                connector=self._pool, total_timeout=5
-            ) as session:
-                session._default_headers = self._second_check_headers
+        async with AiohttpSession().generate(
+            connector=self.get_connector(proxy), total_timeout=5
+        ) as session:
+            session._default_headers = self._second_check_headers
 
-                if self.debug:
-                    logger.debug(f"append_pool: {proxy}")
+            if self.debug:
+                logger.debug(f"append_pool: {proxy}")
 
-                try:
-                    if self._do_second_check:
-                        start = datetime.datetime.now()
-                        async with session.get(
-                            self._second_check_url, proxy=proxy
-                        ):
-                            stop = datetime.datetime.now()
-                            if self.debug:
-                                logger.debug(
-                                    "Second check was successfully: "
-                                    f"{proxy} - {start - stop}"
-                                )
-                    self._proxies.append(proxy)
-                    self.proxy_working(proxy)
-                except AIOHTTP_NET_ERRORS:
-                    pass
-                except Exception as e:
-                    logger.exception(e)
+            try:
+                if self._do_second_check:
+                    start = datetime.datetime.now()
+                    async with session.get(
+                        self._second_check_url,
+                        **self.proxy_kwargs(proxy),
+                    ):
+                        stop = datetime.datetime.now()
+                        if self.debug:
+                            logger.debug(
+                                "Second check was successfully: "
+                                f"{proxy} - {start - stop}"
+                            )
+                self._proxies[record.id] = record
+                self._stats.reset(record.id)
+                metrics.PROXY_POOL_SIZE.set(len(self._proxies))
+                if self._targets:
+                    self._targets_queue.put_nowait(record)
+            except AIOHTTP_NET_ERRORS:
+                pass
+            except Exception as e:
+                logger.exception(e)
 
+    async def _append_pool(self):
         async def background():
             try:
                 while True:
+                    if self.ingesting:
+                        # Don't check same proxies twice, background
+                        # process recheck them after ingest
+                        await asyncio.wait([self._ingest_task])
+                        self.start_background()
+
                     tasks = []
                     async for proxy, time in self:
-                        task = asyncio.create_task(send_request(proxy))
+                        task = asyncio.create_task(self._accept_proxy(proxy))
                         tasks.append(task)
                         await asyncio.sleep(0.250)
 
@@ -239,8 +424,8 @@ class AutomaticProxyPool:
 
             else:
                 if isinstance(result, tuple):
-                    time = result[2]
-                    proxy = result[1]
+                    proxy_id, time = result
+                    proxy = self._registry.get(proxy_id)
                     if self.debug:
                         logger.debug(f"__anext__(): return proxy - {proxy}")
 
@@ -261,6 +446,8 @@ class AutomaticProxyPool:
         if self._process:
             if self._process.is_alive():
                 self._process.kill()
+            # Process can't be closed until it is reaped
+            self._process.join()
             self._process.close()
         if self._queue:
             self._queue.close()
@@ -273,8 +460,9 @@ class AutomaticProxyPool:
     def start_background(self):
         def run(
             q: multiprocessing.Queue,
-            proxies: list[str],
+            proxies: list[Proxy],
             event: multiprocessing.Event,
+            url: str,
         ):
             divides = 700
             # proxies [0, 0, 0, 0, 0, 0]
@@ -286,7 +474,12 @@ class AutomaticProxyPool:
                     with ThreadPoolExecutor(
                         max_workers=os.cpu_count() * 2.5
                     ) as e:
-                        e.map(run_th, chunk, [q for _ in chunk])
+                        e.map(
+                            run_th,
+                            chunk,
+                            [q for _ in chunk],
+                            [url for _ in chunk],
+                        )
 
                     time.sleep(1.5)
                 except KeyboardInterrupt:
@@ -297,13 +490,19 @@ class AutomaticProxyPool:
 
         self._event.clear()
         self._process = multiprocessing.Process(
-            target=run, args=(self._queue, self._src_proxies_list, self._event)
+            target=run,
+            args=(
+                self._queue,
+                self._src_proxies_list,
+                self._event,
+                self._check_url,
+            ),
         )
         self._process.start()
 
     @property
-    def proxies(self):
-        return self._proxies
+    def proxies(self) -> list[str]:
+        return [record.url for record in self._proxies.values()]
 
     def set_proxies_for_url(self, list_of_proxies: list[str]):
         self._proxy_for["proxies"] = list_of_proxies
@@ -313,7 +512,7 @@ class AutomaticProxyPool:
         return filtered
 
     async def get_session(self, timeout: int = 5) -> aiohttp.ClientSession:
-        if not self.proxies:
+        if not self._proxies:
             raise ValueError("Proxies list empty")
         session = AiohttpSession().generate(
             connector=self._pool, total_timeout=timeout
@@ -330,9 +529,14 @@ class AutomaticProxyPool:
                     proxy = self_class.get_best_proxy_by_timeout()
                     kwargs["proxy"] = proxy
 
-                    if not self_class._urls.get(url):
+                    if self_class._urls.get(url):
+                        proxy = self_class._pop_best_proxy_for_url(url)
+                        kwargs["proxy"] = proxy
+
+                    elif url not in self_class._targets:
                         # If we not have any proxies for this site, we are
-                        # collect them
+                        # collect them. Proxies for watched targets are
+                        # collected in background, so don't wait for them
                         proxies = []
                         try:
                             proxies = await self_class.collect_valid_proxies(
@@ -348,14 +552,10 @@ class AutomaticProxyPool:
                                 proxies
                             )
                             proxy = proxies.pop(0)["proxy"]
-                            self_class._urls[url] = proxies
+                            self_class._set_timeouts_for_url(url, proxies)
 
                             kwargs["proxy"] = proxy
 
-                    elif self_class._urls[url]:
-                        proxy = self_class._urls[url].pop(0)["proxy"]
-                        kwargs["proxy"] = proxy
-
             if self_class.debug and proxy:
                 logger.debug(f"Do request on {url} with proxy {proxy}")
 
@@ -368,76 +568,32 @@ class AutomaticProxyPool:
 
             start = datetime.datetime.now()
             try:
-                result = await session._request_(*args, **kwargs)
+                result = await self_class._send(session, *args, **kwargs)
                 if kwargs.get("proxy") is None:
                     return result
 
                 stop = datetime.datetime.now()
 
-                if proxy:
-                    self_class._timeout_proxies[proxy] = stop - start
-
-                    if url not in self_class._urls:
-                        self_class._urls[url] = []
-                    try:
-                        list_proxies_for_url = self_class._urls[url].copy()
-                        proxy_record = [
-                            record
-                            for record in list_proxies_for_url
-                            if record["proxy"] == proxy
-                        ]
-
-                        if not proxy_record:
-                            proxy_record = {
-                                "proxy": proxy,
-                                "timeout": (stop - start).microseconds,
-                            }
-                            list_proxies_for_url.append(proxy_record)
-                            i = -1
-                        else:
-                            proxy_record = proxy_record[0]
-                            i = list_proxies_for_url.index(proxy_record)
-
-                        list_proxies_for_url[i] = {
-                            "proxy": proxy,
-                            "timeout": (stop - start).microseconds,
-                        }
-                        new_list = self_class.sort_proxies_by_timeout(
-                            proxies=list_proxies_for_url
-                        )
-                        async with session._lock:
-                            self_class._urls[url] = new_list
-                    except (ValueError, ValueError):
-                        pass
-                    except RuntimeError:
-                        pass
+                record = self_class._registry.find(proxy) if proxy else None
+                if record is not None:
+                    seconds = (stop - start).total_seconds()
+                    self_class._stats.set_timeout(record.id, seconds)
+                    self_class._urls.setdefault(url, {})[record.id] = seconds
 
                 if proxy and result.status != 200:
                     self_class.proxy_not_working(proxy=proxy)
-                elif proxy and proxy in self_class.proxies:
+                elif proxy:
                     self_class.proxy_working(proxy=proxy)
 
                 return result
             except AIOHTTP_NET_ERRORS as e:
-                if proxy and proxy in self_class.proxies:
+                record = self_class._registry.find(proxy) if proxy else None
+                if record is not None:
                     self_class.proxy_not_working(proxy=proxy)
-                    if self_class._timeout_proxies.get(proxy):
-                        del self_class._timeout_proxies[proxy]
+                    self_class._stats.clear_timeout(record.id)
 
-                if url in self_class._urls:
-                    try:
-                        async with session._lock:
-                            proxy_record = [
-                                record
-                                for record in self_class._urls[url]
-                                if record["proxy"] == proxy
-                            ]
-
-                            if proxy_record:
-                                i = self_class._urls[url].index(proxy_record[0])
-                                del self_class._urls[url][i]
-                    except RuntimeError:
-                        pass
+                    if url in self_class._urls:
+                        self_class._urls[url].pop(record.id, None)
 
                 raise e
             finally:
@@ -453,6 +609,203 @@ class AutomaticProxyPool:
 
         return session
 
+    def _set_timeouts_for_url(
+        self, url: str, proxies: list[dict[str, str | int]]
+    ):
+        r"""
+        Set proxies for `url` from records of `collect_valid_proxies`.
+        """
+        timeouts = {}
+        for proxy in proxies:
+            record = self._registry.find(proxy["proxy"])
+            if record is not None:
+                timeouts[record.id] = proxy["timeout"] / 1_000_000
+        self._urls[url] = timeouts
+
+    def _pop_best_proxy_for_url(self, url: str) -> str | None:
+        r"""
+        Pop proxy with least response time for `url`. Proxy will appended
+        back after successfull request.
+        """
+        timeouts = self._urls.get(url)
+        if not timeouts:
+            return None
+        proxy_id = min(timeouts, key=timeouts.__getitem__)
+        del timeouts[proxy_id]
+        return self._registry.get(proxy_id).url
+
+    def get_connector(self, proxy: str = None) -> aiohttp.BaseConnector:
+        r"""
+        Return connector for requests through `proxy`. Http proxies share
+        common pool of connections, each socks proxy has own connector,
+        what reused across requests.
+        """
+        if not is_socks_proxy(proxy):
+            return self._pool
+
+        connector = self._proxy_connectors.get(proxy)
+        if connector is None or connector.closed:
+            connector = AiohttpSession().generate_proxy_connector(proxy)
+            self._proxy_connectors[proxy] = connector
+        return connector
+
+    @staticmethod
+    def proxy_kwargs(proxy: str = None) -> dict[str, str]:
+        r"""
+        Return keyword arguments for request of aiohttp session created with
+        connector from `get_connector`.
+        """
+        if not proxy or is_socks_proxy(proxy):
+            return {}
+        return {"proxy": proxy}
+
+    def _get_socks_session(self, proxy: str) -> aiohttp.ClientSession:
+        session = self._proxy_sessions.get(proxy)
+        if session is None or session.closed:
+            session = AiohttpSession().generate(
+                connector=self.get_connector(proxy)
+            )
+            self._proxy_sessions[proxy] = session
+        return session
+
+    def _drop_socks_session(self, proxy: str):
+        session = self._proxy_sessions.pop(proxy, None)
+        connector = self._proxy_connectors.pop(proxy, None)
+        if session and not session.closed:
+            asyncio.ensure_future(session.close())
+        if connector and not connector.closed:
+            asyncio.ensure_future(connector.close())
+
+    async def _send(
+        self, session: aiohttp.ClientSession, *args, **kwargs
+    ) -> aiohttp.ClientResponse:
+        r"""
+        Send request of `session` by proxy from `proxy` parameter. Requests
+        through socks proxy sended by session of this proxy with headers of
+        `session`.
+        """
+        proxy = kwargs.get("proxy")
+        if not is_socks_proxy(proxy):
+            return await session._request_(*args, **kwargs)
+
+        kwargs = kwargs.copy()
+        del kwargs["proxy"]
+        headers = dict(session._default_headers)
+        headers.update(kwargs.pop("headers", None) or {})
+        kwargs.setdefault("timeout", session.timeout)
+
+        socks_session = self._get_socks_session(proxy)
+        return await socks_session._request(*args, headers=headers, **kwargs)
+
+    def watch_target(
+        self,
+        url: str,
+        headers: dict[str, str],
+        limit: int = 100,
+        recheck_interval: int = 60,
+    ):
+        r"""
+        Validate proxies of pool against `url` with `headers` in background.
+        Each new proxy of pool validated as soon as it passed liveness check,
+        all proxies of pool revalidated every `recheck_interval` seconds.
+        """
+        self._targets[url] = headers
+        self._urls.setdefault(url, {})
+
+        if not self._targets_tasks:
+            self._targets_queue = asyncio.Queue()
+            self._targets_tasks = [
+                asyncio.create_task(self._validate_targets(limit=limit)),
+                asyncio.create_task(
+                    self._recheck_targets(interval=recheck_interval)
+                ),
+            ]
+
+        for record in self._proxies.values():
+            self._targets_queue.put_nowait(record)
+
+    def unwatch_targets(self):
+        for task in self._targets_tasks:
+            task.cancel()
+        self._targets_tasks = []
+        self._targets.clear()
+
+    def get_target_proxies(self, url: str) -> list[str]:
+        r"""Return proxies validated for `url`, fastest first."""
+        timeouts = self._urls.get(url, {}).copy()
+        return [
+            self._registry.get(proxy_id).url
+            for proxy_id in sorted(timeouts, key=timeouts.__getitem__)
+        ]
+
+    async def _validate_targets(self, limit: int):
+        semaphore = asyncio.Semaphore(limit)
+        tasks = set()
+
+        async def validate(record: Proxy):
+            try:
+                for url, headers in self._targets.copy().items():
+                    await self._validate_for_target(record, url, headers)
+            finally:
+                semaphore.release()
+
+        while True:
+            record = await self._targets_queue.get()
+            await semaphore.acquire()
+            task = asyncio.create_task(validate(record))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+    async def _recheck_targets(self, interval: int):
+        while True:
+            await asyncio.sleep(interval)
+            if self._targets_queue.qsize():
+                # Previous recheck not finished yet
+                continue
+            for record in list(self._proxies.values()):
+                self._targets_queue.put_nowait(record)
+
+    async def _validate_for_target(
+        self, record: Proxy, url: str, headers: dict[str, str]
+    ):
+        if record.id not in self._proxies:
+            self._urls[url].pop(record.id, None)
+            return
+
+        proxy = record.url
+        if self.rate_limiter:
+            await self.rate_limiter.acquire(url, proxy, Priority.PROXY_CHECK)
+        async with AiohttpSession().generate(
+            connector=self.get_connector(proxy), total_timeout=4
+        ) as session:
+            session._default_headers = headers
+            start = datetime.datetime.now()
+            try:
+                async with session.get(url, **self.proxy_kwargs(proxy)) as resp:
+                    await resp.read()
+                    if self.rate_limiter:
+                        self.rate_limiter.report(url, proxy, resp.status)
+                    # Site return page `Forbidden` for blocked addresses
+                    allowed = (
+                        resp.status not in (403, 429)
+                        and resp.status < 500
+                        and not resp.reason.lower().count("forbidden")
+                    )
+            except AIOHTTP_NET_ERRORS:
+                allowed = False
+            except Exception as e:
+                logger.exception(e)
+                allowed = False
+
+        if allowed:
+            seconds = (datetime.datetime.now() - start).total_seconds()
+            self._urls[url][record.id] = seconds
+        else:
+            self._urls[url].pop(record.id, None)
+
+        if self.debug:
+            logger.debug(f"Validate {proxy} for {url}: {allowed}")
+
     async def collect_valid_proxies(self, url: str, headers: dict[str, str]):
         session = AiohttpSession().generate(
             connector=self._pool, close_connector=False, total_timeout=4
@@ -462,8 +815,15 @@ class AutomaticProxyPool:
 
         async def send_req(proxy: str):
             start = datetime.datetime.now()
+            if is_socks_proxy(proxy):
+                request = self._get_socks_session(proxy).get(
+                    url, headers=headers
+                )
+            else:
+                request = session.get(url, proxy=proxy)
+
             try:
-                async with session.get(url, proxy=proxy) as resp:
+                async with request as resp:
                     await resp.text()
                     if resp.status == 200:
                         return True, proxy, datetime.datetime.now() - start
@@ -483,43 +843,37 @@ class AutomaticProxyPool:
         ]
 
     def proxy_not_working(self, proxy: str):
-        if proxy not in self.proxies:
+        record = self._get_pooled(proxy)
+        if record is None:
             return
 
-        if not self._proxies_reports.get(proxy):
-            self._proxies_reports[proxy] = 0
-
-        self._proxies_reports[proxy] += 1
-
-        if self._proxies_reports[proxy] >= 30:
-            del self._proxies_reports[proxy]
-            self._proxies.remove(proxy)
+        metrics.PROXY_REPORTS.inc("failure")
+        if self._stats.report_failure(record.id) >= 30:
+            self._stats.reset(record.id)
+            del self._proxies[record.id]
+            metrics.PROXY_POOL_SIZE.set(len(self._proxies))
+            for timeouts in self._urls.values():
+                timeouts.pop(record.id, None)
+            self._drop_socks_session(proxy)
 
     def proxy_working(self, proxy: str):
-        if proxy not in self.proxies:
-            return
-        if not self._proxies_reports.get(proxy):
-            self._proxies_reports[proxy] = 0
+        record = self._get_pooled(proxy)
+        if record is None:
             return
-
-        self._proxies_reports[proxy] -= 1
-
-        if self._proxies_reports[proxy] < 0:
-            self._proxies_reports[proxy] = 0
+        metrics.PROXY_REPORTS.inc("success")
+        self._stats.report_success(record.id)
 
     def get_best_proxy(self):
-        if not self._proxies_reports:
-            return random.choice(self.proxies)
-        proxies_stats = list(self._proxies_reports.copy().items())
-        random.shuffle(proxies_stats)
-        return min(proxies_stats, key=lambda x: x[1])[0]
+        if not self._proxies:
+            raise IndexError("Proxies list empty")
+        proxy_id = self._stats.best_by_reports(list(self._proxies))
+        return self._registry.get(proxy_id).url
 
     def get_best_proxy_by_timeout(self):
-        if not self._timeout_proxies:
+        proxy_id = self._stats.best_by_timeout(self._proxies)
+        if proxy_id is None:
             return self.get_best_proxy()
-        proxies_stats = list(self._timeout_proxies.copy().items())
-        random.shuffle(proxies_stats)
-        return min(proxies_stats, key=lambda x: x[1])[0]
+        return self._registry.get(proxy_id).url
 
 
 async def filter_proxies(
@@ -1,3 +1,10 @@
+from typing import AsyncIterator
+
+from loguru import logger
+
+from registrator_romania.backend.net.aiohttp_ext import AiohttpSession
+from registrator_romania.backend.utils import is_host_port
+
 
 class BaseProxyProvider:
     async def list_http_proxy(self):
@@ -8,3 +15,93 @@ class BaseProxyProvider:
 
     async def list_socks5_proxy(self):
         return []
+
+    async def iter_http_proxy(self) -> AsyncIterator[str]:
+        for proxy in await self.list_http_proxy():
+            yield proxy
+
+    async def iter_socks4_proxy(self) -> AsyncIterator[str]:
+        for proxy in await self.list_socks4_proxy():
+            yield proxy
+
+    async def iter_socks5_proxy(self) -> AsyncIterator[str]:
+        for proxy in await self.list_socks5_proxy():
+            yield proxy
+
+    async def iter_proxies(self) -> AsyncIterator[str]:
+        r"""
+        Yield http, socks4 and socks5 proxies of provider one by one. If one
+        of lists not available, skip it and yield others.
+        """
+        iterators = (
+            self.iter_http_proxy,
+            self.iter_socks4_proxy,
+            self.iter_socks5_proxy,
+        )
+        for iterator in iterators:
+            try:
+                async for proxy in iterator():
+                    yield proxy
+            except Exception as e:
+                logger.warning(
+                    f"{self.__class__.__name__}.{iterator.__name__} "
+                    f"failed: {e.__class__.__name__}: {e}"
+                )
+                continue
+
+    async def list_proxies(self) -> list[str]:
+        r"""
+        Return http, socks4 and socks5 proxies of provider. If one of lists
+        not available, skip it and return others.
+        """
+        return [proxy async for proxy in self.iter_proxies()]
+
+
+class TextProxyListProvider(BaseProxyProvider):
+    r"""
+    Provider of plain text lists with `host:port` on each line. Lists are
+    parsed line by line from response stream, without download full text.
+    """
+
+    http_url: str = None
+    socks4_url: str = None
+    socks5_url: str = None
+    # Skip lines what not look like `host:port`
+    validate_lines: bool = False
+
+    async def _iter_list(self, url: str, scheme: str) -> AsyncIterator[str]:
+        if not url:
+            return
+
+        async with AiohttpSession().generate(close_connector=True) as session:
+            async with session.get(url) as resp:
+                # Page of error is not list of proxies
+                resp.raise_for_status()
+                async for line in resp.content:
+                    proxy = line.decode(errors="ignore").strip()
+                    if not proxy:
+                        continue
+                    if self.validate_lines and not is_host_port(proxy):
+                        continue
+                    yield f"{scheme}://{proxy}"
+
+    async def iter_http_proxy(self) -> AsyncIterator[str]:
+        async for proxy in self._iter_list(self.http_url, "http"):
+            yield proxy
+
+    async def iter_socks4_proxy(self) -> AsyncIterator[str]:
+        async for proxy in self._iter_list(self.socks4_url, "socks4"):
+            yield proxy
+
+    async def iter_socks5_proxy(self) -> AsyncIterator[str]:
+        async for proxy in self._iter_list(self.socks5_url, "socks5"):
+            yield proxy
+
+    async def list_http_proxy(self) -> list[str]:
+        return [proxy async for proxy in self.iter_http_proxy()]
+
+    async def list_socks4_proxy(self) -> list[str]:
+        return [proxy async for proxy in self.iter_socks4_proxy()]
+
+    async def list_socks5_proxy(self) -> list[str]:
+        return [proxy async for proxy in self.iter_socks5_proxy()]
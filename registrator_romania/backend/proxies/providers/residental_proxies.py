@@ -1,7 +1,10 @@
 import ua_generator
 
 from registrator_romania.backend.net.aiohttp_ext import AiohttpSession
-from registrator_romania.backend.proxies.providers.base import BaseProxyProvider
+from registrator_romania.backend.proxies.providers.base import (
+    BaseProxyProvider,
+    TextProxyListProvider,
+)
 
 
 __all__ = [
@@ -41,10 +44,5 @@ class ProxyCompass(BaseProxyProvider):
             ]
 
 
-class AdvancedMe(BaseProxyProvider):
-    async def list_http_proxy(self):
-        url = "https://advanced.name/freeproxy/66a19c1e7155c?type=http"
-        async with AiohttpSession().generate(close_connector=True) as session:
-            async with session.get(url) as resp:
-                response = await resp.text()
-                return [f"http://{line}" for line in response.splitlines()]
+class AdvancedMe(TextProxyListProvider):
+    http_url = "https://advanced.name/freeproxy/66a19c1e7155c?type=http"
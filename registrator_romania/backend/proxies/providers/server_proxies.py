@@ -1,6 +1,8 @@
 from registrator_romania.backend.net.aiohttp_ext import AiohttpSession
-from registrator_romania.backend.proxies.providers.base import BaseProxyProvider
-from registrator_romania.backend.utils import is_host_port
+from registrator_romania.backend.proxies.providers.base import (
+    BaseProxyProvider,
+    TextProxyListProvider,
+)
 
 
 __all__ = [
@@ -14,85 +16,34 @@ __all__ = [
 ]
 
 
-class ProxyMaster(BaseProxyProvider):
+class ProxyMaster(TextProxyListProvider):
     """
     Github - https://github.com/MuRongPIG/Proxy-Master
     """
 
-    async def list_http_proxy(self) -> list[str]:
-        url = "https://raw.githubusercontent.com/MuRongPIG/Proxy-Master/main/http.txt"
-        async with AiohttpSession().generate(close_connector=True) as session:
-            async with session.get(url) as resp:
-                proxies = await resp.text()
-                return [f"http://{p.strip()}" for p in proxies.splitlines()]
-
-    async def list_socks4_proxy(self) -> list[str]:
-        url = "https://raw.githubusercontent.com/MuRongPIG/Proxy-Master/main/socks4.txt"
-        async with AiohttpSession().generate(close_connector=True) as session:
-            async with session.get(url) as resp:
-                proxies = await resp.text()
-                return [f"socks4://{p.strip()}" for p in proxies.splitlines()]
-
-    async def list_socks5_proxy(self) -> list[str]:
-        url = "https://raw.githubusercontent.com/MuRongPIG/Proxy-Master/main/socks5.txt"
-        async with AiohttpSession().generate(close_connector=True) as session:
-            async with session.get(url) as resp:
-                proxies = await resp.text()
-                return [f"socks5://{p.strip()}" for p in proxies.splitlines()]
+    http_url = "https://raw.githubusercontent.com/MuRongPIG/Proxy-Master/main/http.txt"
+    socks4_url = "https://raw.githubusercontent.com/MuRongPIG/Proxy-Master/main/socks4.txt"
+    socks5_url = "https://raw.githubusercontent.com/MuRongPIG/Proxy-Master/main/socks5.txt"
 
 
-class FreeProxies(BaseProxyProvider):
+class FreeProxies(TextProxyListProvider):
     """
     Github - https://github.com/Anonym0usWork1221/Free-Proxies
     """
 
-    async def list_http_proxy(self) -> list[str]:
-        url = "https://raw.githubusercontent.com/Anonym0usWork1221/Free-Proxies/main/proxy_files/http_proxies.txt"
-        async with AiohttpSession().generate(close_connector=True) as session:
-            async with session.get(url) as resp:
-                proxies = await resp.text()
-                return [f"http://{p.strip()}" for p in proxies.splitlines()]
-
-    async def list_socks4_proxy(self) -> list[str]:
-        url = "https://raw.githubusercontent.com/Anonym0usWork1221/Free-Proxies/main/proxy_files/socks4_proxies.txt"
-        async with AiohttpSession().generate(close_connector=True) as session:
-            async with session.get(url) as resp:
-                proxies = await resp.text()
-                return [f"socks4://{p.strip()}" for p in proxies.splitlines()]
-
-    async def list_socks5_proxy(self) -> list[str]:
-        url = "https://raw.githubusercontent.com/Anonym0usWork1221/Free-Proxies/main/proxy_files/socks5_proxies.txt"
-        async with AiohttpSession().generate(close_connector=True) as session:
-            async with session.get(url) as resp:
-                proxies = await resp.text()
-                return [f"socks5://{p.strip()}" for p in proxies.splitlines()]
+    http_url = "https://raw.githubusercontent.com/Anonym0usWork1221/Free-Proxies/main/proxy_files/http_proxies.txt"
+    socks4_url = "https://raw.githubusercontent.com/Anonym0usWork1221/Free-Proxies/main/proxy_files/socks4_proxies.txt"
+    socks5_url = "https://raw.githubusercontent.com/Anonym0usWork1221/Free-Proxies/main/proxy_files/socks5_proxies.txt"
 
 
-class FreeProxiesList(BaseProxyProvider):
+class FreeProxiesList(TextProxyListProvider):
     """
     GitHub - https://raw.githubusercontent.com/Zaeem20/FREE_PROXIES_LIST/master/http.txt
     """
 
-    async def list_http_proxy(self) -> list[str]:
-        url = "https://raw.githubusercontent.com/Zaeem20/FREE_PROXIES_LIST/master/http.txt"
-        async with AiohttpSession().generate(close_connector=True) as session:
-            async with session.get(url) as resp:
-                proxies = await resp.text()
-                return [f"http://{p.strip()}" for p in proxies.splitlines()]
-
-    async def list_socks4_proxy(self) -> list[str]:
-        url = "https://raw.githubusercontent.com/Zaeem20/FREE_PROXIES_LIST/master/socks4.txt"
-        async with AiohttpSession().generate(close_connector=True) as session:
-            async with session.get(url) as resp:
-                proxies = await resp.text()
-                return [f"socks4://{p.strip()}" for p in proxies.splitlines()]
-
-    async def list_socks5_proxy(self) -> list[str]:
-        url = "https://raw.githubusercontent.com/Zaeem20/FREE_PROXIES_LIST/master/socks5.txt"
-        async with AiohttpSession().generate(close_connector=True) as session:
-            async with session.get(url) as resp:
-                proxies = await resp.text()
-                return [f"socks5://{p.strip()}" for p in proxies.splitlines()]
+    http_url = "https://raw.githubusercontent.com/Zaeem20/FREE_PROXIES_LIST/master/http.txt"
+    socks4_url = "https://raw.githubusercontent.com/Zaeem20/FREE_PROXIES_LIST/master/socks4.txt"
+    socks5_url = "https://raw.githubusercontent.com/Zaeem20/FREE_PROXIES_LIST/master/socks5.txt"
 
 
 class GeoNode(BaseProxyProvider):
@@ -127,58 +78,28 @@ class GeoNode(BaseProxyProvider):
                 ]
 
 
-class ImRavzanProxyList(BaseProxyProvider):
+class ImRavzanProxyList(TextProxyListProvider):
     """
     https://raw.githubusercontent.com/im-razvan/proxy_list/main/http.txt
     """
 
-    async def list_http_proxy(self):
-        url = "https://raw.githubusercontent.com/im-razvan/proxy_list/main/http.txt"
-        async with AiohttpSession().generate(close_connector=True) as session:
-            async with session.get(url) as resp:
-                proxies = await resp.text()
-                return [f"http://{p.strip()}" for p in proxies.splitlines()]
-
-    async def list_socks4_proxy(self) -> list:
-        return []
+    http_url = "https://raw.githubusercontent.com/im-razvan/proxy_list/main/http.txt"
+    socks5_url = "https://raw.githubusercontent.com/im-razvan/proxy_list/main/socks5.txt"
 
-    async def list_socks5_proxy(self) -> list[str]:
-        url = "https://raw.githubusercontent.com/im-razvan/proxy_list/main/socks5.txt"
-        async with AiohttpSession().generate(close_connector=True) as session:
-            async with session.get(url) as resp:
-                proxies = await resp.text()
-                return [f"socks5://{p.strip()}" for p in proxies.splitlines()]
 
-
-class LionKingsProxy(BaseProxyProvider):
+class LionKingsProxy(TextProxyListProvider):
     """
     https://raw.githubusercontent.com/saisuiu/Lionkings-Http-Proxys-Proxies/main/free.txt
     """
 
-    async def list_http_proxy(self):
-        url = "https://raw.githubusercontent.com/saisuiu/Lionkings-Http-Proxys-Proxies/main/free.txt"
-        async with AiohttpSession().generate(close_connector=True) as session:
-            async with session.get(url) as resp:
-                proxies = await resp.text()
-                return [
-                    f"http://{p.strip()}"
-                    for p in proxies.splitlines()
-                    if is_host_port(p.strip())
-                ]
+    http_url = "https://raw.githubusercontent.com/saisuiu/Lionkings-Http-Proxys-Proxies/main/free.txt"
+    validate_lines = True
 
 
-class TheSpeedX(BaseProxyProvider):
+class TheSpeedX(TextProxyListProvider):
     """
     https://raw.githubusercontent.com/TheSpeedX/SOCKS-List/master/http.txt
     """
 
-    async def list_http_proxy(self):
-        url = "https://raw.githubusercontent.com/TheSpeedX/SOCKS-List/master/http.txt"
-        async with AiohttpSession().generate(close_connector=True) as session:
-            async with session.get(url) as resp:
-                proxies = await resp.text()
-                return [
-                    f"http://{p.strip()}"
-                    for p in proxies.splitlines()
-                    if is_host_port(p.strip())
-                ]
+    http_url = "https://raw.githubusercontent.com/TheSpeedX/SOCKS-List/master/http.txt"
+    validate_lines = True
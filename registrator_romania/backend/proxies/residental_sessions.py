@@ -0,0 +1,158 @@
+"""Sticky sessions of residental proxy provider."""
+
+import secrets
+from urllib.parse import quote, unquote, urlsplit
+
+
+# Residental providers keep same exit IP for requests with same session id
+# in credentials. Template describe credentials `username:password` with
+# session id, `{username}` and `{password}` are credentials from proxy url.
+SESSION_TEMPLATES = {
+    "brightdata": "{username}-session-{session}:{password}",
+    "oxylabs": "{username}-sessid-{session}:{password}",
+    "smartproxy": "{username}-session-{session}:{password}",
+    "iproyal": "{username}:{password}_session-{session}",
+}
+
+
+class ExitSession:
+    __slots__ = (
+        "session",
+        "users",
+        "requests",
+        "failures",
+        "rejections",
+        "total_latency",
+        "measured",
+        "rotations",
+    )
+
+    def __init__(self) -> None:
+        self.session = secrets.token_hex(4)
+        self.users = 0
+        self.requests = 0
+        self.failures = 0
+        self.rejections = 0
+        self.total_latency = 0.0
+        self.measured = 0
+        self.rotations = 0
+
+    @property
+    def avg_latency(self) -> float | None:
+        r"""Average latency of current exit IP."""
+        if not self.measured:
+            return None
+        return self.total_latency / self.measured
+
+    def rotate(self):
+        self.session = secrets.token_hex(4)
+        self.failures = 0
+        # Latency of old exit IP says nothing about new one
+        self.total_latency = 0.0
+        self.measured = 0
+        self.rotations += 1
+
+
+class ResidentalSessionsManager:
+    r"""
+    Generate sticky credentials of residental proxy for each user. Users
+    spread across `sessions` exit IPs, session rotated after
+    `max_failures` failures in a row, so one banned IP don't hit everyone.
+    New user get least loaded session, from equal ones - with lowest
+    latency (session without measures is tried first).
+    """
+
+    def __init__(
+        self,
+        proxy_url: str,
+        sessions: int = 10,
+        template: str = "brightdata",
+        max_failures: int = 3,
+    ) -> None:
+        if not sessions or sessions < 1:
+            raise ValueError(
+                f"Count of sessions should be positive - {sessions}"
+            )
+
+        self._template = SESSION_TEMPLATES.get(template, template)
+        if "{session}" not in self._template:
+            raise ValueError(f"Template without {{session}}: {template}")
+
+        url = urlsplit(proxy_url)
+        self._scheme = url.scheme
+        # Host and port as is, with brackets of IPv6 address
+        self._netloc = url.netloc.rpartition("@")[2]
+        self._username = unquote(url.username or "")
+        self._password = unquote(url.password or "")
+        self._max_failures = max_failures
+        self._exits = [ExitSession() for _ in range(sessions)]
+        self._users: dict[str, int] = {}
+
+    def _url(self, exit: ExitSession) -> str:
+        credentials = self._template.format(
+            username=self._username,
+            password=self._password,
+            session=exit.session,
+        )
+        username, _, password = credentials.partition(":")
+        return (
+            f"{self._scheme}://{quote(username, safe='-_.~')}:"
+            f"{quote(password, safe='-_.~')}@{self._netloc}"
+        )
+
+    def _get_exit(self, user_key: str) -> ExitSession:
+        i = self._users.get(user_key)
+        if i is None:
+            i = min(range(len(self._exits)), key=self._exit_order)
+            self._users[user_key] = i
+            self._exits[i].users += 1
+        return self._exits[i]
+
+    def _exit_order(self, i: int) -> tuple[int, float]:
+        exit = self._exits[i]
+        return exit.users, exit.avg_latency or 0.0
+
+    def get_proxy(self, user_key: str) -> str:
+        r"""Return proxy url with sticky session of user."""
+        return self._url(self._get_exit(user_key))
+
+    def report(
+        self,
+        user_key: str,
+        latency: float = None,
+        ok: bool = True,
+        rejected: bool = False,
+    ):
+        r"""
+        Report result of request through session of user. Failed requests
+        (network errors) rotate session after `max_failures` in a row,
+        rejected requests (site blocked exit IP) rotate it immediately.
+        """
+        exit = self._get_exit(user_key)
+        exit.requests += 1
+        if latency is not None:
+            exit.total_latency += latency
+            exit.measured += 1
+
+        if rejected:
+            exit.rejections += 1
+            exit.rotate()
+        elif not ok:
+            exit.failures += 1
+            if exit.failures >= self._max_failures:
+                exit.rotate()
+        else:
+            exit.failures = 0
+
+    def stats(self) -> list[dict]:
+        return [
+            {
+                "session": exit.session,
+                "users": exit.users,
+                "requests": exit.requests,
+                "rejections": exit.rejections,
+                "rotations": exit.rotations,
+                "avg_latency": exit.avg_latency,
+            }
+            for exit in self._exits
+        ]
@@ -0,0 +1,250 @@
+"""
+Append-only journal of outcomes of registrations and reports built from it.
+"""
+
+import asyncio
+import base64
+from datetime import datetime
+import glob
+import json
+import os
+from pathlib import Path
+import socket
+import time
+from typing import Literal
+import zlib
+
+from loguru import logger
+from pandas import DataFrame
+
+from registrator_romania.backend.users_sources import user_key
+
+
+Outcome = Literal["success", "already_registered", "error"]
+
+# Outcomes what mean that user has registration on site
+REGISTERED_OUTCOMES = ("success", "already_registered")
+
+
+def registrations_dirname(registration_date: datetime) -> str:
+    return f"registrations_{registration_date.strftime("%d.%m.%Y")}"
+
+
+def journal_path(registration_date: datetime) -> str:
+    r"""Path of journal of current process, containers share directory."""
+    fn = f"results-{socket.gethostname()}-{os.getpid()}.jsonl"
+    return str(Path(registrations_dirname(registration_date), fn))
+
+
+def compress_html(html: str) -> str:
+    return base64.b64encode(zlib.compress(html.encode("utf-8"), 6)).decode()
+
+
+def decompress_html(blob: str) -> str:
+    return zlib.decompress(base64.b64decode(blob)).decode("utf-8")
+
+
+class ResultsJournal:
+    r"""
+    Journal of outcomes, one JSON per line. `record` only put outcome into
+    queue, background task writes batches (up to `batch_size` records or
+    each `flush_interval` seconds) in thread and calls `fsync` after each
+    batch, so registered users are not lost if process killed. HTML of
+    page compressed by zlib.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        flush_interval: float = 0.5,
+        batch_size: int = 100,
+    ) -> None:
+        self._path = Path(path)
+        self._flush_interval = flush_interval
+        self._batch_size = batch_size
+        # None in queue stops writer
+        self._queue: asyncio.Queue[dict | None] = asyncio.Queue()
+        self._task: asyncio.Task = None
+        self._file = None
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def record(
+        self,
+        outcome: Outcome,
+        user_data: dict,
+        registration_date: datetime,
+        tip_formular: int,
+        html: str = None,
+        error: str = None,
+    ):
+        entry = {
+            "t": round(time.time(), 3),
+            "outcome": outcome,
+            "date": registration_date.strftime("%Y-%m-%d"),
+            "tip_formular": int(tip_formular),
+            "user": user_data,
+        }
+        if error:
+            entry["error"] = error
+        if html:
+            # Compressed by writer, not in loop of registrations
+            entry["html"] = html
+        self._queue.put_nowait(entry)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._write_loop())
+
+    async def stop(self):
+        r"""Write rest of records and close file."""
+        if self._task:
+            # Writer stops after records put before
+            self._queue.put_nowait(None)
+            await self._task
+            self._task = None
+        else:
+            entries = []
+            while not self._queue.empty():
+                entries.append(self._queue.get_nowait())
+            if entries:
+                await asyncio.to_thread(self._write_batch, entries)
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, type, value, traceback):
+        await self.stop()
+
+    def _write_batch(self, entries: list[dict]):
+        lines = []
+        for entry in entries:
+            if "html" in entry:
+                entry = {**entry, "html": compress_html(entry["html"])}
+            line = json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+            lines.append(line + "\n")
+
+        if self._file is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self._path, "a", encoding="utf-8")
+        self._file.write("".join(lines))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    async def _write_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            entries = [await self._queue.get()]
+            try:
+                async with asyncio.timeout_at(
+                    loop.time() + self._flush_interval
+                ):
+                    while (
+                        len(entries) < self._batch_size
+                        and entries[-1] is not None
+                    ):
+                        entries.append(await self._queue.get())
+            except TimeoutError:
+                pass
+
+            stop = entries[-1] is None
+            entries = [entry for entry in entries if entry is not None]
+            try:
+                if entries:
+                    await asyncio.to_thread(self._write_batch, entries)
+            except OSError as e:
+                logger.exception(e)
+                if not stop:
+                    # Records are returned, next batch tries again
+                    for entry in entries:
+                        self._queue.put_nowait(entry)
+                    await asyncio.sleep(self._flush_interval)
+            if stop:
+                return
+
+
+def read_journals(paths: list[str]) -> list[dict]:
+    r"""Return records of journals, cut last line of killed process skipped."""
+    records = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    records.sort(key=lambda r: r["t"])
+    return records
+
+
+def registered_users(
+    records: list[dict],
+) -> dict[tuple[str, int], list[dict]]:
+    r"""
+    Return registered users (first record of each user) by date
+    (YYYY-MM-DD) and type of form.
+    """
+    result: dict[tuple[str, int], list[dict]] = {}
+    seen = set()
+    for record in records:
+        if record["outcome"] not in REGISTERED_OUTCOMES:
+            continue
+        key = user_key(record["user"])
+        if key in seen:
+            continue
+        seen.add(key)
+        target = (record["date"], record["tip_formular"])
+        result.setdefault(target, []).append(record)
+    return result
+
+
+def export_reports(paths: list[str] = None, root: str = ".") -> list[str]:
+    r"""
+    Write CSV, XLSX and HTML pages of registered users into directories of
+    dates. If date has one type of form file is `successfully-registered`,
+    otherwise `successfully-registered-<tip_formular>`. Without `paths`
+    journals of all processes found in `root`. Return written reports.
+    """
+    if paths is None:
+        pattern = str(Path(root, "registrations_*", "results-*.jsonl"))
+        paths = glob.glob(pattern)
+
+    by_target = registered_users(read_journals(paths))
+    tips_of_date: dict[str, set[int]] = {}
+    for dt, tip in by_target:
+        tips_of_date.setdefault(dt, set()).add(tip)
+
+    written = []
+    for (dt, tip), records in by_target.items():
+        registration_date = datetime.strptime(dt, "%Y-%m-%d")
+        dirpath = Path(root, registrations_dirname(registration_date))
+        dirpath.mkdir(parents=True, exist_ok=True)
+        name = "successfully-registered"
+        if len(tips_of_date[dt]) > 1:
+            name += f"-{tip}"
+
+        df = DataFrame([r["user"] for r in records])
+        df.to_csv(str(dirpath / f"{name}.csv"), index=False)
+        df.to_excel(str(dirpath / f"{name}.xlsx"), index=False)
+        written.extend(
+            [str(dirpath / f"{name}.csv"), str(dirpath / f"{name}.xlsx")]
+        )
+
+        for record in records:
+            if "html" not in record:
+                continue
+            user = record["user"]
+            fn = (
+                f"success-{user['Prenume Pasaport']}_"
+                f"{user['Nume Pasaport']}.html"
+            )
+            (dirpath / fn).write_text(
+                decompress_html(record["html"]), encoding="utf-8"
+            )
+    return written
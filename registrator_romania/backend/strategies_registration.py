@@ -1,38 +1,53 @@
 import asyncio
 from datetime import datetime, timedelta
 import functools
+import math
 import os
 import ssl
-from pathlib import Path
 import platform
 import random
 import sys
+import time
 from typing import Literal
-from zoneinfo import ZoneInfo
-import aiofiles
 from loguru import logger
-from pandas import DataFrame
 
 from registrator_romania.backend.api.api_romania import APIRomania
+from registrator_romania.backend.api.availability import AvailabilityScanner
+from registrator_romania.backend.api.captcha import CaptchaTokenPool
+from registrator_romania.backend.api.verification import (
+    RegistrationsVerifier,
+)
+from registrator_romania.backend.clock import ServerClock
 from registrator_romania.backend.database.api import (
     UsersService,
     get_async_engine,
 )
 from registrator_romania.backend.database.sqlalchemy_models import Base
+from registrator_romania.backend.net import metrics
 from registrator_romania.backend.net.aiohttp_ext import AiohttpSession
+from registrator_romania.backend.net.tracing import get_tracer
 from registrator_romania.backend.proxies.autopool import AutomaticProxyPool
+from registrator_romania.backend.proxies.residental_sessions import (
+    ResidentalSessionsManager,
+)
+from registrator_romania.backend.results import (
+    ResultsJournal,
+    export_reports,
+    journal_path,
+)
 
 from registrator_romania.backend.proxies.providers.server_proxies import *
 from registrator_romania.backend.proxies.providers.residental_proxies import *
 
+from registrator_romania.backend.users_sources import user_key
+from registrator_romania.frontend.telegram_bot.alerting import (
+    AlertDispatcher,
+)
 from registrator_romania.backend.utils import (
     divide_list,
     filter_by_log_level,
     generate_fake_users_data,
 )
-from registrator_romania.frontend.telegram_bot.alerting import (
-    send_msg_into_chat,
-)
 from registrator_romania.backend.net import AIOHTTP_NET_ERRORS
 
 # ssl._create_default_https_context = ssl._create_unverified_context
@@ -50,11 +65,30 @@ class StrategyWithoutProxy:
         use_shuffle: bool = True,
         logging: bool = True,
         residental_proxy_url: str = None,
+        residental_sessions: int = 0,
+        residental_session_template: str = "brightdata",
+        verification_interval: float = 30,
+        api: APIRomania = None,
+        users_service: UsersService = None,
+        journal: ResultsJournal = None,
+        alerts: AlertDispatcher = None,
+        clock: ServerClock = None,
+        open_time: datetime = None,
+        captcha_pool_size: int = 10,
     ) -> None:
         if not stop_when:
             stop_when = [9, 2]
-        self._api = APIRomania(debug=debug)
-        self._db = UsersService()
+        self._api = api or APIRomania(debug=debug)
+        self._db = users_service or UsersService()
+        self._journal = journal or ResultsJournal(
+            journal_path(registration_date)
+        )
+        self._alerts = alerts
+        self._clock = clock or ServerClock(self._api)
+        self._open_time = open_time
+        self._captcha_pool = CaptchaTokenPool(
+            self._api, size=captcha_pool_size
+        )
         self._users_data = users_data or []
         self._registration_date = registration_date
         self._tip_formular = int(tip_formular)
@@ -64,8 +98,46 @@ class StrategyWithoutProxy:
         self._use_shuffle = use_shuffle
         self._logging = logging
         self._residental_proxy_url = residental_proxy_url
+        self._residental_sessions = None
+        if residental_proxy_url and residental_sessions:
+            self._residental_sessions = ResidentalSessionsManager(
+                residental_proxy_url,
+                sessions=int(residental_sessions),
+                template=residental_session_template,
+            )
+        self._verification_interval = verification_interval
+        self._verifier = RegistrationsVerifier(
+            self._api,
+            tip_formular=self._tip_formular,
+            data_programarii=[
+                registration_date - timedelta(days=3),
+                registration_date,
+            ],
+        )
 
     async def start(self):
+        # Tokens are fetched while users prepared and opening awaited
+        self._captcha_pool.start()
+        try:
+            await self._prepare()
+            self._journal.start()
+            await self.start_registration()
+        finally:
+            for task in (
+                getattr(self, "update_users_data_task", None),
+                getattr(self, "verification_task", None),
+            ):
+                if task:
+                    task.cancel()
+            await self._captcha_pool.stop()
+            await self.save_results()
+
+    async def _prepare(self):
+        r"""
+        Filter out users registered on site, add users into database and
+        start sync of users list (other containers change it) and watch of
+        registrations. Wait until there are users to registrate.
+        """
         if self._users_data:
             logger.debug("get unregister users")
             try:
@@ -86,35 +158,144 @@ class StrategyWithoutProxy:
             except asyncio.TimeoutError:
                 pass
 
-
         self.update_users_data_task = asyncio.create_task(
             self.update_users_list()
         )
+        self.verification_task = asyncio.create_task(
+            self._verifier.watch(self._verification_interval)
+        )
         while not self._users_data:
             logger.debug("wait for strategy add users from database")
             await asyncio.sleep(1)
-        await self.start_registration()
+
+    async def save_results(self):
+        r"""
+        Write rest of journal and reports (CSV, XLSX, HTML pages) of users
+        registered by all processes. Reports written near directory of
+        journal (working directory for default journal).
+        """
+        await self._journal.stop()
+        root = str(self._journal.path.parent.parent)
+        try:
+            await asyncio.to_thread(export_reports, root=root)
+        except Exception as e:
+            logger.exception(e)
 
     def _get_dt_now(self) -> datetime:
-        return datetime.now().astimezone(tz=ZoneInfo("Europe/Moscow"))
+        # Local time until clock of site synced
+        return self._clock.now()
+
+    async def _wait_opening(self) -> bool:
+        r"""
+        Sleep until opening of registrations (`open_time` by clock of site)
+        minus one-way latency. Return True if first wave should be sent
+        right now, without check of places. While waiting pool of captcha
+        gets token for each user, so first wave doesn't wait for google.
+        """
+        if not self._open_time:
+            return False
+        if self._clock.estimate is None:
+            await self._clock.sync()
+        if self._open_time.timestamp() <= self._clock.time():
+            # Registrations already opened
+            return False
+        pool = self._captcha_pool
+        pool.size = max(pool.size, len(self._users_data))
+        await self._clock.sleep_until(self._open_time)
+        logger.info(f"{len(pool)} tokens of captcha ready for first wave")
+        return True
+
+    def _target_of(self, user_data: dict) -> tuple[datetime, int]:
+        r"""Return date and type of form of registration of user."""
+        return self._registration_date, self._tip_formular
+
+    def _registration_dates(self) -> list[datetime]:
+        r"""Dates what users are stored in database for."""
+        return [self._registration_date]
+
+    def _get_user_proxy(self, user_data: dict) -> str | None:
+        r"""
+        Return residental proxy for user. If sticky sessions enabled, each
+        user has own session (exit IP), otherwise all users share one url.
+        """
+        if not self._residental_sessions:
+            return self._residental_proxy_url
+        return self._residental_sessions.get_proxy(
+            user_data["Serie și număr Pașaport"]
+        )
+
+    def _report_user_proxy(self, user_data: dict, html, latency: float):
+        # Html, error of network or None if unexpected error happened
+        if not self._residental_sessions or html is None:
+            return
+
+        ok = isinstance(html, str)
+        self._residental_sessions.report(
+            user_data["Serie și număr Pașaport"],
+            latency=latency,
+            ok=ok,
+            rejected=ok and self._api.is_forbidden_page(html),
+        )
+
+    async def _make_registration(
+        self,
+        user_data: dict,
+        registration_date: datetime = None,
+        tip_formular: int = None,
+        g_recaptcha_response: str = None,
+    ):
+        tracer = get_tracer()
+        metrics.ATTEMPTS.inc()
+        if not g_recaptcha_response:
+            # Prefetched token, or fetched without proxy if pool is empty,
+            # it is not part of latency of proxy
+            with tracer.span("captcha"):
+                g_recaptcha_response = await self._captcha_pool.get()
+            if not g_recaptcha_response:
+                metrics.ERRORS.inc("no_response")
+                return
+
+        with tracer.span("proxy"):
+            proxy = self._get_user_proxy(user_data)
+        start = time.perf_counter()
+        try:
+            with tracer.span("attempt"):
+                html = await self._api.make_registration(
+                    user_data=user_data,
+                    registration_date=(
+                        registration_date or self._registration_date
+                    ),
+                    tip_formular=tip_formular or self._tip_formular,
+                    proxy=proxy,
+                    g_recaptcha_response=g_recaptcha_response,
+                )
+        except Exception as e:
+            # Timeout of request is usual symptom of dead exit IP
+            metrics.ERRORS.inc(e.__class__.__name__)
+            self._report_user_proxy(
+                user_data, e, latency=time.perf_counter() - start
+            )
+            raise
+
+        if html is None:
+            # Unexpected error
+            metrics.ERRORS.inc("no_response")
+        elif isinstance(html, BaseException):
+            metrics.ERRORS.inc(html.__class__.__name__)
+        self._report_user_proxy(
+            user_data, html, latency=time.perf_counter() - start
+        )
+        return html
 
     async def async_registrations(
         self, users_data: list[dict], queue: asyncio.Queue
     ):
-        api = self._api
-        reg_dt = self._registration_date
-        proxy = self._residental_proxy_url
-
         async def registrate(user_data: dict):
-            html = await api.make_registration(
-                user_data=user_data,
-                registration_date=reg_dt,
-                tip_formular=self._tip_formular,
-                proxy=proxy,
-            )
-            await self.post_registrate(
-                user_data=user_data, html=html, queue=queue
-            )
+            with get_tracer().attempt(user_data["Serie și număr Pașaport"]):
+                html = await self._make_registration(user_data)
+                await self.post_registrate(
+                    user_data=user_data, html=html, queue=queue
+                )
 
         tasks = [registrate(user_data) for user_data in users_data]
         for chunk in divide_list(tasks, divides=self._async_requests_num):
@@ -127,6 +308,12 @@ class StrategyWithoutProxy:
 
     async def post_registrate(
         self, user_data: dict, html: str, queue: asyncio.Queue
+    ):
+        with get_tracer().span("post_registrate"):
+            await self._post_registrate(user_data, html, queue)
+
+    async def _post_registrate(
+        self, user_data: dict, html: str, queue: asyncio.Queue
     ):
         first_name = user_data["Prenume Pasaport"]
         last_name = user_data["Nume Pasaport"]
@@ -136,6 +323,10 @@ class StrategyWithoutProxy:
             return
 
         if api.is_success_registration(html):
+            metrics.SUCCESSES.inc()
+            self._journal.record(
+                "success", user_data, *self._target_of(user_data), html=html
+            )
             try:
                 async with asyncio.timeout(5):
                     async with self._db as db:
@@ -148,6 +339,8 @@ class StrategyWithoutProxy:
             msg = f"successfully registrate {first_name} {last_name}"
             if self._logging:
                 logger.success(msg)
+            if self._alerts:
+                self._alerts.success(f"{first_name} {last_name}")
             await queue.put((user_data.copy(), html))
 
         else:
@@ -156,7 +349,21 @@ class StrategyWithoutProxy:
             if not isinstance(error, str):
                 return
 
+            if api.is_forbidden_page(html):
+                metrics.ERRORS.inc("forbidden")
+            elif error.count("Deja a fost înregistrată o programare"):
+                metrics.ALREADY_REGISTERED.inc()
+            else:
+                metrics.ERRORS.inc("site")
+
             if error.count("Deja a fost înregistrată o programare"):
+                self._journal.record(
+                    "already_registered",
+                    user_data,
+                    *self._target_of(user_data),
+                    html=html,
+                    error=error,
+                )
                 await queue.put((user_data.copy(), html))
                 try:
                     async with asyncio.timeout(5):
@@ -166,6 +373,13 @@ class StrategyWithoutProxy:
                     pass
                 except Exception as e:
                     logger.exception(e)
+            else:
+                self._journal.record(
+                    "error",
+                    user_data,
+                    *self._target_of(user_data),
+                    error=error,
+                )
 
             msg = f"{first_name} {last_name} - {error}"
             if self._logging:
@@ -174,19 +388,13 @@ class StrategyWithoutProxy:
     async def sync_registrations(
         self, users_data: list[dict], queue: asyncio.Queue
     ):
-        api = self._api
-        reg_dt = self._registration_date
-        proxy = self._residental_proxy_url
-
         for user_data in users_data:
             try:
-                html = await api.make_registration(
-                    user_data,
-                    registration_date=reg_dt,
-                    tip_formular=self._tip_formular,
-                    proxy=proxy,
-                )
-                await self.post_registrate(user_data, html, queue)
+                with get_tracer().attempt(
+                    user_data["Serie și număr Pașaport"]
+                ):
+                    html = await self._make_registration(user_data)
+                    await self.post_registrate(user_data, html, queue)
             except AIOHTTP_NET_ERRORS:
                 pass
             except Exception as e:
@@ -198,34 +406,45 @@ class StrategyWithoutProxy:
         reg_dt = self._registration_date
         successfully_registered = []
         queue = asyncio.Queue()
-        users_for_registrate = []
-
-        now = self._get_dt_now()
-        dirname = f"registrations_{reg_dt.strftime("%d.%m.%Y")}"
+        # Not empty, so loop don't stop if places are not opened yet
+        users_for_registrate = self._users_data.copy()
 
+        first_wave = await self._wait_opening()
         while True:
             now = self._get_dt_now()
-            await asyncio.sleep(1.5)
+            if not first_wave:
+                await asyncio.sleep(1.5)
 
             try:
-                try:
-                    async with asyncio.timeout(5):
-                        places = await api.get_free_places_for_date(
-                            tip_formular=self._tip_formular,
-                            month=reg_dt.month,
-                            day=reg_dt.day,
-                            year=reg_dt.year,
-                        )
-                        if not places:
-                            logger.debug(f"{places} places")
-                            continue
-                except asyncio.TimeoutError:
-                    pass
+                if first_wave:
+                    # Places are not shown before opening
+                    first_wave = False
+                else:
+                    try:
+                        async with asyncio.timeout(5):
+                            places = await api.get_free_places_for_date(
+                                tip_formular=self._tip_formular,
+                                month=reg_dt.month,
+                                day=reg_dt.day,
+                                year=reg_dt.year,
+                            )
+                            if isinstance(places, int):
+                                metrics.PLACES_REMAINING.set(
+                                    places,
+                                    reg_dt.strftime("%Y-%m-%d"),
+                                    self._tip_formular,
+                                )
+                            if not places:
+                                logger.debug(f"{places} places")
+                                continue
+                    except asyncio.TimeoutError:
+                        pass
 
                 users_for_registrate = [
                     u
                     for u in self._users_data.copy()
                     if u not in successfully_registered
+                    and not self._verifier.is_registered(u)
                 ]
                 if self._use_shuffle:
                     random.shuffle(users_for_registrate)
@@ -242,25 +461,16 @@ class StrategyWithoutProxy:
                     )
 
                 while not queue.empty():
-                    user_data, html = await queue.get()
+                    # Outcome already written into journal
+                    user_data, _ = await queue.get()
                     successfully_registered.append(user_data)
 
-                    first_name, last_name = (
-                        user_data["Prenume Pasaport"],
-                        user_data["Nume Pasaport"],
-                    )
-
-                    fn = f"success-{first_name}_{last_name}.html"
-                    path = Path().joinpath(dirname, fn)
-                    Path(dirname).mkdir(exist_ok=True)
-
-                    async with aiofiles.open(str(path), "w") as f:
-                        await f.write(html)
-
             except asyncio.TimeoutError:
                 pass
             except Exception as e:
                 logger.exception(e)
+                if self._alerts:
+                    self._alerts.alert(f"{e.__class__.__name__}: {e}")
             finally:
                 if (
                     len(successfully_registered) >= len(self._users_data.copy())
@@ -274,79 +484,261 @@ class StrategyWithoutProxy:
                 ):
                     break
 
-        try:
-            fn = f"successfully-registered.csv"
-            path = Path().joinpath(dirname, fn)
-
-            df = DataFrame(successfully_registered)
-            df.to_csv(str(path), index=False)
-        except Exception as e:
-            logger.exception(e)
-
     async def update_users_list(self):
         while True:
             try:
+                users_data = {}
                 async with self._db as db:
-                    self._users_data = await db.get_users_by_reg_date(
-                        self._registration_date
-                    )
+                    for registration_date in self._registration_dates():
+                        users = await db.get_users_by_reg_date(
+                            registration_date
+                        )
+                        for user in users:
+                            users_data.setdefault(user_key(user), user)
+                self._users_data = list(users_data.values())
             except asyncio.TimeoutError:
                 pass
             except Exception as e:
                 logger.exception(e)
             await asyncio.sleep(3)
 
-    async def get_unregisterer_users(
-        self, days: int = 3
-    ) -> list[dict[str, str] | None]:
-        api = self._api
+    async def get_unregisterer_users(self) -> list[dict[str, str]]:
+        r"""
+        Return users what not found in registrations of site. If some page
+        of registrations not received, all users returned.
+        """
         users_data = self._users_data.copy()
-        start_date = self._registration_date - timedelta(days=days)
-        stop_date = self._registration_date
-
-        try:
-            response = await api.see_registrations(
-                tip_formular=str(self._tip_formular),
-                data_programarii=[
-                    start_date,
-                    stop_date,
-                ],
-            )
-            if not response:
-                return users_data
-        except AIOHTTP_NET_ERRORS:
+        if not await self._verifier.refresh():
             return users_data
-
-        registered_users = response["data"]
-        registered_names = [
-            (obj["nume_pasaport"].lower(), obj["prenume_pasaport"].lower())
-            for obj in registered_users
-        ]
-
-        unregistered_users = []
-        for user in users_data:
-            names = (
-                user["Nume Pasaport"].lower(),
-                user["Prenume Pasaport"].lower(),
-            )
-            if names not in registered_names:
-                unregistered_users.append(user)
-
-        return unregistered_users
+        return self._verifier.filter_unregistered(users_data)
 
     async def add_users_to_db(self):
         try:
             async with self._db as db:
-                for user_data in self._users_data:
-                    await db.add_user(
-                        user_data, registration_date=self._registration_date
-                    )
+                for registration_date in self._registration_dates():
+                    for user_data in self._users_data:
+                        await db.add_user(
+                            user_data, registration_date=registration_date
+                        )
         except asyncio.TimeoutError:
             pass
         except Exception as e:
             logger.exception(e)
 
 
+class MultiTargetStrategy(StrategyWithoutProxy):
+    r"""
+    Registrate users on several targets `(registration_date, tip_formular)`
+    in one event loop. Each round free places of all targets fetched
+    concurrently and users assigned to targets with places. Targets share
+    sessions of api, pool of captcha tokens and proxies.
+    """
+
+    def __init__(
+        self,
+        targets: list[tuple[datetime, int]],
+        debug: bool = False,
+        users_data: list[dict] = None,
+        stop_when: tuple[int, int] = None,
+        mode: Literal["async", "sync"] = "async",
+        async_requests_num: int = 10,
+        use_shuffle: bool = True,
+        logging: bool = True,
+        residental_proxy_url: str = None,
+        residental_sessions: int = 0,
+        residental_session_template: str = "brightdata",
+        captcha_pool_size: int = 10,
+        verification_interval: float = 30,
+        api: APIRomania = None,
+        users_service: UsersService = None,
+        journal: ResultsJournal = None,
+        alerts: AlertDispatcher = None,
+        clock: ServerClock = None,
+        open_time: datetime = None,
+    ) -> None:
+        if not targets:
+            raise ValueError(f"Targets of registration are empty - {targets}")
+
+        targets = [(dt, int(tip)) for dt, tip in targets]
+        super().__init__(
+            registration_date=targets[0][0],
+            tip_formular=targets[0][1],
+            debug=debug,
+            users_data=users_data,
+            stop_when=stop_when,
+            mode=mode,
+            async_requests_num=async_requests_num,
+            use_shuffle=use_shuffle,
+            logging=logging,
+            residental_proxy_url=residental_proxy_url,
+            residental_sessions=residental_sessions,
+            residental_session_template=residental_session_template,
+            verification_interval=verification_interval,
+            api=api,
+            users_service=users_service,
+            journal=journal,
+            alerts=alerts,
+            clock=clock,
+            open_time=open_time,
+            captcha_pool_size=captcha_pool_size,
+        )
+        self._targets = targets
+        # Registrations of all targets checked by one index
+        dates = [dt for dt, _ in targets]
+        self._verifier = RegistrationsVerifier(
+            self._api,
+            data_programarii=[min(dates) - timedelta(days=3), max(dates)],
+        )
+        # Count of places changes fast when registration opened
+        self._scanner = AvailabilityScanner(self._api, places_ttl=1)
+        self._user_targets: dict[tuple, tuple[datetime, int]] = {}
+
+    def _registration_dates(self) -> list[datetime]:
+        return sorted({dt for dt, _ in self._targets})
+
+    async def get_places(self) -> dict[tuple[datetime, int], int]:
+        r"""Return targets with free places and count of places."""
+        results = await asyncio.gather(
+            *[self._scanner.free_places(dt, tip) for dt, tip in self._targets],
+            return_exceptions=True,
+        )
+        for (dt, tip), places in zip(self._targets, results):
+            if isinstance(places, int):
+                metrics.PLACES_REMAINING.set(
+                    places, dt.strftime("%Y-%m-%d"), tip
+                )
+        return {
+            target: places
+            for target, places in zip(self._targets, results)
+            if isinstance(places, int) and places > 0
+        }
+
+    def _target_of(self, user_data: dict) -> tuple[datetime, int]:
+        return self._user_targets.get(user_key(user_data), self._targets[0])
+
+    @staticmethod
+    def assign_users(
+        users_data: list[dict], places: dict[tuple[datetime, int], int]
+    ) -> list[tuple[dict, tuple[datetime, int]]]:
+        r"""
+        Assign users to targets: target with more places first and gets up
+        to count of its places users. Rest users assigned to best target,
+        count of places can be outdated.
+        """
+        if not places:
+            return []
+
+        ranked = sorted(places.items(), key=lambda t: (-t[1], t[0][0]))
+        users = iter(users_data)
+        assignments = []
+        for target, count in ranked:
+            for _, user_data in zip(range(count), users):
+                assignments.append((user_data, target))
+
+        best = ranked[0][0]
+        assignments.extend((user_data, best) for user_data in users)
+        return assignments
+
+    async def _registrate(
+        self, user_data: dict, target: tuple[datetime, int], queue
+    ):
+        registration_date, tip_formular = target
+        self._user_targets[user_key(user_data)] = target
+        with get_tracer().attempt(user_data["Serie și număr Pașaport"]):
+            # Token taken from pool of captcha
+            html = await self._make_registration(
+                user_data,
+                registration_date=registration_date,
+                tip_formular=tip_formular,
+            )
+            await self.post_registrate(
+                user_data=user_data, html=html, queue=queue
+            )
+
+    async def registrate_assignments(
+        self,
+        assignments: list[tuple[dict, tuple[datetime, int]]],
+        queue: asyncio.Queue,
+    ):
+        if self._mode == "sync":
+            for user_data, target in assignments:
+                try:
+                    await self._registrate(user_data, target, queue)
+                except AIOHTTP_NET_ERRORS:
+                    pass
+                except Exception as e:
+                    if self._logging:
+                        logger.exception(e)
+            return
+
+        for chunk in divide_list(assignments, divides=self._async_requests_num):
+            await asyncio.gather(
+                *[self._registrate(u, t, queue) for u, t in chunk],
+                return_exceptions=True,
+            )
+
+    async def start_registration(self):
+        registered_keys = set()
+        queue = asyncio.Queue()
+
+        first_wave = await self._wait_opening()
+        while True:
+            now = self._get_dt_now()
+            if not first_wave:
+                await asyncio.sleep(1.5)
+            users_for_registrate = [
+                u
+                for u in self._users_data.copy()
+                if user_key(u) not in registered_keys
+                and not self._verifier.is_registered(u)
+            ]
+
+            try:
+                if first_wave:
+                    # Places are not shown before opening, users split
+                    # between all targets
+                    first_wave = False
+                    count = len(users_for_registrate) / len(self._targets)
+                    places = dict.fromkeys(self._targets, math.ceil(count))
+                else:
+                    places = await self.get_places()
+                if not places:
+                    logger.debug("no places on targets")
+                    continue
+
+                if self._use_shuffle:
+                    random.shuffle(users_for_registrate)
+                assignments = self.assign_users(users_for_registrate, places)
+                logger.debug(
+                    f"Start registration of {len(assignments)} users on "
+                    f"{len(places)} targets"
+                )
+                await self.registrate_assignments(assignments, queue)
+
+                while not queue.empty():
+                    # Outcome already written into journal
+                    user_data, _ = await queue.get()
+                    registered_keys.add(user_key(user_data))
+
+            except asyncio.TimeoutError:
+                pass
+            except Exception as e:
+                logger.exception(e)
+                if self._alerts:
+                    self._alerts.alert(f"{e.__class__.__name__}: {e}")
+            finally:
+                if not users_for_registrate or all(
+                    user_key(u) in registered_keys for u in self._users_data
+                ):
+                    break
+
+                if (
+                    now.hour == self._stop_when[0]
+                    and now.minute >= self._stop_when[1]
+                ):
+                    break
+
+
 async def prepare_database(reg_dt: datetime, users_data: list[dict]):
     async with UsersService() as service:
         users_from_db = await service.get_users_by_reg_date(
@@ -356,9 +748,8 @@ async def prepare_database(reg_dt: datetime, users_data: list[dict]):
         if all(u in users_from_db for u in users_data):
             return
 
-        for user in users_data:
-            if user not in users_from_db:
-                await service.add_user(user, registration_date=reg_dt)
+        for batch in divide_list(users_data, divides=500):
+            await service.add_users(batch, registration_date=reg_dt)
 
         for user in users_from_db:
             if user not in users_data:
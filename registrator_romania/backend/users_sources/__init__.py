@@ -0,0 +1,24 @@
+from registrator_romania.backend.users_sources import files, google_sheets
+from registrator_romania.backend.users_sources.base import (
+    FileUserSource,
+    UserSource,
+    UsersSync,
+    user_key,
+)
+from registrator_romania.backend.users_sources.files import (
+    CsvUserSource,
+    DocxUserSource,
+    TxtUserSource,
+    XlsxUserSource,
+)
+from registrator_romania.backend.users_sources.google_sheets import (
+    GSpreadUserSource,
+)
+
+
+__all__ = [
+    "UserSource",
+    "FileUserSource",
+    "UsersSync",
+    "user_key",
+] + files.__all__ + google_sheets.__all__
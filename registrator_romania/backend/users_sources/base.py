@@ -0,0 +1,211 @@
+import asyncio
+from datetime import date
+import os
+from typing import AsyncIterator, Callable, Iterable, Iterator
+
+from loguru import logger
+
+from registrator_romania.backend.database.api import UsersService
+from registrator_romania.backend.users_sources.normalization import (
+    BIRTH_DATE_FORMATS,
+    normalize_users_data,
+)
+
+
+USER_KEY_FIELDS = (
+    "Serie și număr Pașaport",
+    "Nume Pasaport",
+    "Prenume Pasaport",
+)
+
+
+def user_key(user: dict) -> tuple:
+    r"""Return canonical key of normalized user: passport and names."""
+    return tuple(user.get(k) for k in USER_KEY_FIELDS)
+
+
+def normalize_batches(
+    rows: Iterable[dict],
+    batch_size: int = 1000,
+    date_formats: list[str] = BIRTH_DATE_FORMATS,
+) -> Iterator[list[dict]]:
+    r"""
+    Normalize raw users by batches of `batch_size` and yield valid users of
+    each batch. Invalid users are logged with number of row in source.
+    """
+    batch = []
+    offset = 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield _normalize_batch(batch, offset, date_formats)
+            offset += len(batch)
+            batch = []
+
+    if batch:
+        yield _normalize_batch(batch, offset, date_formats)
+
+
+def _normalize_batch(
+    batch: list[dict], offset: int, date_formats: list[str]
+) -> list[dict]:
+    objs, report = normalize_users_data(batch, date_formats=date_formats)
+    for i, keys in report["invalid_rows"].items():
+        logger.warning(f"Skip user #{i + offset}, invalid values of {keys}")
+    return objs
+
+
+class UserSource:
+    r"""
+    Source of users. Implementations yield raw users with keys of
+    `USERS_DATA_KEYS`, normalization is same for all sources.
+    """
+
+    # Formats of birth dates, tried in order
+    date_formats: list[str] = BIRTH_DATE_FORMATS
+    batch_size: int = 1000
+
+    async def fingerprint(self) -> str | None:
+        r"""
+        Return value what changes when content of source changes, or None
+        if source can not tell it without reading.
+        """
+        return None
+
+    async def iter_raw_users(self) -> AsyncIterator[dict]:
+        r"""Yield raw users of source, base source has no users."""
+        for row in ():
+            yield row
+
+    async def iter_users(self) -> AsyncIterator[dict]:
+        r"""Yield normalized users of source."""
+        batch = []
+        offset = 0
+        async for row in self.iter_raw_users():
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                for user in _normalize_batch(batch, offset, self.date_formats):
+                    yield user
+                offset += len(batch)
+                batch = []
+
+        if batch:
+            for user in _normalize_batch(batch, offset, self.date_formats):
+                yield user
+
+    async def get_users(self) -> list[dict]:
+        return [user async for user in self.iter_users()]
+
+
+class FileUserSource(UserSource):
+    r"""
+    Source of users in local file. Rows are read synchronously, so file
+    sources can be used without event loop through `read_users`.
+    """
+
+    default_path: str = None
+
+    def __init__(self, path: str = None) -> None:
+        self.path = path or self.default_path
+
+    async def fingerprint(self) -> str | None:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+    def read_raw_users(self) -> Iterator[dict]:
+        r"""Yield raw users of file, base source has no users."""
+        return iter(())
+
+    def read_users(self) -> Iterator[dict]:
+        r"""Yield normalized users of file."""
+        batches = normalize_batches(
+            self.read_raw_users(), self.batch_size, self.date_formats
+        )
+        for batch in batches:
+            yield from batch
+
+    async def iter_raw_users(self) -> AsyncIterator[dict]:
+        for row in self.read_raw_users():
+            yield row
+
+
+class UsersSync:
+    r"""
+    Incremental sync of users from source into database for registration
+    date. First sync compares source with database, next ones compare source
+    with previous snapshot of it, so users removed from database after
+    registration are not inserted again while they are unchanged in source.
+    If fingerprint of source is not changed, sync does nothing.
+    """
+
+    def __init__(self, source: UserSource, registration_date: date) -> None:
+        self._source = source
+        self._registration_date = registration_date
+        self._fingerprint: str | None = None
+        self._users: dict[tuple, dict] | None = None
+
+    async def sync(self, service: UsersService) -> tuple[int, int]:
+        r"""
+        Apply changes of source through opened `service` and return count of
+        inserted and removed users.
+        """
+        fingerprint = await self._source.fingerprint()
+        if fingerprint is not None and fingerprint == self._fingerprint:
+            return 0, 0
+        return await self._apply(service, fingerprint)
+
+    async def watch(
+        self,
+        interval: float = 5,
+        service_factory: Callable[[], UsersService] = UsersService,
+    ):
+        r"""
+        Check fingerprint of source every `interval` seconds and sync
+        changes. Database is locked only when source changed.
+        """
+        while True:
+            try:
+                fingerprint = await self._source.fingerprint()
+                if fingerprint is None or fingerprint != self._fingerprint:
+                    async with service_factory() as service:
+                        added, removed = await self._apply(
+                            service, fingerprint
+                        )
+                    if added or removed:
+                        logger.info(
+                            f"Synced users: {added} inserted, "
+                            f"{removed} removed"
+                        )
+            except Exception as e:
+                logger.exception(e)
+
+            await asyncio.sleep(interval)
+
+    async def _apply(
+        self, service: UsersService, fingerprint: str | None
+    ) -> tuple[int, int]:
+        users = {user_key(u): u async for u in self._source.iter_users()}
+        if self._users is None:
+            users_in_db = await service.get_users_by_reg_date(
+                self._registration_date
+            )
+            self._users = {user_key(u): u for u in users_in_db}
+
+        removed = [u for k, u in self._users.items() if users.get(k) != u]
+        added = [u for k, u in users.items() if self._users.get(k) != u]
+
+        for user in removed:
+            await service.remove_user(user)
+        if added:
+            await service.add_users(
+                added,
+                registration_date=self._registration_date,
+                skip_existing=False,
+            )
+
+        self._users = users
+        self._fingerprint = fingerprint
+        return len(added), len(removed)
@@ -0,0 +1,125 @@
+import re
+from typing import Iterator
+
+from docx import Document
+import openpyxl
+import pandas as pd
+
+from registrator_romania.backend.users_sources.base import FileUserSource
+from registrator_romania.backend.users_sources.normalization import (
+    BIRTH_DATE_FORMATS,
+    USERS_DATA_KEYS,
+)
+
+
+__all__ = [
+    "XlsxUserSource",
+    "CsvUserSource",
+    "TxtUserSource",
+    "DocxUserSource",
+]
+
+
+class XlsxUserSource(FileUserSource):
+    r"""
+    Users from .xlsx file, read in read-only mode row by row. Columns are
+    taken by position, first row is header.
+    """
+
+    default_path = "users.xlsx"
+
+    def read_raw_users(self) -> Iterator[dict]:
+        w = openpyxl.load_workbook(self.path, read_only=True, data_only=True)
+        try:
+            rows = w.active.iter_rows(min_row=2, values_only=True)
+            for row in rows:
+                if any(v is not None for v in row):
+                    yield dict(zip(USERS_DATA_KEYS, row))
+        finally:
+            w.close()
+
+
+class CsvUserSource(FileUserSource):
+    r"""Users from .csv file with columns named by `USERS_DATA_KEYS`."""
+
+    default_path = "users.csv"
+
+    def read_raw_users(self) -> Iterator[dict]:
+        chunks = pd.read_csv(
+            self.path,
+            dtype=str,
+            keep_default_na=False,
+            chunksize=self.batch_size,
+        )
+        with chunks as reader:
+            for chunk in reader:
+                yield from chunk.to_dict("records")
+
+
+class TxtUserSource(FileUserSource):
+    r"""
+    Users from .txt file: values of user on separate lines in order of
+    `USERS_DATA_KEYS`, users separated by empty line.
+    """
+
+    default_path = "users.txt"
+    date_formats = ["%Y-%m-%d", "%d-%m-%Y"] + BIRTH_DATE_FORMATS
+
+    def read_raw_users(self) -> Iterator[dict]:
+        lines = []
+        with open(self.path) as f:
+            for line in f:
+                line = line.rstrip("\n")
+                if line:
+                    lines.append(line)
+                    continue
+                if lines:
+                    yield dict(zip(USERS_DATA_KEYS, lines))
+                    lines = []
+
+        if lines:
+            yield dict(zip(USERS_DATA_KEYS, lines))
+
+
+class DocxUserSource(FileUserSource):
+    r"""
+    Users from .docx file with paragraphs like `1. Nume: GURKA`, paragraph
+    of passport closes record of user.
+    """
+
+    default_path = "users.docx"
+    date_formats = ["%Y-%m-%d", "%d-%m-%Y"] + BIRTH_DATE_FORMATS
+    mapping = {
+        "Prenume Pasaport": ["Prenume"],
+        "Nume Pasaport": ["Nume"],
+        "Data nasterii": ["Data naşterii"],
+        "Locul naşterii": ["Locul naşterii"],
+        "Prenume Mama": ["Prenumele mamei", "Numele mame", "Numele mamei"],
+        "Prenume Tata": [
+            "Prenumele tatalui",
+            "Numele tatalui",
+        ],
+        "Adresa de email": ["Adresa de e-mail"],
+        "Serie și număr Pașaport": ["Seria şi numar Paşaport"],
+    }
+
+    def read_raw_users(self) -> Iterator[dict]:
+        columns = {
+            col: key for key, cols in self.mapping.items() for col in cols
+        }
+        user = {}
+        for paragraph in Document(self.path).paragraphs:
+            text = paragraph.text.replace("\n", "").strip()
+            if not text:
+                continue
+
+            record = re.findall(r"(^[\d\.]*)(.*)", text)[0][1]
+            col, _, val = record.partition(":")
+            key = columns.get(col.strip())
+            if not key:
+                raise ValueError(f"Unknown field of user - {col}")
+
+            user[key] = val.strip()
+            if key == "Serie și număr Pașaport":
+                yield user
+                user = {}
@@ -0,0 +1,144 @@
+import asyncio
+from typing import AsyncIterator
+
+from google.auth.credentials import Credentials
+import gspread
+import gspread_asyncio
+from loguru import logger
+
+from registrator_romania.backend.users_sources.base import UserSource
+from registrator_romania.backend.users_sources.normalization import (
+    normalize_users_data,
+)
+from registrator_romania.shared import get_config
+
+
+__all__ = ["GSpreadUserSource"]
+
+
+def get_creds() -> Credentials:
+    """Get google spreadsheet credentails."""
+    cfg = get_config()
+    creds = Credentials.from_service_account_file(cfg["GOOGLE_TOKEN_FILE"])
+    return creds.with_scopes(
+        [
+            "https://spreadsheets.google.com/feeds",
+            "https://www.googleapis.com/auth/spreadsheets",
+            "https://www.googleapis.com/auth/drive",
+        ]
+    )
+
+
+
+class GSpreadUserSource(UserSource):
+    r"""
+    Users from worksheet of google spreadsheet, first row is header. Client
+    and worksheet are kept between calls, values downloaded only if
+    modified time of spreadsheet changed, and only changed rows are
+    normalized again.
+    """
+
+    def __init__(
+        self,
+        sheet_url: str,
+        worksheet_index: int = 0,
+        manager: gspread_asyncio.AsyncioGspreadClientManager = None,
+    ) -> None:
+        self.sheet_url = sheet_url
+        self.worksheet_index = worksheet_index
+        self._manager = manager or gspread_asyncio.AsyncioGspreadClientManager(
+            get_creds
+        )
+        self._agc = None
+        self._spreadsheet = None
+        self._worksheet = None
+
+        self._revision: str | None = None
+        self._values: list[list[str]] = []
+        # Normalized user (None if invalid) by hash of raw row
+        self._users_by_row: dict[int, dict | None] = {}
+
+    async def _open(self):
+        # Manager re-authorizes client when credentials expire, spreadsheet
+        # opened by old client should be opened again
+        agc = await self._manager.authorize()
+        if agc is not self._agc:
+            self._agc = agc
+            self._spreadsheet = await agc.open_by_url(self.sheet_url)
+            self._worksheet = await self._spreadsheet.get_worksheet(
+                self.worksheet_index
+            )
+
+    async def fingerprint(self) -> str | None:
+        r"""
+        Return modified time of spreadsheet from Drive API, None if it is
+        not available (then values downloaded each time).
+        """
+        await self._open()
+        # Client is authorized by `_open`, sync gspread called in thread
+        try:
+            return await asyncio.to_thread(
+                self._spreadsheet.ss.get_lastUpdateTime
+            )
+        except gspread.exceptions.GSpreadException as e:
+            logger.warning(f"Modified time of spreadsheet not received: {e}")
+            return None
+
+    async def get_values(self) -> list[list[str]]:
+        r"""
+        Return all values of worksheet, download them only if spreadsheet
+        was modified since last download.
+        """
+        revision = await self.fingerprint()
+        if revision is None or revision != self._revision:
+            self._values = await self._worksheet.get_all_values()
+            self._revision = revision
+        return self._values
+
+    async def iter_raw_users(self) -> AsyncIterator[dict]:
+        values = await self.get_values()
+        if not values:
+            return
+
+        header = [k.strip() for k in values[0]]
+        for row in values[1:]:
+            if any(v.strip() for v in row):
+                yield dict(zip(header, (v.strip() for v in row)))
+
+    async def iter_users(self) -> AsyncIterator[dict]:
+        users_by_row = {}
+        changed = {}
+        async for row in self.iter_raw_users():
+            h = hash(tuple(row.items()))
+            if h in users_by_row or h in changed:
+                continue
+            if h in self._users_by_row:
+                users_by_row[h] = self._users_by_row[h]
+            else:
+                changed[h] = row
+
+        # Normalize only new and changed rows, invalid ones stored as None
+        # to not normalize them again
+        changed = list(changed.items())
+        for start in range(0, len(changed), self.batch_size):
+            batch = changed[start : start + self.batch_size]
+            users, report = normalize_users_data(
+                [row for _, row in batch], date_formats=self.date_formats
+            )
+            users = iter(users)
+            for i, (h, row) in enumerate(batch):
+                keys = report["invalid_rows"].get(i)
+                if keys:
+                    passport = row.get("Serie și număr Pașaport")
+                    logger.warning(
+                        f"Skip user {passport}, invalid values of {keys}"
+                    )
+                    users_by_row[h] = None
+                else:
+                    users_by_row[h] = next(users)
+
+        self._users_by_row = users_by_row
+        for user in users_by_row.values():
+            if user is not None:
+                yield user
+
@@ -0,0 +1,191 @@
+"""
+Normalization of raw users: same keys, transliteration of turkish letters,
+case of names and emails, birth dates like `1976-09-09`.
+"""
+
+from datetime import date
+
+import dateutil.parser
+from loguru import logger
+import pandas as pd
+
+
+class Transliterator:
+    def __init__(self, language):
+        if language == "tr":
+            self.translit_dict = {
+                "Ş": "S",
+                "ş": "s",
+                "İ": "I",
+                "ı": "i",
+                "Ğ": "G",
+                "ğ": "g",
+                "Ç": "C",
+                "ç": "c",
+                "Ö": "O",
+                "ö": "o",
+                "Ü": "U",
+                "ü": "u",
+            }
+        else:
+            self.translit_dict = {}
+
+    def transliterate(self, text):
+        return "".join(self.translit_dict.get(char, char) for char in text)
+
+
+# Change it with any change of result of normalization, caches of
+# normalized users with other version are not used
+NORMALIZATION_VERSION = 1
+
+USERS_DATA_KEYS = [
+    "Prenume Pasaport",
+    "Nume Pasaport",
+    "Data nasterii",
+    "Locul naşterii",
+    "Prenume Mama",
+    "Prenume Tata",
+    "Adresa de email",
+    "Serie și număr Pașaport",
+]
+
+TR_TRANSLATION = str.maketrans(Transliterator("tr").translit_dict)
+
+# Formats tried in order, month first formats before day first formats, as
+# `dateutil.parser.parse(v, dayfirst=False)` do it. Values what not match
+# any of them parsed by dateutil.
+BIRTH_DATE_FORMATS = [
+    "%Y-%m-%d",
+    "%Y.%m.%d",
+    "%Y/%m/%d",
+    "%m.%d.%Y",
+    "%m/%d/%Y",
+    "%m-%d-%Y",
+    "%d.%m.%Y",
+    "%d/%m/%Y",
+    "%d-%m-%Y",
+    "%d %B %Y",
+    "%d %b %Y",
+]
+
+
+def _parse_birth_date(v: str) -> str | None:
+    try:
+        dt = dateutil.parser.parse(v, dayfirst=False)
+    except dateutil.parser.ParserError:
+        try:
+            dt = dateutil.parser.parse(v, dayfirst=True)
+        except dateutil.parser.ParserError:
+            return None
+    return dt.strftime("%Y-%m-%d")
+
+
+def _normalize_birth_dates(
+    values: pd.Series, formats: list[str] = BIRTH_DATE_FORMATS
+) -> tuple[pd.Series, int]:
+    r"""
+    Return dates formatted like `1976-09-09` (NA if date invalid) and count
+    of values parsed by dateutil fallback.
+    """
+    dates = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+    for fmt in formats:
+        missing = dates.isna() & values.notna()
+        if not missing.any():
+            break
+        dates[missing] = pd.to_datetime(
+            values[missing], format=fmt, errors="coerce"
+        )
+
+    result = dates.dt.strftime("%Y-%m-%d").astype("string")
+    fallback = dates.isna() & values.notna()
+    if fallback.any():
+        parsed = {v: _parse_birth_date(v) for v in values[fallback].unique()}
+        result[fallback] = values[fallback].map(parsed)
+    return result, int(fallback.sum())
+
+
+def normalize_users_data(
+    users_data: list[dict], date_formats: list[str] = BIRTH_DATE_FORMATS
+) -> tuple[list[dict], dict]:
+    r"""
+    Normalize users column by column and return valid users and report
+    about invalid ones. Birth dates parsed by `date_formats` in order.
+    Report example:
+
+    {
+        "total": 3,
+        "valid": 2,
+        "invalid_rows": {2: ["Data nasterii"]},
+        "padded": {"Prenume Tata": 1},
+        "dates_fallback": 1,
+    }
+    """
+    df = pd.DataFrame(users_data)
+    report = {
+        "total": len(df),
+        "valid": 0,
+        "invalid_rows": {},
+        "padded": {},
+        "dates_fallback": 0,
+    }
+    if df.empty:
+        return [], report
+
+    for key in USERS_DATA_KEYS:
+        if key not in df.columns:
+            df[key] = None
+
+    if "Data nasterii" in df.columns:
+        # Cells of spreadsheets can be dates already
+        df["Data nasterii"] = df["Data nasterii"].map(
+            lambda v: v.strftime("%Y-%m-%d") if isinstance(v, date) else v
+        )
+
+    invalid = pd.DataFrame(False, index=df.index, columns=df.columns)
+    for col in df.columns:
+        values = df[col].astype("string")
+        # Append to value last symbol while len(v) < 3
+        lengths = values.str.len()
+        short = lengths < 3
+        if short.any():
+            repeats = (3 - lengths).clip(lower=0).fillna(0).astype(int)
+            values = values.where(
+                ~short, values + values.str[-1].str.repeat(repeats)
+            )
+            report["padded"][col] = int(short.sum())
+
+        # Replace values like `Doğum tarihi:09.09.1976` and change turkey
+        # letters on english letters
+        values = values.str.rpartition(":")[2].str.strip()
+        values = values.str.translate(TR_TRANSLATION)
+
+        if col == "Data nasterii":
+            values, fallback = _normalize_birth_dates(values, date_formats)
+            report["dates_fallback"] = fallback
+
+        # Tranform case
+        if col in ("Nume Pasaport", "Prenume Pasaport"):
+            values = values.str.upper()
+        elif col == "Adresa de email":
+            values = values.str.lower()
+
+        invalid[col] = values.isna() | (values == "")
+        df[col] = values.astype(object).where(values.notna(), None)
+
+    required = invalid[USERS_DATA_KEYS]
+    invalid_rows = required.any(axis=1)
+    for i in df.index[invalid_rows]:
+        report["invalid_rows"][int(i)] = [
+            k for k in USERS_DATA_KEYS if required.at[i, k]
+        ]
+
+    objs = df[~invalid_rows].to_dict("records")
+    report["valid"] = len(objs)
+    return objs, report
+
+
+def prepare_users_data(users_data: list[dict]):
+    objs, report = normalize_users_data(users_data)
+    for i, keys in report["invalid_rows"].items():
+        logger.warning(f"Skip user #{i}, invalid values of {keys}")
+    return objs
@@ -1,15 +1,33 @@
-from datetime import datetime
+import hashlib
+import json
+import os
+from pathlib import Path
 import random
 import re
 import string
-import dateutil
-from docx import Document
-import gspread_asyncio
+import sys
+import threading
 from google.auth.credentials import Credentials
 from loguru import logger
-import openpyxl
 import pandas as pd
 
+from registrator_romania.backend.users_sources import (
+    CsvUserSource,
+    DocxUserSource,
+    GSpreadUserSource,
+    TxtUserSource,
+    XlsxUserSource,
+)
+from registrator_romania.backend.users_sources.google_sheets import get_creds
+from registrator_romania.backend.users_sources.normalization import (
+    BIRTH_DATE_FORMATS,
+    NORMALIZATION_VERSION,
+    TR_TRANSLATION,
+    USERS_DATA_KEYS,
+    Transliterator,
+    normalize_users_data,
+    prepare_users_data,
+)
 from registrator_romania.shared import get_config
 
 
@@ -17,214 +35,87 @@ def divide_list(src_list: list, divides: int = 100):
     return [src_list[x : x + divides] for x in range(0, len(src_list), divides)]
 
 
-def get_creds() -> Credentials:
-    """Get google spreadsheet credentails."""
-    cfg = get_config()
-    creds = Credentials.from_service_account_file(cfg["GOOGLE_TOKEN_FILE"])
-    return creds.with_scopes(
-        [
-            "https://spreadsheets.google.com/feeds",
-            "https://www.googleapis.com/auth/spreadsheets",
-            "https://www.googleapis.com/auth/drive",
-        ]
-    )
-
-
 def is_host_port(v: str):
     if re.findall(r"\d+:\d+", v):
         return True
 
 
-class Transliterator:
-    def __init__(self, language):
-        if language == "tr":
-            self.translit_dict = {
-                "Ş": "S",
-                "ş": "s",
-                "İ": "I",
-                "ı": "i",
-                "Ğ": "G",
-                "ğ": "g",
-                "Ç": "C",
-                "ç": "c",
-                "Ö": "O",
-                "ö": "o",
-                "Ü": "U",
-                "ü": "u",
-            }
-        else:
-            self.translit_dict = {}
-
-    def transliterate(self, text):
-        return "".join(self.translit_dict.get(char, char) for char in text)
-
-
-def prepare_users_data(users_data: list[dict]):
-    keys = [
-        "Prenume Pasaport",
-        "Nume Pasaport",
-        "Data nasterii",
-        "Locul naşterii",
-        "Prenume Mama",
-        "Prenume Tata",
-        "Adresa de email",
-        "Serie și număr Pașaport",
-    ]
-    objs = []
-    for us_data in users_data:
-        obj = {}
-        for k, v in us_data.items():
-            if len(str(v)) < 3:
-                # Append to value last symbol while len(v) < 3
-                while len(str(v)) < 3:
-                    v += v[-1]
-            
-            # Replace values like `Doğum tarihi:09.09.1976`
-            v = v.split(":")[-1].strip()
-            # Change turkey letters on english letters
-            v = Transliterator("tr").transliterate(v)
-
-            if k == "Data nasterii":
-                try:
-                    dt = dateutil.parser.parse(v, dayfirst=False)
-                except dateutil.parser.ParserError:
-                    dt = dateutil.parser.parse(v, dayfirst=True)
-
-                # We need to format date like `1976-09-09`
-                v = dt.strftime("%Y-%m-%d")
-                assert datetime.strptime(v, "%Y-%m-%d")
-
-            obj[k] = v
-
-        # Tranform case
-        obj["Nume Pasaport"] = obj["Nume Pasaport"].upper()
-        obj["Prenume Pasaport"] = obj["Prenume Pasaport"].upper()
-        obj["Adresa de email"] = obj["Adresa de email"].lower()
-        objs.append(obj)
-
-    assert all(k in obj for k in keys for obj in objs)
-    return objs
+def get_users_data_from_docx(path: str = None):
+    return list(DocxUserSource(path).read_users())
 
 
-def get_users_data_from_docx():
-    doc = Document("users.docx")
-
-    users = []
-    user = {}
-    mapping = {
-        "Prenume Pasaport": ["Prenume"],
-        "Nume Pasaport": ["Nume"],
-        "Data nasterii": ["Data naşterii"],
-        "Locul naşterii": ["Locul naşterii"],
-        "Prenume Mama": ["Prenumele mamei", "Numele mame", "Numele mamei"],
-        "Prenume Tata": [
-            "Prenumele tatalui",
-            "Numele tatalui",
-        ],
-        "Adresa de email": ["Adresa de e-mail"],
-        "Serie și număr Pașaport": ["Seria şi numar Paşaport"],
-    }
-    for paragraph in doc.paragraphs:
-        text = paragraph.text.replace("\n", "").strip()
-        if not text:
-            continue
-
-        record = re.findall(r"(^[\d\.]*)(.*)", text)[0][1]
-        col, val = list(map(lambda v: v.strip(), record.split(":")))
-
-        key = None
-        for k, v in mapping.items():
-            if col in v:
-                key = k
-                break
-
-        assert key
-        val = Transliterator("tr").transliterate(val)
-
-        if key == "Data nasterii":
-            try:
-                dt = datetime.strptime(val, "%Y-%m-%d")
-            except Exception:
-                dt = datetime.strptime(val, "%d-%m-%Y")
-            val = dt.strftime("%Y-%m-%d")
-        elif key == "":
-            val = val.lower()
-
-        user[key] = val
-
-        if key == "Serie și număr Pașaport":
-            users.append(user.copy())
-            user.clear()
-
-    return prepare_users_data(users)
-
-
-def get_users_data_from_csv():
-    df = pd.read_csv("users.csv")
-    users_data = df.to_dict("records")
-    return prepare_users_data(users_data)
-
-
-def get_users_data_from_txt():
-    keys = [
-        "Prenume Pasaport",
-        "Nume Pasaport",
-        "Data nasterii",
-        "Locul naşterii",
-        "Prenume Mama",
-        "Prenume Tata",
-        "Adresa de email",
-        "Serie și număr Pașaport",
-    ]
-    with open("users.txt") as f:
-        data = f.read()
-
-    objs = []
-    for values in data.split("\n\n"):
-        obj = {}
-        for k, v in zip(keys, values.split("\n")):
-            v = v.split(":")[-1].strip()
-            v = Transliterator("tr").transliterate(v)
-            if k == "Data nasterii":
-                try:
-                    dt = datetime.strptime(v, "%Y-%m-%d")
-                except Exception:
-                    dt = datetime.strptime(v, "%d-%m-%Y")
-                v = dt.strftime("%Y-%m-%d")
-
-            obj[k] = v
-        obj["Adresa de email"] = obj["Adresa de email"].lower()
-        objs.append(obj)
-
-    return prepare_users_data(objs)
-
-
-def get_users_data_from_xslx(path: str = None):
-    keys = [
-        "Prenume Pasaport",
-        "Nume Pasaport",
-        "Data nasterii",
-        "Locul naşterii",
-        "Prenume Mama",
-        "Prenume Tata",
-        "Adresa de email",
-        "Serie și număr Pașaport",
-    ]
+def get_users_data_from_csv(path: str = None):
+    return list(CsvUserSource(path).read_users())
+
+
+def get_users_data_from_txt(path: str = None):
+    return list(TxtUserSource(path).read_users())
+
+
+def iter_users_from_xlsx(path: str = None, batch_size: int = 1000):
+    r"""
+    Yield normalized users from .xlsx file without load whole workbook in
+    memory. Rows are read in read-only mode and normalized by batches of
+    `batch_size` rows, columns are taken by position, first row is header.
+    """
+    source = XlsxUserSource(path)
+    source.batch_size = batch_size
+    yield from source.read_users()
+
 
-    w = openpyxl.load_workbook("users.xlsx" if not path else path)
-    sheet = w.active
-    data = []
-    for row in sheet.iter_rows(min_row=0, max_row=None, values_only=True):
-        if not data:
-            assert row
-            row = keys.copy()
+def _file_hash(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(2**16), b""):
+            h.update(chunk)
+    return h.hexdigest()
 
-        data.append(row)
-    df = pd.DataFrame(data)
-    df.columns = df.iloc[0]
-    df.drop(df.index[0], inplace=True)
-    objs_raw = df.to_dict("records")
-    return prepare_users_data(objs_raw)
+
+def get_users_data_from_xslx(path: str = None, cache_dir: str = ".cache"):
+    r"""
+    Return normalized users from .xlsx file. Result cached in `cache_dir`
+    by path of file, version of normalization and hash of file content, so
+    unchanged file is not parsed again. Caches of previous contents of file
+    and of other versions are removed. Pass `cache_dir=None` to disable
+    cache.
+    """
+    path = "users.xlsx" if not path else path
+    if not cache_dir:
+        return list(iter_users_from_xlsx(path))
+
+    path_hash = hashlib.sha256(str(Path(path).resolve()).encode()).hexdigest()
+    prefix = f"users_{path_hash[:16]}_"
+    fn = f"{prefix}v{NORMALIZATION_VERSION}_{_file_hash(path)}.json"
+    cache_path = Path(cache_dir).joinpath(fn)
+    if cache_path.exists():
+        try:
+            with open(cache_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Can not read cache of users {cache_path}: {e}")
+
+    objs = list(iter_users_from_xlsx(path))
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(objs, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.warning(f"Can not write cache of users {cache_path}: {e}")
+        return objs
+
+    for old_path in cache_path.parent.glob("users_*.json"):
+        # Names without version are caches before versions were added
+        legacy = re.fullmatch(r"users_[0-9a-f]{64}\.json", old_path.name)
+        if old_path != cache_path and (
+            old_path.name.startswith(prefix) or legacy
+        ):
+            try:
+                old_path.unlink()
+            except OSError as e:
+                logger.warning(f"Can not remove cache {old_path}: {e}")
+    return objs
 
 
 def get_gspread_creds() -> Credentials:
@@ -240,32 +131,24 @@ def get_gspread_creds() -> Credentials:
     )
 
 
+_gspread_sources = {}
+
+
 async def get_users_data_from_gspread(
     sheet_url: str, log: bool = False
 ) -> pd.DataFrame:
     r"""
     Get DataFrame of users (very good api for work with .csv) from google
-    sheets.
+    sheets. Client is kept between calls and values downloaded again only
+    if spreadsheet was modified.
     """
-    manager = gspread_asyncio.AsyncioGspreadClientManager(get_creds)
-
-    if log:
-        logger.info("try to authorizate in gsheets")
-    agc = await manager.authorize()
-
-    if log:
-        logger.info("try to open by url")
-
-    sheet = await agc.open_by_url(sheet_url)
-    if log:
-        logger.info("try to get sheet")
+    source = _gspread_sources.get(sheet_url)
+    if source is None:
+        source = _gspread_sources[sheet_url] = GSpreadUserSource(sheet_url)
 
-    sheet1 = await sheet.get_sheet1()
     if log:
         logger.info("try to get records")
-
-    table_data = await sheet1.get_all_records()
-    table_data = [{k: v.strip() for k, v in d.items()} for d in table_data]
+    table_data = [row async for row in source.iter_raw_users()]
     return pd.DataFrame(table_data)
 
 
@@ -288,5 +171,105 @@ def generate_fake_users_data(n: int = 20):
     ]
 
 
-def filter_by_log_level(loglevels: list[str]):
-    return lambda record: record["level"].name in loglevels
+def filter_by_log_level(loglevels: list[str], sample=None):
+    if sample is None:
+        return lambda record: record["level"].name in loglevels
+    return lambda record: record["level"].name in loglevels and sample(record)
+
+
+def sample_log_records(
+    burst: int = 20, every: int = 100, loglevels: list[str] = ("DEBUG",)
+):
+    r"""
+    Filter of loguru what pass first `burst` records of each place in code
+    (module and line) and then one of each `every` records. Records of other
+    levels are passed always, so rare messages are not lost.
+    """
+    if every < 1:
+        raise ValueError(f"every should be positive - {every}")
+
+    counts: dict[tuple[str, int], int] = {}
+
+    def sample(record) -> bool:
+        if record["level"].name not in loglevels:
+            return True
+        key = (record["name"], record["line"])
+        count = counts.get(key, 0) + 1
+        counts[key] = count
+        return count <= burst or count % every == 0
+
+    return sample
+
+
+class BatchedFileSink:
+    r"""
+    File sink of loguru what only collect formatted messages, thread writes
+    them into file by batches each `interval` seconds. Event loop don't wait
+    for disk (bind mounts of docker can be slow) and for GIL of queue thread
+    like with `enqueue=True`.
+    """
+
+    def __init__(self, path: str | Path, interval: float = 0.2) -> None:
+        self._path = Path(path)
+        self._interval = interval
+        self._pending: list[str] = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name=f"logs-{self._path.name}", daemon=True
+        )
+        self._thread.start()
+
+    def write(self, message: str):
+        with self._lock:
+            self._pending.append(message)
+
+    def _write_pending(self, file):
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if batch:
+            file.write("".join(batch))
+            file.flush()
+
+    def _run(self):
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self._path, "a", encoding="utf-8") as file:
+            while not self._stopped.wait(self._interval):
+                self._write_pending(file)
+            self._write_pending(file)
+
+    def stop(self):
+        r"""Write rest of messages, called by `logger.remove`."""
+        self._stopped.set()
+        self._thread.join()
+
+
+def configure_logging(dirpath: str, async_logs: bool = True):
+    r"""
+    Add sinks of registrations into `dirpath`. With `async_logs` files are
+    written by threads of `BatchedFileSink` and frequent debug messages are
+    sampled.
+    """
+
+    def file_sink(fn: str):
+        path = Path().joinpath(dirpath, fn)
+        return BatchedFileSink(path) if async_logs else path
+
+    sample = sample_log_records() if async_logs else None
+    logger.remove()
+    logger.add(
+        sys.stderr,
+        filter=filter_by_log_level(loglevels=["INFO", "SUCCESS", "ERROR"]),
+    )
+    logger.add(
+        file_sink("errors.log"),
+        filter=filter_by_log_level(loglevels=["ERROR"]),
+    )
+    logger.add(
+        file_sink("debug.log"),
+        filter=filter_by_log_level(loglevels=["DEBUG"], sample=sample),
+    )
+    logger.add(
+        file_sink("success.log"),
+        filter=filter_by_log_level(loglevels=["SUCCESS"]),
+    )
@@ -0,0 +1,19 @@
+import click
+
+from registrator_romania.backend.results import export_reports
+
+
+@click.command()
+@click.argument("paths", nargs=-1, type=click.Path(exists=True))
+@click.option("--root", default=".", help="Directory with registrations_*")
+def main(paths: tuple[str], root: str):
+    r"""
+    Write CSV/XLSX reports of registered users from journals of results,
+    e.g. if process was killed. Without PATHS all journals in ROOT used.
+    """
+    for path in export_reports(list(paths) or None, root=root):
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
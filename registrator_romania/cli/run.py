@@ -1,22 +1,37 @@
 import asyncio
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 import os
 from pathlib import Path
-import sys
+import socket
 from typing import Literal
 from zoneinfo import ZoneInfo
-import logging
 from loguru import logger
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
+from registrator_romania.backend.api.api_romania import APIRomania
+from registrator_romania.backend.clock import ServerClock
 from registrator_romania.backend.database.api import UsersService
+from registrator_romania.backend.loop_monitor import (
+    LoopMonitor,
+    format_summary,
+)
+from registrator_romania.backend.net.metrics import MetricsExporter
+from registrator_romania.backend.net.ratelimit import configure_rate_limiter
+from registrator_romania.backend.net.tracing import configure_tracer
+from registrator_romania.backend.net.transport import (
+    TransportName,
+    create_transport,
+)
 from registrator_romania.backend.strategies_registration import (
+    MultiTargetStrategy,
     StrategyWithoutProxy,
     database_prepared_correctly,
     prepare_database,
 )
+from registrator_romania.frontend.telegram_bot.alerting import (
+    AlertDispatcher,
+)
 from registrator_romania.backend.utils import (
-    filter_by_log_level,
+    configure_logging,
     generate_fake_users_data,
     get_users_data_from_xslx,
 )
@@ -33,38 +48,57 @@ async def main_async(
     users_file: str,
     tip_formular: int,
     proxy_provider_url: str | None,
+    proxy_sessions: int = 0,
+    proxy_session_template: str = "brightdata",
+    targets: list[tuple[datetime, int]] = None,
+    save_trace: bool = False,
+    metrics_port: int = 0,
+    async_logs: bool = True,
+    loop_monitor: Literal["no", "yes", "debug"] = "no",
+    telegram_alerts: bool = False,
+    open_time: datetime = None,
+    transport: TransportName = "aiohttp",
+    registration_rate: float = 0,
 ):
-    dt = datetime.now().astimezone(ZoneInfo("Europe/Moscow"))
     dirpath = f"registrations_{registration_date.strftime("%d.%m.%Y")}"
 
+    if save_trace:
+        # Each container (own hostname) writes own file
+        fn = f"trace-{socket.gethostname()}-{os.getpid()}.jsonl"
+        configure_tracer(str(Path().joinpath(dirpath, fn)))
+
+    if metrics_port:
+        # Containers write snapshots into shared directory, endpoint of
+        # any container gives sum of all of them
+        exporter = MetricsExporter(str(Path().joinpath(dirpath, "metrics")))
+        await exporter.start(port=metrics_port)
+
     if save_logs:
-        logger.remove()
-        logger.add(
-            sys.stderr,
-            filter=filter_by_log_level(loglevels=["INFO", "SUCCESS", "ERROR"]),
-        )
-        logger.add(
-            Path().joinpath(dirpath, "errors.log"),
-            filter=filter_by_log_level(loglevels=["ERROR"]),
-        )
-        logger.add(
-            Path().joinpath(dirpath, "debug.log"),
-            filter=filter_by_log_level(loglevels=["DEBUG"]),
-        )
-        logger.add(
-            Path().joinpath(dirpath, "success.log"),
-            filter=filter_by_log_level(loglevels=["SUCCESS"]),
-        )
+        configure_logging(dirpath, async_logs=async_logs)
+
+    monitor = None
+    if loop_monitor != "no":
+        monitor = LoopMonitor(asyncio_debug=loop_monitor == "debug")
+        monitor.start()
 
     users_data = get_users_data_from_xslx(path=users_file)
     logger.info(f"we have {len(users_data)} raw users to registrate")
 
+    # Registrations are not limited unless rate is set
+    configure_rate_limiter(registration_rate=registration_rate or None)
+    api = APIRomania(transport=create_transport(transport))
+    # Time of start, stop and opening of registrations by clock of site
+    clock = ServerClock(api)
+
     async def start_registrations():
         # For debug commented code
         users_data = generate_fake_users_data(5)
-        strategy = StrategyWithoutProxy(
-            registration_date=registration_date,
-            tip_formular=tip_formular,
+        alerts = AlertDispatcher() if telegram_alerts else None
+        kwargs = dict(
+            api=api,
+            clock=clock,
+            open_time=open_time,
+            alerts=alerts,
             use_shuffle=use_shuffle,
             logging=save_logs,
             users_data=users_data,
@@ -72,41 +106,71 @@ async def main_async(
             mode=mode,
             async_requests_num=async_requests_num,
             residental_proxy_url=proxy_provider_url,
+            residental_sessions=proxy_sessions,
+            residental_session_template=proxy_session_template,
         )
+        if targets and len(targets) > 1:
+            # One process registrates users on all dates and forms
+            strategy = MultiTargetStrategy(targets=targets, **kwargs)
+        else:
+            strategy = StrategyWithoutProxy(
+                registration_date=registration_date,
+                tip_formular=tip_formular,
+                **kwargs,
+            )
         logger.info("Start strategy of registrations")
-        await strategy.start()
+        if not alerts:
+            await strategy.start()
+            return
 
-    try:
-        async with asyncio.timeout(10):
-            logger.info("check that database prepared correctly")
-            correctly = await database_prepared_correctly(
-                reg_dt=registration_date, users_data=users_data
-            )
+        alerts.start()
+        try:
+            await strategy.start()
+        finally:
+            await alerts.stop()
 
-        if not correctly:
-            async with asyncio.timeout(7):
-                logger.info("not correctly, prepare database")
-                await prepare_database(
-                    reg_dt=registration_date, users_data=users_data
+    reg_dates = sorted({dt for dt, _ in targets or []}) or [registration_date]
+    for reg_dt in reg_dates:
+        try:
+            async with asyncio.timeout(10):
+                logger.info("check that database prepared correctly")
+                correctly = await database_prepared_correctly(
+                    reg_dt=reg_dt, users_data=users_data
                 )
-    except asyncio.TimeoutError:
-        pass
-    except Exception as e:
-        logger.exception(e)
-
-    tz = ZoneInfo("Europe/Moscow")
-    logging.getLogger("apscheduler").setLevel(level=logging.ERROR)
-    scheduler = AsyncIOScheduler()
-    scheduler.add_job(
-        start_registrations, "cron", start_date=start_time, timezone=tz
-    )
-    scheduler.start()
 
-    while True:
-        dt_now = datetime.now().astimezone(tz)
-        await asyncio.sleep(60)
-        if dt_now.hour == stop_time.hour and dt_now.minute >= dt.minute:
-            return
+            if not correctly:
+                async with asyncio.timeout(7):
+                    logger.info("not correctly, prepare database")
+                    await prepare_database(
+                        reg_dt=reg_dt, users_data=users_data
+                    )
+        except asyncio.TimeoutError:
+            pass
+        except Exception as e:
+            logger.exception(e)
+
+    try:
+        await clock.sync()
+        await clock.sleep_until(start_time, lead=0)
+        registrations = asyncio.create_task(start_registrations())
+        stop = asyncio.create_task(clock.sleep_until(stop_time, lead=0))
+        await asyncio.wait(
+            [registrations, stop], return_when=asyncio.FIRST_COMPLETED
+        )
+        for task in (registrations, stop):
+            task.cancel()
+        # Strategy saves results and stops its tasks when cancelled
+        await asyncio.gather(registrations, stop, return_exceptions=True)
+    finally:
+        await api.close()
+        if monitor:
+            await monitor.stop()
+            summary = format_summary(monitor.summary())
+            logger.info(summary)
+            fn = f"loop-{socket.gethostname()}-{os.getpid()}.txt"
+            path = Path().joinpath(dirpath, fn)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(summary)
 
 
 def main():
@@ -118,27 +182,55 @@ def main():
     start_time = os.environ["start_time"]
     registration_date = os.environ["registration_date"]
     save_logs = os.environ["save_logs"]
+    save_trace = os.environ.get("save_trace") == "yes"
+    metrics_port = int(os.environ.get("metrics_port") or 0)
+    async_logs = (os.environ.get("async_logs") or "yes") == "yes"
+    loop_monitor = os.environ.get("loop_monitor") or "no"
+    telegram_alerts = os.environ.get("telegram_alerts") == "yes"
+    transport = os.environ.get("transport") or "aiohttp"
+    registration_rate = float(os.environ.get("registration_rate") or 0)
+    open_time = os.environ.get("open_time")
     users_file = os.environ["users_file"]
     tip_formular = os.environ["tip_formular"]
     proxy_provider_url = os.environ["proxy_provider_url"]
+    proxy_sessions = int(os.environ.get("proxy_sessions") or 0)
+    proxy_session_template = (
+        os.environ.get("proxy_session_template") or "brightdata"
+    )
 
     start_time = datetime.now().strptime(start_time, "%H:%M")
     stop_time = datetime.strptime(stop_time, "%H:%M")
-    registration_date = datetime.strptime(registration_date, "%d.%m.%Y")
+    registration_dates = [
+        datetime.strptime(dt.strip(), "%d.%m.%Y")
+        for dt in registration_date.split(",")
+    ]
+    tip_formulars = [int(tip) for tip in tip_formular.split(",")]
+    registration_date = registration_dates[0]
+    tip_formular = tip_formulars[0]
     use_shuffle = True if "yes" else False
     save_logs = True if "yes" else False
     proxy_provider_url = None if not proxy_provider_url else proxy_provider_url
 
-    start_time = (
-        datetime.now()
-        .astimezone(ZoneInfo("Europe/Moscow"))
-        .replace(hour=start_time.hour, minute=start_time.minute)
-    )
-    stop_time = (
-        datetime.now()
-        .astimezone(ZoneInfo("Europe/Moscow"))
-        .replace(hour=start_time.hour, minute=start_time.minute)
-    )
+    def today_at(t: datetime) -> datetime:
+        return (
+            datetime.now()
+            .astimezone(ZoneInfo("Europe/Moscow"))
+            .replace(
+                hour=t.hour, minute=t.minute, second=t.second, microsecond=0
+            )
+        )
+
+    start_time = today_at(start_time)
+    stop_time = today_at(stop_time)
+    # Window over midnight (e.g. 23:55 - 00:10) ends next day
+    if stop_time <= start_time:
+        stop_time += timedelta(days=1)
+    if open_time:
+        open_time = today_at(datetime.strptime(open_time, "%H:%M:%S"))
+        if open_time < start_time:
+            open_time += timedelta(days=1)
+    else:
+        open_time = None
 
     # For debug commented code
     # return pprint(
@@ -196,6 +288,19 @@ def main():
             users_file=users_file,
             tip_formular=tip_formular,
             proxy_provider_url=proxy_provider_url,
+            proxy_sessions=proxy_sessions,
+            proxy_session_template=proxy_session_template,
+            save_trace=save_trace,
+            metrics_port=metrics_port,
+            async_logs=async_logs,
+            loop_monitor=loop_monitor,
+            telegram_alerts=telegram_alerts,
+            open_time=open_time,
+            transport=transport,
+            registration_rate=registration_rate,
+            targets=[
+                (dt, tip) for dt in registration_dates for tip in tip_formulars
+            ],
         )
     )
 
@@ -0,0 +1,44 @@
+import click
+
+from registrator_romania.backend.net.tracing import summarize
+
+
+# Order of phases in attempt, other phases printed after them
+PHASES = [
+    "attempt",
+    "proxy",
+    "captcha",
+    "session",
+    "rate_limit",
+    "pool_wait",
+    "dns",
+    "connect",
+    "first_byte",
+    "post",
+    "request_error",
+    "post_registrate",
+]
+
+
+@click.command()
+@click.argument("paths", nargs=-1, required=True, type=click.Path(exists=True))
+def main(paths: tuple[str]):
+    r"""Print p50/p95/p99 of phases of registrations from trace files."""
+    summary = summarize(list(paths))
+    phases = [p for p in PHASES if p in summary]
+    phases += sorted(p for p in summary if p not in PHASES)
+
+    print(
+        f"{'phase':<16}{'count':>8}{'p50, ms':>10}{'p95, ms':>10}"
+        f"{'p99, ms':>10}{'max, ms':>10}"
+    )
+    for phase in phases:
+        s = summary[phase]
+        print(
+            f"{phase:<16}{s['count']:>8}{s['p50']:>10.1f}{s['p95']:>10.1f}"
+            f"{s['p99']:>10.1f}{s['max']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
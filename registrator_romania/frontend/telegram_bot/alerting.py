@@ -1,41 +1,243 @@
 """Module contain functional for work with Telegram Bot."""
 
-import aiofiles
-from aiogram.types import BufferedInputFile, FSInputFile
+import asyncio
+import time
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramAPIError,
+    TelegramNetworkError,
+    TelegramRetryAfter,
+    TelegramServerError,
+)
+from aiogram.types import BufferedInputFile
+from loguru import logger
 
 from registrator_romania.shared import get_config
-from registrator_romania.frontend.telegram_bot import bot
+
+
+LOG_HEADER = "<b>THIS IS A LOG MSG 🔴 !</b>"
+# Limit of length of message of Telegram is 4096
+MAX_MESSAGE_LENGTH = 4000
+
+
+def _get_bot() -> Bot:
+    # Bot created on import of package, config with token not needed
+    # until something sent
+    from registrator_romania.frontend.telegram_bot import bot
+
+    return bot
 
 
 async def send_msg_into_chat(message: str, html: str = None) -> None:
     """Send message into chat telegram."""
-    message = f"<b>THIS IS A LOG MSG 🔴 !</b>\n\n{message}"
+    bot = _get_bot()
+    message = f"{LOG_HEADER}\n\n{message}"
     chat_id = get_config()["telegram_bot"]["chat_id"]
     if html:
-        async with aiofiles.tempfile.NamedTemporaryFile("w") as f:
-            await f.write(html)
-            document = FSInputFile(f.name, filename=f"{f.name}.html")
-            
-            await bot.send_document(
-                chat_id,
-                document,   
-                caption=message,
-                parse_mode="HTML",
-            )
-        
-    else:
-        await bot.send_message(
+        await bot.send_document(
             chat_id,
-            message,
-            parse_mode="HTML"
+            BufferedInputFile(html.encode("utf-8"), "page.html"),
+            caption=message,
+            parse_mode="HTML",
         )
+    else:
+        await bot.send_message(chat_id, message, parse_mode="HTML")
 
 
 async def send_screenshot_to_chat(screenshot: bytes) -> None:
     """Send screenshot to Telegram chat."""
-    await bot.send_photo(
+    await _get_bot().send_photo(
         get_config()["telegram_bot"]["chat_id"],
         BufferedInputFile(screenshot, "screenshot.png"),
     )
-    await bot.session.close()
-    del screenshot
+
+
+class AlertDispatcher:
+    r"""
+    Send alerts into chat from background task, callers only put alerts
+    into queue of `maxsize` (alerts above it are dropped and counted).
+    Successful registrations are coalesced into one summary per
+    `summary_every` users or per `summary_interval` seconds, plain messages
+    waiting in queue joined into one. Failed sends retried `retries` times
+    with exponential backoff (`retry_after` of Telegram respected).
+    """
+
+    def __init__(
+        self,
+        bot: Bot = None,
+        chat_id: int | str = None,
+        maxsize: int = 100,
+        summary_every: int = 10,
+        summary_interval: float = 5,
+        retries: int = 5,
+        backoff: float = 1,
+        max_backoff: float = 30,
+    ) -> None:
+        self._bot = bot
+        self._chat_id = chat_id
+        self._queue: asyncio.Queue[tuple] = asyncio.Queue(maxsize)
+        self._summary_every = summary_every
+        self._summary_interval = summary_interval
+        self._retries = retries
+        self._backoff = backoff
+        self._max_backoff = max_backoff
+        self._successes: list[str] = []
+        self._first_success = 0.0
+        self._task: asyncio.Task = None
+        self.dropped = 0
+
+    @property
+    def bot(self) -> Bot:
+        if self._bot is None:
+            self._bot = _get_bot()
+        return self._bot
+
+    @property
+    def chat_id(self) -> int | str:
+        if self._chat_id is None:
+            self._chat_id = get_config()["telegram_bot"]["chat_id"]
+        return self._chat_id
+
+    def _put(self, item: tuple) -> bool:
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.debug(f"Alert dropped, queue is full ({self.dropped})")
+            return False
+
+    def alert(self, message: str, html: str = None) -> bool:
+        r"""Queue message (and html page as document), don't wait."""
+        return self._put(("message", message, html))
+
+    def screenshot(self, screenshot: bytes) -> bool:
+        return self._put(("photo", screenshot))
+
+    def success(self, name: str):
+        r"""Count successful registration for next summary."""
+        if not self._successes:
+            self._first_success = time.monotonic()
+        self._successes.append(name)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 10):
+        r"""Send rest of alerts (waits up to `timeout`) and close session."""
+        if self._task:
+            try:
+                async with asyncio.timeout(timeout):
+                    # Waits for place in queue, stop is not dropped
+                    await self._queue.put(("stop",))
+                    await self._task
+            except TimeoutError:
+                logger.error("Alerts not sent before timeout of stop")
+                self._task.cancel()
+            self._task = None
+        if self._bot is not None:
+            await self._bot.session.close()
+
+    def _summary_due(self) -> bool:
+        if not self._successes:
+            return False
+        return (
+            len(self._successes) >= self._summary_every
+            or time.monotonic() - self._first_success
+            >= self._summary_interval
+        )
+
+    async def _send_summary(self):
+        names, self._successes = self._successes, []
+        text = f"Successfully registered {len(names)} users:\n" + "\n".join(
+            f"- {name}" for name in names
+        )
+        await self._call(
+            self.bot.send_message,
+            self.chat_id,
+            text[:MAX_MESSAGE_LENGTH],
+            parse_mode="HTML",
+        )
+
+    def _join_messages(self, message: str) -> str:
+        # Plain messages what already wait in queue sent as one
+        messages = [message]
+        length = len(message)
+        while not self._queue.empty():
+            item = self._queue._queue[0]
+            if item[0] != "message" or item[2]:
+                break
+            if length + len(item[1]) > MAX_MESSAGE_LENGTH:
+                break
+            self._queue.get_nowait()
+            messages.append(item[1])
+            length += len(item[1]) + 2
+        return "\n\n".join(messages)
+
+    async def _dispatch(self, item: tuple):
+        kind = item[0]
+        if kind == "photo":
+            await self._call(
+                self.bot.send_photo,
+                self.chat_id,
+                BufferedInputFile(item[1], "screenshot.png"),
+            )
+            return
+
+        _, message, html = item
+        if html:
+            await self._call(
+                self.bot.send_document,
+                self.chat_id,
+                BufferedInputFile(html.encode("utf-8"), "page.html"),
+                caption=f"{LOG_HEADER}\n\n{message}"[:1024],
+                parse_mode="HTML",
+            )
+            return
+
+        message = self._join_messages(message)
+        await self._call(
+            self.bot.send_message,
+            self.chat_id,
+            f"{LOG_HEADER}\n\n{message}"[:MAX_MESSAGE_LENGTH],
+            parse_mode="HTML",
+        )
+
+    async def _call(self, method, *args, **kwargs):
+        delay = self._backoff
+        for _ in range(self._retries):
+            try:
+                return await method(*args, **kwargs)
+            except TelegramRetryAfter as e:
+                await asyncio.sleep(e.retry_after)
+            except (TelegramNetworkError, TelegramServerError) as e:
+                logger.debug(f"Alert not sent, retry after {delay} s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self._max_backoff)
+            except TelegramAPIError as e:
+                # Bad request, forbidden and so on, retry will not help
+                logger.exception(e)
+                return
+        logger.error(f"Alert not sent after {self._retries} attempts")
+
+    async def _run(self):
+        while True:
+            try:
+                async with asyncio.timeout(self._summary_interval):
+                    item = await self._queue.get()
+            except TimeoutError:
+                item = None
+
+            try:
+                if self._summary_due() or (item and item[0] == "stop"):
+                    if self._successes:
+                        await self._send_summary()
+                if item is None:
+                    continue
+                if item[0] == "stop":
+                    return
+                await self._dispatch(item)
+            except Exception as e:
+                logger.exception(e)
@@ -0,0 +1,88 @@
+"""
+Lag of event loop while registrations write logs. Tasks write debug,
+error and info messages like strategy and pool of proxies do, probe sleeps
+`interval` and measures how late it wakes up. Runs with synchronous sinks
+and with `async_logs` (threads of `BatchedFileSink` and sampling of debug
+messages). Pass `--dir` on slow disk (e.g. bind mount of docker), on local
+disk difference is small.
+
+Run from root of repo:
+    python scripts/bench_logging.py --tasks 20 --seconds 5
+"""
+
+import asyncio
+import contextlib
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import click
+from loguru import logger
+
+from registrator_romania.backend.utils import configure_logging
+
+
+async def probe_lag(interval: float, lags: list[float]):
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def write_logs(stop_at: float, counter: list[int]):
+    n = 0
+    while time.perf_counter() < stop_at:
+        n += 1
+        logger.debug(f"Proxy http://10.0.0.{n % 256}:8080 checked, 0.3 s")
+        if n % 10 == 0:
+            logger.error(f"Error when registrate user U{n}: forbidden")
+        if n % 50 == 0:
+            logger.info(f"Sent {n} requests")
+        counter[0] += 1
+        # Like waiting for response of site
+        await asyncio.sleep(random.uniform(0, 0.002))
+
+
+async def measure(tasks: int, seconds: float, interval: float):
+    lags: list[float] = []
+    counter = [0]
+    probe = asyncio.create_task(probe_lag(interval, lags))
+    stop_at = time.perf_counter() + seconds
+    await asyncio.gather(*[write_logs(stop_at, counter) for _ in range(tasks)])
+    probe.cancel()
+    return lags, counter[0]
+
+
+def report(name: str, lags: list[float], records: int, seconds: float):
+    lags_ms = sorted(lag * 1000 for lag in lags)
+    p = statistics.quantiles(lags_ms, n=100)
+    print(
+        f"{name:<12} lag p50 {p[49]:6.2f} ms, p99 {p[98]:6.2f} ms, "
+        f"max {lags_ms[-1]:6.2f} ms, {records / seconds:.0f} records/s"
+    )
+
+
+@click.command()
+@click.option("--tasks", default=20, type=int)
+@click.option("--seconds", default=5.0, type=float)
+@click.option("--interval", default=0.005, type=float)
+@click.option("--dir", "directory", default=None, help="Directory of logs")
+def main(tasks: int, seconds: float, interval: float, directory: str):
+    for name, async_logs in (("sync", False), ("async_logs", True)):
+        # Sink of stderr writes to devnull, terminal is not measured
+        with (
+            tempfile.TemporaryDirectory(dir=directory) as dirpath,
+            open(os.devnull, "w") as devnull,
+        ):
+            with contextlib.redirect_stderr(devnull):
+                configure_logging(dirpath, async_logs=async_logs)
+            lags, records = asyncio.run(measure(tasks, seconds, interval))
+            # Waits until thread of loguru writes queue
+            logger.remove()
+        report(name, lags, records, seconds)
+
+
+if __name__ == "__main__":
+    main()
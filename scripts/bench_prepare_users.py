@@ -0,0 +1,91 @@
+"""
+Compare speed of column-wise `prepare_users_data` with previous row by row
+implementation and check that both return same records.
+
+Run from root of repo:
+    python scripts/bench_prepare_users.py 10000
+"""
+
+from datetime import datetime
+import random
+import sys
+import time
+
+import dateutil.parser
+
+from registrator_romania.backend.utils import (
+    Transliterator,
+    generate_fake_users_data,
+    prepare_users_data,
+)
+
+
+def legacy_prepare_users_data(users_data: list[dict]):
+    objs = []
+    for us_data in users_data:
+        obj = {}
+        for k, v in us_data.items():
+            if len(str(v)) < 3:
+                while len(str(v)) < 3:
+                    v += v[-1]
+
+            v = v.split(":")[-1].strip()
+            v = Transliterator("tr").transliterate(v)
+
+            if k == "Data nasterii":
+                try:
+                    dt = dateutil.parser.parse(v, dayfirst=False)
+                except dateutil.parser.ParserError:
+                    dt = dateutil.parser.parse(v, dayfirst=True)
+
+                v = dt.strftime("%Y-%m-%d")
+                assert datetime.strptime(v, "%Y-%m-%d")
+
+            obj[k] = v
+
+        obj["Nume Pasaport"] = obj["Nume Pasaport"].upper()
+        obj["Prenume Pasaport"] = obj["Prenume Pasaport"].upper()
+        obj["Adresa de email"] = obj["Adresa de email"].lower()
+        objs.append(obj)
+    return objs
+
+
+def generate_raw_users(n: int) -> list[dict]:
+    users = generate_fake_users_data(n)
+    date_formats = ["%Y-%m-%d", "%d.%m.%Y", "%m/%d/%Y", "%d %B %Y"]
+    for user in users:
+        dt = datetime(
+            random.randint(1950, 2005),
+            random.randint(1, 12),
+            random.randint(1, 28),
+        )
+        user["Data nasterii"] = (
+            f"Doğum tarihi:{dt.strftime(random.choice(date_formats))}"
+        )
+        user["Locul naşterii"] = random.choice(["İSTANBUL", "Muş", "Iğdır"])
+        user["Prenume Tata"] = random.choice(["Ali", "Şükrü", "Xi"])
+        user["Adresa de email"] = user["Adresa de email"].upper()
+    return users
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    users = generate_raw_users(n)
+
+    start = time.perf_counter()
+    legacy = legacy_prepare_users_data([u.copy() for u in users])
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = prepare_users_data([u.copy() for u in users])
+    result_time = time.perf_counter() - start
+
+    assert result == legacy, "Records are different"
+    print(f"users: {n}")
+    print(f"row by row:  {legacy_time:.3f} s")
+    print(f"column-wise: {result_time:.3f} s")
+    print(f"speedup:     {legacy_time / result_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
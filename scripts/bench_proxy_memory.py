@@ -0,0 +1,96 @@
+"""
+Compare memory of proxy pool structures: plain url strings (as it was
+before `records` module) and interned records with array-backed stats.
+
+Run from root of repo:
+    python scripts/bench_proxy_memory.py 50000
+"""
+
+import datetime
+import gc
+import pickle
+import random
+import sys
+import tracemalloc
+
+from registrator_romania.backend.proxies.records import (
+    ProxyRegistry,
+    ProxyStats,
+)
+
+
+URL = "https://programarecetatenie.eu/programare_online"
+
+
+def generate_urls(n: int) -> list[str]:
+    schemes = ["http", "socks4", "socks5"]
+    return [
+        f"{random.choice(schemes)}://{random.randint(1, 223)}."
+        f"{random.randint(0, 255)}.{random.randint(0, 255)}."
+        f"{random.randint(1, 254)}:{random.randint(1024, 65535)}"
+        for _ in range(n)
+    ]
+
+
+def build_strings(urls: list[str]):
+    # Each structure gets own copy of url, as urls parsed from response and
+    # passed through multiprocessing queue
+    src = [url.encode().decode() for url in urls]
+    proxies = [url.encode().decode() for url in urls]
+    reports = {url.encode().decode(): random.randint(0, 5) for url in urls}
+    timeouts = {
+        url.encode().decode(): datetime.timedelta(
+            microseconds=random.randint(1, 999_999)
+        )
+        for url in urls
+    }
+    per_url = {
+        URL: [
+            {"proxy": url.encode().decode(), "timeout": random.randint(1, 10**6)}
+            for url in urls
+        ]
+    }
+    return src, proxies, reports, timeouts, per_url
+
+
+def build_records(urls: list[str]):
+    registry = ProxyRegistry()
+    stats = ProxyStats()
+    src = [registry.intern(url) for url in urls]
+    proxies = {record.id: record for record in src}
+    for record in src:
+        stats.report_failure(record.id)
+        stats.set_timeout(record.id, random.random())
+    per_url = {URL: {record.id: random.random() for record in src}}
+    return registry, stats, src, proxies, per_url
+
+
+def measure(build, urls: list[str]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    result = build(urls)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    urls = generate_urls(n)
+
+    strings = measure(build_strings, urls)
+    records = measure(build_records, urls)
+    print(f"proxies: {n}")
+    print(f"url strings: {strings / 2**20:.1f} MiB")
+    print(f"records:     {records / 2**20:.1f} MiB")
+    print(f"ratio:       {strings / records:.2f}x")
+
+    text_item = ("1.2.3.4", urls[0], datetime.timedelta(microseconds=123456))
+    record_item = (12345, 0.123456)
+    print(f"queue item (url, timedelta): {len(pickle.dumps(text_item))} bytes")
+    print(f"queue item (id, seconds):    {len(pickle.dumps(record_item))} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Benchmark of `AutomaticProxyPool` against local farm of fake proxies
+(loopback listeners what answer like proxy with configurable delay and
+share of failures). Measure throughput of `check_proxy` and of background
+process, time to first usable proxy of `ingest`, cost of
+`get_best_proxy_by_timeout` and memory of pool per 10k proxies.
+
+Run from root of repo:
+    python scripts/bench_proxy_pool.py --proxies 2000 --delay 0.05
+"""
+
+import asyncio
+import gc
+import random
+import time
+import timeit
+import tracemalloc
+
+import click
+
+from registrator_romania.backend.proxies.autopool import (
+    AutomaticProxyPool,
+    check_proxy,
+)
+
+
+class FakeProxyFarm:
+    r"""
+    Listeners on loopback, each of them is http proxy what answer on any
+    request with its address after `delay` seconds. `failure_rate` of
+    connections closed without answer.
+    """
+
+    def __init__(
+        self, count: int, delay: float = 0.0, failure_rate: float = 0.0
+    ) -> None:
+        self.count = count
+        self.delay = delay
+        self.failure_rate = failure_rate
+        self.urls: list[str] = []
+        self._servers: list[asyncio.Server] = []
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        try:
+            await reader.readuntil(b"\r\n\r\n")
+            if self.delay:
+                await asyncio.sleep(random.uniform(0, 2 * self.delay))
+            if random.random() < self.failure_rate:
+                return
+
+            host = writer.get_extra_info("sockname")[0].encode()
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\n"
+                b"Content-Length: %d\r\nConnection: close\r\n\r\n%s"
+                % (len(host), host)
+            )
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self) -> list[str]:
+        for _ in range(self.count):
+            server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            self._servers.append(server)
+            self.urls.append(f"http://127.0.0.1:{port}")
+        return self.urls
+
+    async def stop(self):
+        for server in self._servers:
+            server.close()
+        await asyncio.gather(*[s.wait_closed() for s in self._servers])
+        self._servers = []
+
+
+def create_pool(proxies: list[str], check_url: str) -> AutomaticProxyPool:
+    return AutomaticProxyPool(
+        proxies=proxies, sources_classes=[], check_url=check_url
+    )
+
+
+async def bench_check_proxy(urls: list[str], check_url: str, limit: int):
+    semaphore = asyncio.Semaphore(limit)
+
+    async def check(url: str):
+        async with semaphore:
+            return await check_proxy(url, url=check_url)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*[check(url) for url in urls])
+    elapsed = time.perf_counter() - start
+    alive = sum(1 for r in results if r)
+    print(
+        f"check_proxy:        {len(urls) / elapsed:.0f} checks/s "
+        f"({alive}/{len(urls)} alive, {elapsed:.2f} s)"
+    )
+
+
+async def bench_ingest(urls: list[str], check_url: str, limit: int):
+    pool = create_pool([], check_url)
+
+    async def iterate():
+        for url in urls:
+            yield url
+
+    start = time.perf_counter()
+    task = pool.start_ingest(iterate(), limit=limit)
+    first = None
+    while not task.done():
+        if first is None and pool.proxies:
+            first = time.perf_counter() - start
+        await asyncio.sleep(0.001)
+    elapsed = time.perf_counter() - start
+    first = first if first is not None else elapsed
+    print(
+        f"ingest:             first usable after {first * 1000:.0f} ms, "
+        f"{len(pool.proxies)} in pool after {elapsed:.2f} s"
+    )
+    pool.drop_background()
+
+
+async def bench_background(urls: list[str], check_url: str):
+    pool = create_pool(urls, check_url)
+    start = time.perf_counter()
+    pool.start_background()
+    first = None
+    alive = 0
+    async for _ in pool:
+        if first is None:
+            first = time.perf_counter() - start
+        alive += 1
+    elapsed = time.perf_counter() - start
+    print(
+        f"start_background:   {len(urls) / elapsed:.0f} checks/s "
+        f"({alive}/{len(urls)} alive, {elapsed:.2f} s, first after "
+        f"{(first or elapsed) * 1000:.0f} ms)"
+    )
+    pool.drop_background()
+
+
+def generate_urls(n: int) -> list[str]:
+    return [
+        f"http://10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}:"
+        f"{random.randint(1024, 65535)}"
+        for i in range(n)
+    ]
+
+
+def fill_pool(pool: AutomaticProxyPool, urls: list[str]):
+    for record in pool._extend_src_proxies(urls):
+        pool._proxies[record.id] = record
+        pool._stats.reset(record.id)
+        pool._stats.set_timeout(record.id, random.random())
+
+
+async def bench_selection(n: int):
+    pool = create_pool([], None)
+    fill_pool(pool, generate_urls(n))
+    number = 200
+    seconds = timeit.timeit(pool.get_best_proxy_by_timeout, number=number)
+    print(
+        f"best by timeout:    {seconds / number * 1e6:.0f} us per call "
+        f"({n} proxies)"
+    )
+    pool.drop_background()
+
+
+async def bench_memory(n: int = 10_000):
+    urls = generate_urls(n)
+    pool = create_pool([], None)
+    gc.collect()
+    tracemalloc.start()
+    fill_pool(pool, urls)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"memory:             {size / 2**20:.2f} MiB per {n} proxies")
+    pool.drop_background()
+
+
+async def run(
+    proxies: int,
+    delay: float,
+    failure_rate: float,
+    limit: int,
+    selection_size: int,
+):
+    farm = FakeProxyFarm(proxies, delay=delay, failure_rate=failure_rate)
+    urls = await farm.start()
+    # Plain http url, so request goes to proxy itself (without CONNECT)
+    check_url = "http://check.local/"
+    try:
+        await bench_check_proxy(urls, check_url, limit)
+        await bench_ingest(urls, check_url, limit)
+        await bench_background(urls, check_url)
+    finally:
+        await farm.stop()
+
+    # Pool create connectors, so it can't be created outside of loop
+    await bench_selection(selection_size)
+    await bench_memory()
+
+
+@click.command()
+@click.option("--proxies", default=2000, type=int)
+@click.option("--delay", default=0.05, type=float)
+@click.option("--failure-rate", default=0.2, type=float)
+@click.option("--limit", default=500, type=int)
+@click.option("--selection-size", default=10_000, type=int)
+def main(
+    proxies: int,
+    delay: float,
+    failure_rate: float,
+    limit: int,
+    selection_size: int,
+):
+    print(f"fake proxies: {proxies}, delay {delay} s, failures {failure_rate}")
+    asyncio.run(run(proxies, delay, failure_rate, limit, selection_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Bursts of registrations and polls of places against local stub of site with
+each transport of `APIRomania`. Reports time of burst, latency of requests
+and how many connections were opened to stub. By default stub serves plain
+http, so httpx speaks HTTP/1.1 to it (HTTP/2 is negotiated by ALPN of
+TLS); use `--max-connections` to see how httpx works with small pool.
+With `--tls` stub serves HTTP/2 over TLS with certificate of tests, like
+real site, then only httpx is measured (aiohttp does not trust
+certificate and does not speak HTTP/2).
+
+Run from root of repo:
+    python scripts/bench_transport.py --registrations 200 --polls 200
+    python scripts/bench_transport.py --tls
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from pathlib import Path
+import statistics
+import time
+from typing import Callable
+
+import click
+from loguru import logger
+
+from registrator_romania.backend.api.api_romania import APIRomania
+from registrator_romania.backend.api.stub_site import StubSite
+from registrator_romania.backend.net.ratelimit import RateLimiter
+from registrator_romania.backend.net.transport import (
+    Transport,
+    create_transport,
+)
+from registrator_romania.backend.utils import generate_fake_users_data
+
+
+CERTS = Path(__file__).parent.parent / "tests" / "certs"
+
+async def timed(latencies: list[float], coro):
+    start = time.perf_counter()
+    result = await coro
+    latencies.append(time.perf_counter() - start)
+    return result
+
+
+async def burst(
+    api: APIRomania,
+    users_data: list[dict],
+    polls: int,
+    registration_date: datetime,
+) -> tuple[float, list[float], int]:
+    latencies: list[float] = []
+    coros = [
+        api.make_registration(
+            user_data,
+            registration_date,
+            tip_formular=3,
+            g_recaptcha_response="token",
+        )
+        for user_data in users_data
+    ]
+    coros += [
+        api.get_free_places_for_date(
+            tip_formular=3,
+            month=registration_date.month,
+            day=registration_date.day,
+            year=registration_date.year,
+        )
+        for _ in range(polls)
+    ]
+    start = time.perf_counter()
+    results = await asyncio.gather(*[timed(latencies, c) for c in coros])
+    elapsed = time.perf_counter() - start
+    failed = sum(1 for r in results if r is None or isinstance(r, Exception))
+    return elapsed, latencies, failed
+
+
+async def measure(
+    factory: Callable[[], Transport],
+    registrations: int,
+    polls: int,
+    rounds: int,
+    latency: float,
+    tls: bool = False,
+) -> dict:
+    registration_date = datetime.now() + timedelta(days=30)
+    certs = {}
+    if tls:
+        certs = {
+            "certfile": str(CERTS / "stub.pem"),
+            "keyfile": str(CERTS / "stub-key.pem"),
+        }
+    stub = StubSite(
+        capacity=registrations * rounds, latency=latency, **certs
+    )
+    async with stub:
+        api = APIRomania(
+            rate_limiter=RateLimiter(rate=100_000),
+            base_url=stub.url,
+            captcha_base_url=f"{stub.url}/recaptcha",
+            # Connector of aiohttp is created in running loop
+            transport=factory(),
+        )
+        users_data = generate_fake_users_data(registrations * rounds)
+        elapsed, latencies, failed = 0.0, [], 0
+        try:
+            for i in range(rounds):
+                users = users_data[i * registrations : (i + 1) * registrations]
+                result = await burst(api, users, polls, registration_date)
+                elapsed += result[0]
+                latencies.extend(result[1])
+                failed += result[2]
+        finally:
+            await api.close()
+
+    latencies.sort()
+    p = statistics.quantiles(latencies, n=100)
+    return {
+        "elapsed": elapsed,
+        "p50": p[49],
+        "p99": p[98],
+        "failed": failed,
+        "registered": len(stub.registrations),
+        "connections": len(stub.connections),
+    }
+
+
+@click.command()
+@click.option("--registrations", default=200, type=int)
+@click.option("--polls", default=200, type=int)
+@click.option("--rounds", default=3, type=int, help="Bursts one by one")
+@click.option("--latency", default=0.05, type=float)
+@click.option(
+    "--max-connections",
+    default=None,
+    type=int,
+    help="Pool of httpx, unlimited by default",
+)
+@click.option("--tls", is_flag=True, help="HTTP/2 over TLS, only httpx")
+def main(
+    registrations: int,
+    polls: int,
+    rounds: int,
+    latency: float,
+    max_connections: int,
+    tls: bool,
+):
+    logger.remove()
+    transports = {
+        "aiohttp": lambda: create_transport("aiohttp"),
+        "httpx": lambda: create_transport(
+            "httpx",
+            max_connections=max_connections,
+            verify=str(CERTS / "stub.pem"),
+        ),
+    }
+    if tls:
+        transports.pop("aiohttp")
+    for name, factory in transports.items():
+        report = asyncio.run(
+            measure(factory, registrations, polls, rounds, latency, tls)
+        )
+        print(
+            f"{name:<8} {report['elapsed']:6.2f} s, "
+            f"p50 {report['p50'] * 1000:7.1f} ms, "
+            f"p99 {report['p99'] * 1000:7.1f} ms, "
+            f"connections {report['connections']:4d}, "
+            f"registered {report['registered']}, failed {report['failed']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Load test of registration flow against local stub of site. Runs
+`StrategyWithoutProxy` with users in memory (without database) and reports
+time to first success, registrations per second and latency of requests of
+registration.
+
+Run from root of repo:
+    python scripts/loadtest.py --users 200 --mode async --latency 0.05
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from pathlib import Path
+import statistics
+import tempfile
+import time
+
+import click
+from loguru import logger
+
+from registrator_romania.backend.api.api_romania import APIRomania
+from registrator_romania.backend.api.stub_site import (
+    MemoryUsersService,
+    StubSite,
+)
+from registrator_romania.backend.net.ratelimit import RateLimiter
+from registrator_romania.backend.net.tracing import configure_tracer
+from registrator_romania.backend.net.transport import create_transport
+from registrator_romania.backend.results import (
+    ResultsJournal,
+    journal_path,
+)
+from registrator_romania.backend.strategies_registration import (
+    StrategyWithoutProxy,
+)
+from registrator_romania.backend.utils import generate_fake_users_data
+
+
+class MeasuredStrategy(StrategyWithoutProxy):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.latencies: list[float] = []
+        self.successes: list[float] = []
+
+    async def _make_registration(self, user_data: dict, *args, **kwargs):
+        start = time.perf_counter()
+        html = await super()._make_registration(user_data, *args, **kwargs)
+        end = time.perf_counter()
+        self.latencies.append(end - start)
+        if isinstance(html, str) and self._api.is_success_registration(html):
+            self.successes.append(end)
+        return html
+
+
+def percentile(values: list[float], q: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100)[q - 1]
+
+
+async def run_load_test(
+    users: int = 100,
+    mode: str = "async",
+    async_requests_num: int = 10,
+    capacity: int = None,
+    latency: float = 0.0,
+    jitter: float = 0.0,
+    forbidden_rate: float = 0.0,
+    open_after: float = 0.0,
+    duration: float = 60,
+    trace: str = None,
+    transport: str = "aiohttp",
+) -> dict:
+    tracer = configure_tracer(trace)
+    registration_date = datetime.now() + timedelta(days=30)
+    stub = StubSite(
+        capacity=capacity or users,
+        latency=latency,
+        jitter=jitter,
+        forbidden_rate=forbidden_rate,
+        open_after=open_after,
+    )
+    # Journal and reports of results are not kept
+    tmpdir = tempfile.TemporaryDirectory()
+    journal = ResultsJournal(
+        str(Path(tmpdir.name, journal_path(registration_date)))
+    )
+    async with stub:
+        api = APIRomania(
+            rate_limiter=RateLimiter(rate=10_000),
+            base_url=stub.url,
+            captcha_base_url=f"{stub.url}/recaptcha",
+            transport=create_transport(transport),
+        )
+        users_data = generate_fake_users_data(users)
+        strategy = MeasuredStrategy(
+            registration_date=registration_date,
+            tip_formular=3,
+            users_data=users_data,
+            mode=mode,
+            async_requests_num=async_requests_num,
+            # Never stop by time of day
+            stop_when=(24, 0),
+            logging=False,
+            api=api,
+            users_service=MemoryUsersService(users_data),
+            journal=journal,
+        )
+
+        start = time.perf_counter()
+        try:
+            async with asyncio.timeout(duration):
+                await strategy.start()
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            elapsed = time.perf_counter() - start
+            for name in ("update_users_data_task", "verification_task"):
+                task = getattr(strategy, name, None)
+                if task:
+                    task.cancel()
+            await api.close()
+            tracer.close()
+            tmpdir.cleanup()
+
+    successes = strategy.successes
+    first = successes[0] - start if successes else None
+    return {
+        "users": users,
+        "mode": mode,
+        "registered": len(stub.registrations),
+        "elapsed": elapsed,
+        "time_to_first_success": first,
+        "registrations_per_sec": len(successes) / elapsed,
+        "requests": sum(stub.requests.values()),
+        "p50": percentile(strategy.latencies, 50),
+        "p99": percentile(strategy.latencies, 99),
+    }
+
+
+@click.command()
+@click.option("--users", default=100, type=int)
+@click.option("--mode", default="async", type=click.Choice(["async", "sync"]))
+@click.option("--async-requests-num", default=10, type=int)
+@click.option("--capacity", default=None, type=int)
+@click.option("--latency", default=0.0, type=float)
+@click.option("--jitter", default=0.0, type=float)
+@click.option("--forbidden-rate", default=0.0, type=float)
+@click.option("--open-after", default=0.0, type=float)
+@click.option("--duration", default=60.0, type=float)
+@click.option("--trace", default=None, help="Path of trace of attempts")
+@click.option(
+    "--transport", default="aiohttp", type=click.Choice(["aiohttp", "httpx"])
+)
+def main(**kwargs):
+    logger.remove()
+    report = asyncio.run(run_load_test(**kwargs))
+    first = report["time_to_first_success"]
+    print(f"users:                 {report['users']} ({report['mode']})")
+    print(f"registered:            {report['registered']}")
+    print(f"elapsed:               {report['elapsed']:.2f} s")
+    if first is not None:
+        print(f"time to first success: {first:.3f} s")
+    print(f"registrations/sec:     {report['registrations_per_sec']:.1f}")
+    print(f"requests to stub:      {report['requests']}")
+    print(f"latency p50:           {report['p50'] * 1000:.1f} ms")
+    print(f"latency p99:           {report['p99'] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
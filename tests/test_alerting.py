@@ -0,0 +1,64 @@
+import asyncio
+
+from aiogram.exceptions import TelegramNetworkError
+from aiogram.methods import SendMessage
+
+from registrator_romania.frontend.telegram_bot.alerting import (
+    AlertDispatcher,
+)
+
+
+class FakeSession:
+    closed = 0
+
+    async def close(self):
+        self.closed += 1
+
+
+class FakeBot:
+    def __init__(self, failures: int = 0) -> None:
+        self.session = FakeSession()
+        self.sent: list[tuple[str, object]] = []
+        self._failures = failures
+
+    async def send_message(self, chat_id, text, **kwargs):
+        if self._failures:
+            self._failures -= 1
+            method = SendMessage(chat_id=chat_id, text=text)
+            raise TelegramNetworkError(method, "timeout")
+        self.sent.append(("message", text))
+
+    async def send_document(self, chat_id, document, **kwargs):
+        self.sent.append(("document", document.data))
+
+    async def send_photo(self, chat_id, photo, **kwargs):
+        self.sent.append(("photo", photo.data))
+
+
+def test_coalescing_and_retry():
+    bot = FakeBot(failures=2)
+    dispatcher = AlertDispatcher(
+        bot=bot, chat_id=1, maxsize=5, summary_every=3, backoff=0.01
+    )
+
+    async def main():
+        dispatcher.start()
+        for i in range(4):
+            dispatcher.success(f"USER {i}")
+        for i in range(3):
+            dispatcher.alert(f"error {i}")
+        dispatcher.alert("forbidden", html="<html></html>")
+        dispatcher.screenshot(b"png")
+        # Queue is full, alert dropped without waiting
+        assert not dispatcher.alert("error 4")
+        await dispatcher.stop()
+
+    asyncio.run(main())
+    assert dispatcher.dropped == 1
+    assert bot.session.closed == 1
+    kinds = [kind for kind, _ in bot.sent]
+    assert kinds == ["message", "message", "document", "photo"]
+    summary, errors = bot.sent[0][1], bot.sent[1][1]
+    assert summary.startswith("Successfully registered 4 users")
+    assert "error 0" in errors and "error 2" in errors
+    assert bot.sent[2][1] == b"<html></html>"
@@ -0,0 +1,161 @@
+import asyncio
+import socket
+
+import aiohttp
+from aiohttp.abc import AbstractResolver
+
+from registrator_romania.backend.api.stub_site import StubSite
+from registrator_romania.backend.net.aiohttp_ext import AiohttpSession
+from registrator_romania.backend.proxies.autopool import AutomaticProxyPool
+
+
+SOCKS_PROXY = "socks5://10.0.0.1:1080"
+HTTP_PROXY = "http://10.0.0.2:8080"
+
+
+def create_pool() -> AutomaticProxyPool:
+    pool = AutomaticProxyPool(proxies=[], sources_classes=[])
+    # Sources of proxies are not used in tests
+    pool._scheduler.shutdown(wait=False)
+    return pool
+
+
+async def add_proxies(pool: AutomaticProxyPool, proxies: list[str]):
+    for record in pool._extend_src_proxies(proxies):
+        await pool._accept_proxy(record)
+
+
+def test_socks_session_reused_and_dropped(monkeypatch):
+    connectors = []
+
+    def generate_proxy_connector(self, proxy: str):
+        # Connections go directly to stub instead of socks server
+        connector = aiohttp.TCPConnector()
+        connectors.append((proxy, connector))
+        return connector
+
+    monkeypatch.setattr(
+        AiohttpSession, "generate_proxy_connector", generate_proxy_connector
+    )
+
+    async def main():
+        pool = create_pool()
+        async with StubSite() as stub:
+            await add_proxies(pool, [SOCKS_PROXY, HTTP_PROXY])
+            url = f"{stub.url}/programare_online"
+
+            # Http proxies share common pool of connections
+            assert pool.get_connector(HTTP_PROXY) is pool._pool
+            assert pool.get_connector(None) is pool._pool
+
+            session = await pool.get_session()
+            async with session:
+                for _ in range(3):
+                    async with session.get(url, proxy=SOCKS_PROXY) as resp:
+                        assert resp.status == 200
+            socks_session = pool._proxy_sessions[SOCKS_PROXY]
+            assert len(connectors) == 1
+            assert pool._get_socks_session(SOCKS_PROXY) is socks_session
+            assert stub.requests["/programare_online"] == 3
+
+            # Proxy removed from pool after failures, its session closed
+            for _ in range(30):
+                pool.proxy_not_working(SOCKS_PROXY)
+            assert SOCKS_PROXY not in pool.proxies
+            assert SOCKS_PROXY not in pool._proxy_sessions
+            await asyncio.sleep(0)
+            assert socks_session.closed
+            assert connectors[0][1].closed
+
+            # Proxy added again gets new session
+            await pool._accept_proxy(pool._registry.find(SOCKS_PROXY))
+            assert pool._get_socks_session(SOCKS_PROXY) is not socks_session
+            assert len(connectors) == 2
+
+        for session in pool._proxy_sessions.values():
+            await session.close()
+        for connector in pool._proxy_connectors.values():
+            await connector.close()
+        await pool._pool.close()
+
+    asyncio.run(main())
+
+
+class StubsResolver(AbstractResolver):
+    r"""Resolve any host into port of stub of one proxy."""
+
+    def __init__(self, port: int) -> None:
+        self.port = port
+
+    async def resolve(self, host: str, port: int = 0, family=socket.AF_INET):
+        return [
+            {
+                "hostname": host,
+                "host": "127.0.0.1",
+                "port": self.port,
+                "family": socket.AF_INET,
+                "proto": 0,
+                "flags": 0,
+            }
+        ]
+
+    async def close(self):
+        pass
+
+
+def test_blocked_proxies_excluded_for_target(monkeypatch):
+    # Each socks proxy sees own stub of site
+    stubs = {
+        "socks5://10.0.0.1:1080": StubSite(),
+        "socks5://10.0.0.2:1080": StubSite(forbidden_rate=1),
+        "socks5://10.0.0.3:1080": StubSite(
+            forbidden_rate=1, forbidden_status=429
+        ),
+        "socks5://10.0.0.4:1080": StubSite(
+            forbidden_rate=1, forbidden_status=200
+        ),
+    }
+
+    def generate_proxy_connector(self, proxy: str):
+        port = int(stubs[proxy].url.rsplit(":", 1)[1])
+        return aiohttp.TCPConnector(resolver=StubsResolver(port))
+
+    monkeypatch.setattr(
+        AiohttpSession, "generate_proxy_connector", generate_proxy_connector
+    )
+    url = "http://site.local/programare_online"
+
+    async def wait_for(pool: AutomaticProxyPool, count: int):
+        async with asyncio.timeout(5):
+            while len(pool.get_target_proxies(url)) != count:
+                await asyncio.sleep(0.05)
+        return pool.get_target_proxies(url)
+
+    async def main():
+        for stub in stubs.values():
+            await stub.start()
+        pool = create_pool()
+        try:
+            await add_proxies(pool, list(stubs))
+            pool.watch_target(url, headers={}, recheck_interval=0.2)
+            allowed = await wait_for(pool, 1)
+            # Other proxies are validated too, they are not admitted
+            await asyncio.sleep(0.5)
+            assert pool.get_target_proxies(url) == allowed
+
+            # Site unblocked addresses, next recheck admits proxies
+            for stub in stubs.values():
+                stub.forbidden_rate = 0
+            readmitted = await wait_for(pool, 4)
+        finally:
+            pool.unwatch_targets()
+            for stub in stubs.values():
+                await stub.stop()
+            for connector in pool._proxy_connectors.values():
+                await connector.close()
+            await pool._pool.close()
+        return allowed, readmitted
+
+    allowed, readmitted = asyncio.run(main())
+    assert allowed == ["socks5://10.0.0.1:1080"]
+    assert sorted(readmitted) == sorted(stubs)
@@ -0,0 +1,83 @@
+import asyncio
+from datetime import date
+
+from loguru import logger
+
+from registrator_romania.backend.api.api_romania import APIRomania
+from registrator_romania.backend.api.availability import AvailabilityScanner
+
+
+class FakeAPI:
+    filter_free_days = staticmethod(APIRomania.filter_free_days)
+
+    def __init__(self) -> None:
+        self.calls = {"weekdays": 0, "days": 0, "places": 0}
+
+    async def _get_default_disabled_weekdays(self, year, month, tip_formular):
+        self.calls["weekdays"] += 1
+        # Only wednesdays are open
+        return [0, 1, 2, 4, 5, 6]
+
+    async def _get_disabled_days(self, year, month, tip_formular):
+        self.calls["days"] += 1
+        await asyncio.sleep(0.01)
+        return [6]
+
+    async def get_free_places_for_date(self, tip_formular, month, day, year):
+        self.calls["places"] += 1
+        return {13: 5, 20: 0, 27: 10}.get(day, 1) * tip_formular
+
+
+def test_scan_ranks_dates():
+    api = FakeAPI()
+    scanner = AvailabilityScanner(api=api, rate=0)
+
+    async def main():
+        return await asyncio.gather(
+            scanner.scan([(2024, 11)], [1, 2]),
+            scanner.scan([(2024, 11)], [1, 2]),
+        )
+
+    table, same = asyncio.run(main())
+    assert table == same
+    # 6th of November is disabled, 20th has no places
+    assert [(r["date"].day, r["tip_formular"]) for r in table] == [
+        (27, 2),
+        (13, 2),
+        (27, 1),
+        (13, 1),
+    ]
+    assert table[0] == {
+        "date": date(2024, 11, 27),
+        "tip_formular": 2,
+        "places": 20,
+    }
+    # Concurrent scans shared requests
+    assert api.calls == {"weekdays": 2, "days": 2, "places": 6}
+
+
+class BrokenPlacesAPI(FakeAPI):
+    async def get_free_places_for_date(self, tip_formular, month, day, year):
+        if day == 13:
+            raise RuntimeError("broken answer")
+        return await super().get_free_places_for_date(
+            tip_formular, month, day, year
+        )
+
+
+def test_failed_requests_logged_with_traceback():
+    records = []
+    handler_id = logger.add(records.append, format="{message}")
+    scanner = AvailabilityScanner(api=BrokenPlacesAPI(), rate=0)
+    try:
+        table = asyncio.run(scanner.scan([(2024, 11)], [1]))
+    finally:
+        logger.remove(handler_id)
+
+    # Date with failed request is skipped, others are ranked
+    assert [r["date"].day for r in table] == [27]
+    (record,) = records
+    assert "13.11.2024" in record.record["message"]
+    assert record.record["level"].name == "ERROR"
+    assert isinstance(record.record["exception"].value, RuntimeError)
+    assert "broken answer" in record
@@ -0,0 +1,54 @@
+import asyncio
+import itertools
+
+from registrator_romania.backend.api.captcha import CaptchaTokenPool
+
+
+class FakeApi:
+    def __init__(self) -> None:
+        self.counter = itertools.count(1)
+
+    async def get_recaptcha_token(self):
+        return f"token{next(self.counter)}"
+
+
+def test_expired_tokens_replaced_without_get():
+    api = FakeApi()
+
+    async def main():
+        pool = CaptchaTokenPool(api, size=2, workers=1, ttl=0.2)
+        pool.start()
+        try:
+            # Nobody takes tokens, like while waiting for opening
+            await asyncio.sleep(0.5)
+            size = len(pool)
+            token = await pool.get()
+        finally:
+            await pool.stop()
+        return size, token
+
+    size, token = asyncio.run(main())
+    assert size == 2
+    # First tokens expired and were fetched again
+    assert token not in ("token1", "token2")
+
+
+def test_pool_of_zero_size_does_not_prefetch():
+    api = FakeApi()
+
+    async def main():
+        pool = CaptchaTokenPool(api, size=0, workers=1)
+        pool.start()
+        try:
+            await asyncio.sleep(0.1)
+            prefetched = len(pool)
+            token = await pool.get()
+            await asyncio.sleep(0.1)
+            # Workers are alive and fill pool when it grows
+            pool.size = 1
+            await asyncio.sleep(0.1)
+            return prefetched, token, len(pool)
+        finally:
+            await pool.stop()
+
+    assert asyncio.run(main()) == (0, "token1", 1)
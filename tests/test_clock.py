@@ -0,0 +1,48 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from registrator_romania.backend.clock import (
+    ClockSample,
+    ServerClock,
+    estimate_offset,
+)
+
+
+def sample(sent: float, rtt: float, offset: float) -> ClockSample:
+    # Server answers in the middle of round trip, `Date` cut to seconds
+    server = int(sent + rtt / 2 + offset)
+    return ClockSample(sent, sent + rtt, server)
+
+
+def test_estimate_offset():
+    offset, rtt = 2.345, 0.06
+    samples = [sample(1000 + i * 0.137, rtt, offset) for i in range(12)]
+    estimate = estimate_offset(samples)
+    assert abs(estimate["offset"] - offset) <= estimate["error"]
+    # Much better than precision of header
+    assert estimate["error"] < 0.1
+    assert abs(estimate["latency"] - rtt / 2) < 1e-9
+
+
+class FakeApi:
+    def __init__(self, offset: float) -> None:
+        self.offset = offset
+
+    async def get_server_date(self):
+        sent = datetime.now().timestamp()
+        await asyncio.sleep(0.01)
+        server = datetime.fromtimestamp(int(sent + 0.005 + self.offset))
+        return sent, datetime.now().timestamp(), server
+
+
+def test_sleep_until_server_time():
+    clock = ServerClock(FakeApi(offset=-3.5), samples=10)
+
+    async def main():
+        await clock.sync()
+        target = clock.now() + timedelta(seconds=0.3)
+        return target, await clock.sleep_until(target)
+
+    target, error = asyncio.run(main())
+    assert abs(clock.offset + 3.5) <= clock.estimate["error"] + 0.01
+    assert 0 <= error < 0.005
@@ -0,0 +1,132 @@
+import asyncio
+from datetime import date
+
+import gspread
+
+from registrator_romania.backend.users_sources import (
+    GSpreadUserSource,
+    UsersSync,
+)
+from registrator_romania.backend.utils import USERS_DATA_KEYS
+from tests.test_users_sources import FakeService, make_raw_user
+
+
+class FakeManager:
+    r"""Local fake of `AsyncioGspreadClientManager` and its objects."""
+
+    def __init__(self, values: list[list[str]]) -> None:
+        self.values = values
+        self.modified_time = "2024-11-20T10:00:00.000Z"
+        self.authorizations = 0
+        self.downloads = 0
+        self.metadata_calls = 0
+        self.drive_available = True
+        self.ss = self
+
+    async def authorize(self):
+        self.authorizations += 1
+        return self
+
+    async def open_by_url(self, url: str):
+        return self
+
+    async def get_worksheet(self, index: int):
+        return self
+
+    def get_lastUpdateTime(self) -> str:
+        self.metadata_calls += 1
+        if not self.drive_available:
+            raise gspread.exceptions.GSpreadException("Drive API disabled")
+        return self.modified_time
+
+    async def get_all_values(self) -> list[list[str]]:
+        self.downloads += 1
+        return [row.copy() for row in self.values]
+
+    def update(self, values: list[list[str]]):
+        self.values = values
+        self.modified_time = f"{self.modified_time}+"
+
+
+def sheet_values(*passports: str) -> list[list[str]]:
+    rows = [list(make_raw_user(p).values()) for p in passports]
+    return [list(USERS_DATA_KEYS)] + rows
+
+
+def test_download_only_if_modified():
+    manager = FakeManager(sheet_values("U101", "U102"))
+    source = GSpreadUserSource("https://sheet", manager=manager)
+
+    async def main():
+        assert len(await source.get_users()) == 2
+        assert len(await source.get_users()) == 2
+        manager.update(sheet_values("U101", "U102", "U103"))
+        assert len(await source.get_users()) == 3
+
+    asyncio.run(main())
+    assert manager.downloads == 2
+    assert manager.metadata_calls == 3
+
+
+def test_download_each_time_without_drive_api():
+    manager = FakeManager(sheet_values("U101", "U102"))
+    manager.drive_available = False
+    source = GSpreadUserSource("https://sheet", manager=manager)
+
+    async def main():
+        assert len(await source.get_users()) == 2
+        manager.update(sheet_values("U101", "U102", "U103"))
+        assert len(await source.get_users()) == 3
+
+    asyncio.run(main())
+    assert manager.downloads == 2
+
+
+def test_only_changed_rows_normalized(monkeypatch):
+    from registrator_romania.backend.users_sources import google_sheets
+
+    normalized = []
+    normalize = google_sheets.normalize_users_data
+
+    def counting_normalize(rows, **kwargs):
+        normalized.extend(rows)
+        return normalize(rows, **kwargs)
+
+    monkeypatch.setattr(
+        google_sheets, "normalize_users_data", counting_normalize
+    )
+    manager = FakeManager(sheet_values("U101", "U102"))
+    source = GSpreadUserSource("https://sheet", manager=manager)
+
+    async def main():
+        await source.get_users()
+        manager.update(sheet_values("U101", "U102", "U103"))
+        return await source.get_users()
+
+    users = asyncio.run(main())
+    assert len(normalized) == 3
+    assert [u["Serie și număr Pașaport"] for u in users] == [
+        "U101",
+        "U102",
+        "U103",
+    ]
+
+
+def test_sync_diffs_from_sheet():
+    manager = FakeManager(sheet_values("U101", "U102"))
+    source = GSpreadUserSource("https://sheet", manager=manager)
+    service = FakeService()
+    sync = UsersSync(source, date(2024, 11, 20))
+
+    async def main():
+        assert await sync.sync(service) == (2, 0)
+        assert await sync.sync(service) == (0, 0)
+        manager.update(sheet_values("U102", "U103"))
+        assert await sync.sync(service) == (1, 1)
+
+    asyncio.run(main())
+    assert manager.downloads == 2
+    assert [u["Serie și număr Pașaport"] for u in service.users] == [
+        "U102",
+        "U103",
+    ]
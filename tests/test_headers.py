@@ -0,0 +1,18 @@
+from multidict import CIMultiDictProxy
+
+from registrator_romania.backend.net.headers import HeaderProfiles
+
+
+BASE = {"Accept": "*/*", "User-Agent": "python"}
+
+
+def test_sticky_profiles():
+    profiles = HeaderProfiles(size=4)
+    first = profiles.get("main", BASE, key="http://1.1.1.1:80")
+    assert isinstance(first, CIMultiDictProxy)
+    assert first["accept"] == "*/*"
+    assert first["user-agent"] != "python"
+    assert profiles.get("main", BASE, key="http://1.1.1.1:80") is first
+
+    indexes = {profiles.profile_index(f"user{i}") for i in range(4)}
+    assert indexes == {0, 1, 2, 3}
@@ -0,0 +1,49 @@
+from loguru import logger
+
+from registrator_romania.backend.utils import (
+    BatchedFileSink,
+    filter_by_log_level,
+    sample_log_records,
+)
+
+
+def test_sample_log_records():
+    sample = sample_log_records(burst=3, every=10)
+    records = []
+    handler_id = logger.add(
+        records.append,
+        filter=filter_by_log_level(loglevels=["DEBUG"], sample=sample),
+    )
+    try:
+        for i in range(50):
+            logger.debug(f"proxy {i}")
+            if i % 25 == 0:
+                logger.debug("rare")
+    finally:
+        logger.remove(handler_id)
+
+    messages = [r.record["message"] for r in records]
+    # 3 first, then each tenth of place in code
+    assert messages.count("rare") == 2
+    assert [m for m in messages if m != "rare"] == [
+        "proxy 0",
+        "proxy 1",
+        "proxy 2",
+        "proxy 9",
+        "proxy 19",
+        "proxy 29",
+        "proxy 39",
+        "proxy 49",
+    ]
+
+
+def test_batched_file_sink(tmp_path):
+    path = tmp_path / "logs" / "debug.log"
+    sink = BatchedFileSink(path, interval=60)
+    handler_id = logger.add(sink, format="{message}")
+    for i in range(100):
+        logger.info(f"message {i}")
+    # Rest of messages written on remove
+    logger.remove(handler_id)
+    lines = path.read_text().splitlines()
+    assert lines == [f"message {i}" for i in range(100)]
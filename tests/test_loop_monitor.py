@@ -0,0 +1,34 @@
+import asyncio
+import time
+
+from registrator_romania.backend.loop_monitor import (
+    LoopMonitor,
+    format_summary,
+)
+
+
+def blocking_parse():
+    time.sleep(0.3)
+
+
+def test_blocking_call_site():
+    monitor = LoopMonitor(interval=0.02, block_threshold=0.05)
+
+    async def main():
+        monitor.start()
+        await asyncio.sleep(0.1)
+        blocking_parse()
+        await asyncio.gather(
+            *[asyncio.to_thread(time.sleep, 0.02) for _ in range(100)]
+        )
+        await monitor.stop()
+
+    asyncio.run(main())
+    summary = monitor.summary()
+    assert summary["lag_max"] >= 0.25
+    site, seconds = summary["blocking_sites"][0]
+    assert "blocking_parse" in site
+    assert seconds >= 0.1
+    # More jobs than threads of default executor
+    assert summary["executor_queue_max"] > 0
+    assert "blocking_parse" in format_summary(summary)
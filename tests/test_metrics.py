@@ -0,0 +1,54 @@
+from registrator_romania.backend.net.metrics import (
+    MetricsExporter,
+    MetricsRegistry,
+    aggregate,
+    render,
+)
+
+
+def create_registry() -> MetricsRegistry:
+    registry = MetricsRegistry()
+    registry.counter("attempts_total", "Attempts", ("type",))
+    registry.gauge("places", "Places", ("date",), aggregate="max")
+    registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1))
+    return registry
+
+
+def test_aggregate_processes():
+    snapshots = []
+    for places in (10, 7):
+        registry = create_registry()
+        registry._metrics["attempts_total"].inc("site", amount=2)
+        registry._metrics["places"].set(places, "2024-11-20")
+        registry._metrics["latency_seconds"].observe(0.05)
+        registry._metrics["latency_seconds"].observe(5)
+        snapshots.append(registry.snapshot())
+
+    merged = aggregate(snapshots)
+    assert merged["attempts_total"]["values"] == {("site",): 4}
+    assert merged["places"]["values"] == {("2024-11-20",): 10}
+    assert merged["latency_seconds"]["values"] == {(): [2, 0, 2, 10.1]}
+
+    text = render(merged)
+    assert 'attempts_total{type="site"} 4' in text
+    assert 'latency_seconds_bucket{le="0.1"} 2' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 4' in text
+    assert "latency_seconds_count 4" in text
+    assert "# TYPE places gauge" in text
+
+
+def test_snapshots_of_directory(tmp_path):
+    first = create_registry()
+    first._metrics["attempts_total"].inc("site")
+    MetricsExporter(str(tmp_path), registry=first).write_snapshot()
+
+    exporter = MetricsExporter(str(tmp_path), registry=create_registry())
+    exporter._path = tmp_path / "metrics-other.json"
+    merged = aggregate(exporter.read_snapshots())
+    assert merged["attempts_total"]["values"] == {("site",): 1}
+
+    stale = MetricsExporter(
+        str(tmp_path), registry=create_registry(), stale_after=-1
+    )
+    stale._path = tmp_path / "metrics-other.json"
+    assert aggregate(stale.read_snapshots())["attempts_total"]["values"] == {}
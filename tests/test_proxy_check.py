@@ -0,0 +1,32 @@
+import asyncio
+
+from registrator_romania.backend.proxies.autopool import check_proxy
+
+
+async def fake_proxy(reader, writer):
+    await reader.readuntil(b"\r\n\r\n")
+    writer.write(
+        b"HTTP/1.1 200 OK\r\nContent-Length: 7\r\n"
+        b"Connection: close\r\n\r\n1.2.3.4"
+    )
+    await writer.drain()
+    writer.close()
+
+
+def test_check_proxy():
+    async def main():
+        server = await asyncio.start_server(fake_proxy, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            alive = await check_proxy(
+                f"http://127.0.0.1:{port}", url="http://check.local/"
+            )
+        # Listener closed, network error should not be raised
+        dead = await check_proxy(
+            f"http://127.0.0.1:{port}", url="http://check.local/"
+        )
+        return alive, dead
+
+    alive, dead = asyncio.run(main())
+    assert alive[0] == "1.2.3.4"
+    assert dead == tuple()
@@ -0,0 +1,68 @@
+import asyncio
+import time
+
+from registrator_romania.backend.net.ratelimit import (
+    Priority,
+    RateLimiter,
+    TokenBucket,
+)
+
+
+def test_priority_order():
+    async def main():
+        bucket = TokenBucket(rate=100, capacity=1)
+        await bucket.acquire()
+
+        order = []
+
+        async def request(name, priority):
+            await bucket.acquire(priority)
+            order.append(name)
+
+        await asyncio.gather(
+            request("proxy", Priority.PROXY_CHECK),
+            request("polling", Priority.POLLING),
+            request("registration", Priority.REGISTRATION),
+        )
+        return order
+
+    assert asyncio.run(main()) == ["registration", "polling", "proxy"]
+
+
+def test_backoff_and_buckets():
+    limiter = RateLimiter(rate=8)
+    url = "https://programarecetatenie.eu/status_zile"
+    limiter.report(url, None, 429)
+    bucket = limiter.bucket(url)
+    assert bucket.rate == 4
+    assert bucket.tokens == 0
+
+    # Other egress not affected
+    assert limiter.bucket(url, "http://1.1.1.1:80").rate == 8
+
+    for _ in range(100):
+        limiter.report(url, None, 200)
+    assert bucket.rate == 8
+
+
+def test_registrations_not_limited_by_default():
+    url = "https://programarecetatenie.eu/programare_online"
+
+    async def main(limiter: RateLimiter):
+        start = time.monotonic()
+        for _ in range(20):
+            await limiter.acquire(url, None, Priority.REGISTRATION)
+        return time.monotonic() - start
+
+    limiter = RateLimiter(rate=2)
+    assert asyncio.run(main(limiter)) < 0.1
+    # Forbidden page of registration doesn't pause polling
+    limiter.report(url, None, 403, Priority.REGISTRATION)
+    assert limiter.bucket(url).rate == 2
+
+    # Capacity of bucket is 10 requests, other 10 wait about second
+    limiter = RateLimiter(rate=2, registration_rate=10)
+    assert 0.5 < asyncio.run(main(limiter)) < 2
+    limiter.report(url, None, 403, Priority.REGISTRATION)
+    assert limiter.registration_bucket(url).rate == 5
+    assert limiter.bucket(url).rate == 2
@@ -0,0 +1,50 @@
+import asyncio
+from datetime import datetime
+
+import pandas as pd
+
+from registrator_romania.backend.results import (
+    ResultsJournal,
+    export_reports,
+    read_journals,
+)
+from registrator_romania.backend.utils import generate_fake_users_data
+
+
+def test_journal_and_reports(tmp_path):
+    users = generate_fake_users_data(4)
+    dt = datetime(2024, 11, 20)
+    path = tmp_path / "registrations_20.11.2024" / "results-host-1.jsonl"
+
+    async def main():
+        async with ResultsJournal(str(path), flush_interval=0.01) as journal:
+            journal.record("success", users[0], dt, 4, html="<p>ok</p>")
+            journal.record("error", users[1], dt, 4, error="captcha")
+            journal.record("already_registered", users[2], dt, 2, html="-")
+            journal.record("success", users[0], dt, 4, html="<p>again</p>")
+            await asyncio.sleep(0.05)
+            # Written before stop of journal
+            assert len(read_journals([str(path)])) == 4
+            journal.record("success", users[3], dt, 2)
+
+    asyncio.run(main())
+    # Line cut when process was killed
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"t": 1, "outcome": "succ')
+
+    records = read_journals([str(path)])
+    assert [r["outcome"] for r in records][:2] == ["success", "error"]
+
+    written = export_reports(root=str(tmp_path))
+    assert len(written) == 4
+    dirpath = tmp_path / "registrations_20.11.2024"
+    df = pd.read_csv(dirpath / "successfully-registered-4.csv")
+    assert list(df["Nume Pasaport"]) == [users[0]["Nume Pasaport"]]
+    df = pd.read_excel(dirpath / "successfully-registered-2.xlsx")
+    assert len(df) == 2
+
+    fn = (
+        f"success-{users[0]['Prenume Pasaport']}_"
+        f"{users[0]['Nume Pasaport']}.html"
+    )
+    assert (dirpath / fn).read_text() == "<p>ok</p>"
@@ -0,0 +1,75 @@
+import asyncio
+
+from aiohttp import web
+
+from registrator_romania.backend.proxies.autopool import stream_proxies
+from registrator_romania.backend.proxies.providers.base import (
+    BaseProxyProvider,
+    TextProxyListProvider,
+)
+
+
+class ManyProxies(BaseProxyProvider):
+    def __init__(self, count: int) -> None:
+        self.count = count
+
+    async def iter_proxies(self):
+        for i in range(self.count):
+            yield f"http://10.0.{i // 256 % 256}.{i % 256}:{8000 + i // 65536}"
+
+
+class BrokenProvider(BaseProxyProvider):
+    async def iter_proxies(self):
+        yield "http://10.1.0.1:8080"
+        raise RuntimeError("list is broken")
+
+
+def test_broken_provider_does_not_stop_stream():
+    async def main():
+        sources = [BrokenProvider(), ManyProxies(3)]
+        return [proxy async for proxy in stream_proxies(sources)]
+
+    proxies = asyncio.run(main())
+    assert len(proxies) == 4
+    assert "http://10.1.0.1:8080" in proxies
+
+
+def test_stop_consumer_with_full_queue():
+    async def main():
+        proxies = stream_proxies([ManyProxies(30_000)])
+        assert await anext(proxies)
+        # Producer waits for free place in queue
+        await asyncio.sleep(0.1)
+        await proxies.aclose()
+        for _ in range(5):
+            await asyncio.sleep(0)
+        return asyncio.all_tasks() - {asyncio.current_task()}
+
+    assert not asyncio.run(main())
+
+
+def test_text_list_skips_error_pages():
+    async def handler(request: web.Request):
+        # Page of error with lines looking like proxies
+        status = 200 if request.path == "/http.txt" else 403
+        return web.Response(text="1.2.3.4:80\n5.6.7.8:8080\n", status=status)
+
+    async def main():
+        app = web.Application()
+        app.router.add_get("/{name}", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = runner.addresses[0][1]
+
+        class Provider(TextProxyListProvider):
+            http_url = f"http://127.0.0.1:{port}/http.txt"
+            socks5_url = f"http://127.0.0.1:{port}/socks5.txt"
+
+        try:
+            return await Provider().list_proxies()
+        finally:
+            await runner.cleanup()
+
+    assert asyncio.run(main()) == ["http://1.2.3.4:80", "http://5.6.7.8:8080"]
@@ -0,0 +1,42 @@
+import json
+
+from registrator_romania.backend.net.tracing import Tracer, summarize
+
+
+def test_spans_of_attempts(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    tracer = Tracer(str(path))
+
+    with tracer.span("polling"):
+        pass
+    for i in range(10):
+        with tracer.attempt("U101"):
+            tracer.record("post", (i + 1) / 1000, status=200)
+            with tracer.span("parse"):
+                pass
+    tracer.close()
+
+    spans = [json.loads(line) for line in path.read_text().splitlines()]
+    # Spans outside of attempts are not written
+    assert {s["p"] for s in spans} == {"post", "parse"}
+    assert spans[0] == {
+        "t": spans[0]["t"],
+        "a": "U101#1",
+        "p": "post",
+        "d": 1.0,
+        "status": 200,
+    }
+
+    summary = summarize([str(path)])
+    assert summary["post"]["count"] == 10
+    assert summary["post"]["p50"] == 5.0
+    assert summary["post"]["p99"] == 10.0
+
+
+def test_disabled_tracer():
+    tracer = Tracer()
+    with tracer.attempt("U101") as attempt:
+        with tracer.span("post"):
+            pass
+    assert attempt is None
+    assert tracer.trace_configs() == []
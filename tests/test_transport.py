@@ -0,0 +1,170 @@
+import asyncio
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from registrator_romania.backend.api.api_romania import APIRomania
+from registrator_romania.backend.api.stub_site import StubSite
+from registrator_romania.backend.net.aiohttp_ext import AiohttpSession
+from registrator_romania.backend.net.ratelimit import RateLimiter
+from registrator_romania.backend.net.transport import create_transport
+from registrator_romania.backend.utils import generate_fake_users_data
+
+
+REGISTRATION_DATE = datetime(2030, 5, 15)
+CERTS = Path(__file__).parent / "certs"
+
+
+@pytest.mark.parametrize("name", ["aiohttp", "httpx"])
+def test_transports_against_stub(name: str):
+    users_data = generate_fake_users_data(10)
+    # Pool of httpx is small, requests should wait for connections of it
+    kwargs = {"max_connections": 2} if name == "httpx" else {}
+
+    async def main():
+        async with StubSite(capacity=20) as stub:
+            api = APIRomania(
+                rate_limiter=RateLimiter(rate=1000),
+                base_url=stub.url,
+                transport=create_transport(name, **kwargs),
+            )
+            try:
+                htmls = await asyncio.gather(
+                    *[
+                        api.make_registration(
+                            user_data,
+                            REGISTRATION_DATE,
+                            tip_formular=3,
+                            g_recaptcha_response="token",
+                        )
+                        for user_data in users_data
+                    ]
+                )
+                places = await api.get_free_places_for_date(
+                    tip_formular=3, month=5, day=15, year=2030
+                )
+                server_date = await api.get_server_date()
+                registrations = await api.see_registrations(
+                    tip_formular="3", limit=5
+                )
+            finally:
+                await api.close()
+            return api, htmls, places, server_date, registrations, stub
+
+    api, htmls, places, server_date, registrations, stub = asyncio.run(main())
+    assert all(api.is_success_registration(html) for html in htmls)
+    assert places == 10
+    assert server_date is not None
+    assert registrations["recordsFiltered"] == 10
+    assert len(registrations["data"]) == 5
+    if name == "httpx":
+        assert len(stub.connections) <= 2
+
+
+def test_httpx_multiplexes_over_http2():
+    users_data = generate_fake_users_data(10)
+    stub = StubSite(
+        capacity=20,
+        certfile=str(CERTS / "stub.pem"),
+        keyfile=str(CERTS / "stub-key.pem"),
+    )
+    transport = create_transport("httpx", verify=str(CERTS / "stub.pem"))
+
+    async def main():
+        async with stub:
+            api = APIRomania(
+                rate_limiter=RateLimiter(rate=1000),
+                base_url=stub.url,
+                transport=transport,
+            )
+            try:
+                resp = await transport.request(
+                    "GET", f"{stub.url}/programare_online"
+                )
+                htmls = await asyncio.gather(
+                    *[
+                        api.make_registration(
+                            user_data,
+                            REGISTRATION_DATE,
+                            tip_formular=3,
+                            g_recaptcha_response="token",
+                        )
+                        for user_data in users_data
+                    ]
+                )
+                places = await api.get_free_places_for_date(
+                    tip_formular=3, month=5, day=15, year=2030
+                )
+            finally:
+                await api.close()
+            return api, resp, htmls, places
+
+    api, resp, htmls, places = asyncio.run(main())
+    assert resp.http_version == "HTTP/2"
+    assert all(api.is_success_registration(html) for html in htmls)
+    assert places == 10
+    # All requests are streams of one connection
+    assert len(stub.connections) == 1
+
+
+class FakeProxyPool:
+    r"""Pool what gives plain sessions and counts them."""
+
+    def __init__(self) -> None:
+        self.sessions = 0
+
+    async def get_session(self, timeout: int = 5):
+        self.sessions += 1
+        return AiohttpSession().generate(close_connector=True)
+
+
+def test_polls_go_through_proxy_pool():
+    pool = FakeProxyPool()
+
+    async def main():
+        async with StubSite(capacity=20) as stub:
+            api = APIRomania(
+                rate_limiter=RateLimiter(rate=1000),
+                base_url=stub.url,
+                transport=create_transport("httpx"),
+            )
+            api._proxy_pool = pool
+            try:
+                places = await api.get_free_places_for_date(
+                    tip_formular=3, month=5, day=15, year=2030
+                )
+                days = await api._get_disabled_days(
+                    year=2030, month=5, tip_formular=3
+                )
+                registrations = await api.see_registrations(
+                    tip_formular="3", limit=5
+                )
+            finally:
+                await api.close()
+            return places, days, registrations
+
+    places, days, registrations = asyncio.run(main())
+    assert places == 20
+    assert days == []
+    assert registrations["recordsFiltered"] == 0
+    assert pool.sessions == 3
+
+
+@pytest.mark.parametrize("name", ["aiohttp", "httpx"])
+def test_places_not_json(name: str):
+    async def main():
+        async with StubSite(forbidden_rate=1) as stub:
+            api = APIRomania(
+                rate_limiter=RateLimiter(rate=1000),
+                base_url=stub.url,
+                transport=create_transport(name),
+            )
+            try:
+                return await api.get_free_places_for_date(
+                    tip_formular=3, month=5, day=15, year=2030
+                )
+            finally:
+                await api.close()
+
+    assert asyncio.run(main()) is None
@@ -0,0 +1,104 @@
+import asyncio
+from datetime import date
+
+from registrator_romania.backend.users_sources import (
+    CsvUserSource,
+    TxtUserSource,
+    UserSource,
+    UsersSync,
+)
+from registrator_romania.backend.utils import USERS_DATA_KEYS
+
+
+def make_raw_user(passport: str, name: str = "Ali") -> dict:
+    values = [
+        name,
+        "Yılmaz",
+        "1976-09-09",
+        "İSTANBUL",
+        "Ayşe",
+        "Mehmet",
+        "Ali@Mail.com",
+        passport,
+    ]
+    return dict(zip(USERS_DATA_KEYS, values))
+
+
+class MemorySource(UserSource):
+    def __init__(self, users: list[dict]) -> None:
+        self.users = users
+        self.reads = 0
+
+    async def fingerprint(self) -> str:
+        return str(self.users)
+
+    async def iter_raw_users(self):
+        self.reads += 1
+        for user in self.users:
+            yield user
+
+
+class FakeService:
+    def __init__(self, users: list[dict] = None) -> None:
+        self.users = list(users or [])
+
+    async def get_users_by_reg_date(self, registration_date):
+        return list(self.users)
+
+    async def add_users(self, users_data, registration_date, **kwargs):
+        self.users.extend(users_data)
+        return len(users_data)
+
+    async def remove_user(self, user_data):
+        self.users.remove(user_data)
+
+
+def test_txt_source(tmp_path):
+    path = tmp_path / "users.txt"
+    users = [make_raw_user("U101"), make_raw_user("U102")]
+    users[1]["Data nasterii"] = "Doğum tarihi:09-10-1976"
+    path.write_text(
+        "\n\n".join("\n".join(u.values()) for u in users), encoding="utf-8"
+    )
+    result = list(TxtUserSource(str(path)).read_users())
+    assert [u["Serie și număr Pașaport"] for u in result] == ["U101", "U102"]
+    assert result[1]["Data nasterii"] == "1976-10-09"
+
+
+def test_csv_source(tmp_path):
+    path = tmp_path / "users.csv"
+    path.write_text(
+        ",".join(USERS_DATA_KEYS)
+        + "\n"
+        + ",".join(make_raw_user("0123").values()),
+        encoding="utf-8",
+    )
+    result = asyncio.run(CsvUserSource(str(path)).get_users())
+    assert result[0]["Serie și număr Pașaport"] == "0123"
+    assert result[0]["Prenume Pasaport"] == "ALI"
+
+
+def test_incremental_sync():
+    reg_date = date(2024, 11, 20)
+    source = MemorySource([make_raw_user("U101"), make_raw_user("U102")])
+    service = FakeService()
+    sync = UsersSync(source, reg_date)
+
+    assert asyncio.run(sync.sync(service)) == (2, 0)
+    # Unchanged source is not read again
+    assert asyncio.run(sync.sync(service)) == (0, 0)
+    assert source.reads == 1
+
+    # User registered and removed from database by strategy
+    service.users.pop(0)
+    source.users = [
+        make_raw_user("U101"),
+        make_raw_user("U102", name="Veli"),
+        make_raw_user("U103"),
+    ]
+    assert asyncio.run(sync.sync(service)) == (2, 1)
+    assert [u["Prenume Pasaport"] for u in service.users] == ["VELI", "ALI"]
+    assert [u["Serie și număr Pașaport"] for u in service.users] == [
+        "U102",
+        "U103",
+    ]
@@ -0,0 +1,146 @@
+from datetime import date
+
+import openpyxl
+
+from registrator_romania.backend import utils
+from registrator_romania.backend.utils import (
+    get_users_data_from_xslx,
+    iter_users_from_xlsx,
+    normalize_users_data,
+)
+
+
+def make_user(**kwargs) -> dict:
+    user = {
+        "Prenume Pasaport": "Ali",
+        "Nume Pasaport": "Yılmaz",
+        "Data nasterii": "1976-09-09",
+        "Locul naşterii": "İSTANBUL",
+        "Prenume Mama": "Ayşe",
+        "Prenume Tata": "Mehmet",
+        "Adresa de email": "Ali@Mail.com",
+        "Serie și număr Pașaport": "U12345678",
+    }
+    user.update(kwargs)
+    return user
+
+
+def test_normalize_values():
+    users, report = normalize_users_data(
+        [make_user(**{"Prenume Tata": "Xi"})]
+    )
+    assert report["valid"] == 1
+    assert report["padded"] == {"Prenume Tata": 1}
+    user = users[0]
+    assert user["Prenume Pasaport"] == "ALI"
+    assert user["Nume Pasaport"] == "YILMAZ"
+    assert user["Locul naşterii"] == "ISTANBUL"
+    assert user["Prenume Mama"] == "Ayse"
+    assert user["Prenume Tata"] == "Xii"
+    assert user["Adresa de email"] == "ali@mail.com"
+
+
+def test_normalize_birth_dates():
+    dates = [
+        "Doğum tarihi:09.09.1976",
+        "12/31/1980",
+        "31.12.1980",
+        "5 March 1990",
+        date(2001, 2, 3),
+    ]
+    users, report = normalize_users_data(
+        [make_user(**{"Data nasterii": v}) for v in dates]
+    )
+    assert [u["Data nasterii"] for u in users] == [
+        "1976-09-09",
+        "1980-12-31",
+        "1980-12-31",
+        "1990-03-05",
+        "2001-02-03",
+    ]
+    assert report["dates_fallback"] == 0
+
+
+def test_invalid_rows_reported():
+    users, report = normalize_users_data(
+        [
+            make_user(),
+            make_user(**{"Data nasterii": "not a date"}),
+            make_user(**{"Adresa de email": None}),
+        ]
+    )
+    assert len(users) == 1
+    assert report["total"] == 3
+    assert report["invalid_rows"] == {
+        1: ["Data nasterii"],
+        2: ["Adresa de email"],
+    }
+
+
+def write_xlsx(path, users: list[dict]):
+    w = openpyxl.Workbook()
+    sheet = w.active
+    sheet.append(list(users[0].keys()))
+    for user in users:
+        sheet.append(list(user.values()))
+    w.save(path)
+
+
+def test_iter_users_from_xlsx(tmp_path):
+    path = tmp_path / "users.xlsx"
+    write_xlsx(path, [make_user(), make_user(**{"Data nasterii": "bad"})])
+    users = list(iter_users_from_xlsx(str(path), batch_size=1))
+    assert len(users) == 1
+    assert users[0]["Nume Pasaport"] == "YILMAZ"
+
+
+def test_xlsx_cache(tmp_path, monkeypatch):
+    path = tmp_path / "users.xlsx"
+    write_xlsx(path, [make_user()])
+    cache_dir = tmp_path / "cache"
+    users = get_users_data_from_xslx(str(path), cache_dir=str(cache_dir))
+    assert len(list(cache_dir.iterdir())) == 1
+
+    def fail(*args, **kwargs):
+        raise AssertionError("cached file parsed again")
+
+    monkeypatch.setattr(utils, "iter_users_from_xlsx", fail)
+    cached = get_users_data_from_xslx(str(path), cache_dir=str(cache_dir))
+    assert cached == users
+
+
+def test_xlsx_cache_keyed_by_version_and_pruned(tmp_path, monkeypatch):
+    path = tmp_path / "users.xlsx"
+    other = tmp_path / "other.xlsx"
+    write_xlsx(path, [make_user()])
+    write_xlsx(other, [make_user()])
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    # Cache without version of normalization
+    (cache_dir / f"users_{'0' * 64}.json").write_text("[]")
+
+    get_users_data_from_xslx(str(other), cache_dir=str(cache_dir))
+    get_users_data_from_xslx(str(path), cache_dir=str(cache_dir))
+    assert len(list(cache_dir.iterdir())) == 2
+
+    # New version of normalization parses file again
+    monkeypatch.setattr(utils, "NORMALIZATION_VERSION", 2)
+    parsed = []
+    iter_users = utils.iter_users_from_xlsx
+
+    def counting_iter(*args, **kwargs):
+        parsed.append(args)
+        return iter_users(*args, **kwargs)
+
+    monkeypatch.setattr(utils, "iter_users_from_xlsx", counting_iter)
+    users = get_users_data_from_xslx(str(path), cache_dir=str(cache_dir))
+    assert len(parsed) == 1
+    assert len(users) == 1
+
+    # Changed file replaces its cache, cache of other file is kept
+    write_xlsx(path, [make_user(), make_user(**{"Nume Pasaport": "Kaya"})])
+    users = get_users_data_from_xslx(str(path), cache_dir=str(cache_dir))
+    assert len(users) == 2
+    names = sorted(p.name for p in cache_dir.iterdir())
+    assert len(names) == 2
+    assert sum("_v2_" in name for name in names) == 1
@@ -0,0 +1,77 @@
+import asyncio
+
+from registrator_romania.backend.api.verification import (
+    RegistrationsVerifier,
+)
+
+
+def make_row(i: int) -> dict:
+    return {
+        "nume_pasaport": f"Nume{i}",
+        "prenume_pasaport": f"Prenume{i}",
+        "numar_pasaport": f"U{i:04}",
+    }
+
+
+class FakeAPI:
+    def __init__(self, count: int) -> None:
+        self.rows = [make_row(i) for i in range(count)]
+        self.starts = []
+
+    async def see_registrations(
+        self, tip_formular, data_programarii, limit, start
+    ):
+        self.starts.append(start)
+        return {
+            "recordsTotal": len(self.rows),
+            "recordsFiltered": len(self.rows),
+            "data": self.rows[start : start + limit],
+        }
+
+
+def make_user(i: int) -> dict:
+    return {
+        "Nume Pasaport": f"NUME{i}",
+        "Prenume Pasaport": f"prenume{i}",
+        "Serie și număr Pașaport": f"u{i:04}",
+    }
+
+
+def test_pages_and_incremental_refresh():
+    api = FakeAPI(1203)
+    verifier = RegistrationsVerifier(api, length=500)
+
+    async def main():
+        assert await verifier.refresh()
+        assert sorted(api.starts) == [0, 500, 1000]
+        assert verifier.is_registered(make_user(1202))
+        assert not verifier.is_registered(make_user(1203))
+
+        api.starts.clear()
+        api.rows.extend(make_row(i) for i in range(1203, 1510))
+        assert await verifier.refresh()
+        # Only pages after known rows
+        assert sorted(api.starts) == [1000, 1500]
+
+        users = [make_user(i) for i in (1, 1509, 2000)]
+        return verifier.filter_unregistered(users)
+
+    assert asyncio.run(main()) == [make_user(2000)]
+    assert len(verifier) == 1510
+
+
+def test_rows_inserted_before_known_ones_trigger_full_rescan():
+    api = FakeAPI(1203)
+    verifier = RegistrationsVerifier(api, length=500)
+
+    async def main():
+        assert await verifier.refresh()
+        api.starts.clear()
+        # Site does not promise order, new row can be in first page
+        api.rows.insert(10, make_row(5000))
+        assert await verifier.refresh()
+        assert sorted(api.starts) == [0, 500, 1000, 1000]
+        return verifier.is_registered(make_user(5000))
+
+    assert asyncio.run(main())
+    assert verifier.rows_count == 1204